@@ -2291,10 +2291,12 @@ class AgentTools:
             if not analysis_result:
                 return {"updated": False, "error": "深度分析失败"}
 
-            # 索引到 RAG
-            for cls in analysis_result.get("classes", []):
-                if cls.get("name") == class_name or not class_name:
-                    self.knowledge_base.index_source_analysis(cls.get("name", class_name), cls)
+            # 索引到 RAG（所有匹配的类一次批量写入）
+            self.knowledge_base.index_source_analyses(
+                (cls.get("name", class_name), cls)
+                for cls in analysis_result.get("classes", [])
+                if cls.get("name") == class_name or not class_name
+            )
 
             logger.info(f"已索引源代码分析结果: {class_name}")
             return {"updated": True, "class_name": class_name}
@@ -2,7 +2,7 @@
 
 import os
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Literal, Optional
 
 import yaml
 from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, model_validator
@@ -44,6 +44,10 @@ class LLMConfig(BaseModel):
     verbosity: Optional[str] = Field(
         default=None, description="响应详细程度，可选值: 'low', 'medium', 'high'"
     )
+    persist_response_cache: bool = Field(
+        default=False,
+        description="是否将 temperature 为 0 的请求响应持久化到状态目录，跨运行复用",
+    )
 
 
 class FormattingConfig(BaseModel):
@@ -264,6 +268,17 @@ class EmbeddingConfig(BaseModel):
     api_key: Optional[str] = Field(default=None, description="API 密钥，留空则使用 llm.api_key")
     model: str = Field(default="text-embedding-3-small", description="Embedding 模型名称")
     batch_size: int = Field(default=100, ge=1, description="批量 embedding 的大小")
+    backend: Literal["api", "onnx_int8"] = Field(
+        default="api", description="Embedding 后端，可选值: 'api', 'onnx_int8'"
+    )
+    model_path: Optional[str] = Field(
+        default=None, description="本地 ONNX 模型目录（backend 为 onnx_int8 时使用）"
+    )
+    dimensions: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description="输出向量维度，仅 Matryoshka 训练的模型（如 text-embedding-3 系列）支持，留空使用模型默认维度",
+    )
 
 
 class RetrievalConfig(BaseModel):
@@ -688,6 +703,9 @@ class Settings(BaseModel):
     def resolve_embedding_cache_path(self) -> Path:
         return self.resolve_vector_store_path() / "embedding_cache"
 
+    def resolve_llm_cache_path(self) -> Path:
+        return self.resolve_state_root() / "llm_cache"
+
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典"""
         return self.model_dump()
@@ -53,9 +53,6 @@ class MetricsCollector:
             timestamp=datetime.now(),
         )
 
-        # 计算变异分数
-        metrics.calculate_mutation_score()
-
         # 添加覆盖率信息
         if coverage_info:
             metrics.line_coverage = coverage_info.line_coverage
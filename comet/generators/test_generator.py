@@ -407,21 +407,27 @@ class TestGenerator:
         """
         logger.info(f"尝试修复编译错误: {test_case.class_name}")
 
+        # 重试之间输入不变，修复提示词只渲染一次
+        try:
+            system_prompt, user_prompt = self.prompt_manager.render_fix_test(
+                test_code=test_case.full_code or "",
+                compile_error=compile_error,
+                class_code=class_code,
+            )
+        except Exception as e:
+            logger.warning(f"渲染修复提示词失败: {e}")
+            return None
+
         for attempt in range(max_retries):
             logger.debug(f"修复尝试 {attempt + 1}/{max_retries}")
 
             try:
-                # 使用提示词管理器生成修复提示词
-                system_prompt, user_prompt = self.prompt_manager.render_fix_test(
-                    test_code=test_case.full_code or "",
-                    compile_error=compile_error,
-                    class_code=class_code,
-                )
-
                 # 调用 LLM 修复（不再使用 json_object 格式，使用配置文件的 temperature）
+                # 提示词在重试间不变，重试时跳过响应缓存，避免反复拿到同一个无效回复
                 response = self.llm.chat_with_system(
                     system_prompt=system_prompt,
                     user_prompt=user_prompt,
+                    use_cache=attempt == 0,
                 )
 
                 # DEBUG: 记录原始响应
@@ -468,21 +474,27 @@ class TestGenerator:
         """
         logger.info(f"尝试修复单个测试方法: {method_name}")
 
+        # 重试之间输入不变，修复提示词只渲染一次
+        try:
+            system_prompt, user_prompt = self.prompt_manager.render_fix_single_method(
+                method_code=method_code,
+                class_code=class_code,
+                error_message=error_message,
+            )
+        except Exception as e:
+            logger.warning(f"渲染修复提示词失败: {e}")
+            return None
+
         for attempt in range(max_retries):
             logger.debug(f"修复尝试 {attempt + 1}/{max_retries}")
 
             try:
-                # 使用提示词管理器生成修复提示词
-                system_prompt, user_prompt = self.prompt_manager.render_fix_single_method(
-                    method_code=method_code,
-                    class_code=class_code,
-                    error_message=error_message,
-                )
-
                 # 调用 LLM（不再使用 json_object 格式，使用配置文件的 temperature）
+                # 提示词在重试间不变，重试时跳过响应缓存，避免反复拿到同一个无效回复
                 response = self.llm.chat_with_system(
                     system_prompt=system_prompt,
                     user_prompt=user_prompt,
+                    use_cache=attempt == 0,
                 )
 
                 # DEBUG: 记录原始响应
@@ -5,7 +5,13 @@
 """
 
 # 基础组件（无 chromadb 依赖）
-from .bug_parser import BugReport, BugReportParser, load_bug_reports
+from .bug_parser import (
+    BugReport,
+    BugReportCache,
+    BugReportParser,
+    iter_bug_reports,
+    load_bug_reports,
+)
 from .chunker import (
     ChunkingStrategy,
     CodeChunker,
@@ -23,6 +29,7 @@ __all__ = [
     "create_knowledge_base",
     # Embedding（延迟导入）
     "EmbeddingService",
+    "ONNXEmbeddingService",
     # 向量存储（延迟导入）
     "VectorStore",
     "Document",
@@ -33,7 +40,9 @@ __all__ = [
     # Bug 解析
     "BugReport",
     "BugReportParser",
+    "BugReportCache",
     "load_bug_reports",
+    "iter_bug_reports",
     # 分块
     "TextChunk",
     "ChunkingStrategy",
@@ -46,6 +55,7 @@ __all__ = [
 # 延迟导入 RAG 相关组件（依赖 chromadb）
 _rag_components = {
     "EmbeddingService": "embedding",
+    "ONNXEmbeddingService": "embedding",
     "VectorStore": "vector_store",
     "Document": "vector_store",
     "SearchResult": "vector_store",
@@ -3,10 +3,15 @@
 支持任意格式的文本文件，完全依赖语义搜索进行相关性匹配。
 """
 
+import hashlib
+import json
 import logging
-from dataclasses import dataclass, field
+import os
+import sqlite3
+import threading
+from dataclasses import asdict, dataclass, field, replace
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -40,6 +45,73 @@ class BugReport:
         return "\n\n".join(parts)
 
 
+class BugReportCache:
+    """Bug 报告解析结果的持久化缓存
+
+    以 (路径, mtime_ns, 文件大小) 的哈希作为键，命中判断只需要一次 stat，
+    无需读取文件内容。文件未变化时直接复用上次的解析结果。
+    """
+
+    CACHE_FILE_NAME = "bug_reports.db"
+
+    def __init__(self, cache_dir: str):
+        """
+        初始化缓存
+
+        Args:
+            cache_dir: 缓存目录
+        """
+        cache_path = Path(cache_dir)
+        cache_path.mkdir(parents=True, exist_ok=True)
+        self.db_path = cache_path / self.CACHE_FILE_NAME
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._lock = threading.RLock()
+        with self._lock:
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS bug_reports (
+                    cache_key TEXT PRIMARY KEY,
+                    payload TEXT NOT NULL
+                )
+            """
+            )
+            self.conn.commit()
+
+    @staticmethod
+    def make_key(file_path: str, stat_result: os.stat_result) -> str:
+        """根据路径和 stat 信息生成缓存键"""
+        raw = f"{file_path}:{stat_result.st_mtime_ns}:{stat_result.st_size}"
+        return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+    def get(self, cache_key: str) -> Optional[BugReport]:
+        """读取缓存的 Bug 报告，未命中返回 None"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT payload FROM bug_reports WHERE cache_key = ?", (cache_key,)
+            ).fetchone()
+        if row is None:
+            return None
+        try:
+            return BugReport(**json.loads(row[0]))
+        except (TypeError, ValueError) as e:
+            logger.debug(f"Bug 报告缓存条目无效，将重新解析: {e}")
+            return None
+
+    def put(self, cache_key: str, report: BugReport) -> None:
+        """写入 Bug 报告解析结果"""
+        payload = json.dumps(asdict(report), ensure_ascii=False)
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO bug_reports VALUES (?, ?)", (cache_key, payload)
+            )
+            self.conn.commit()
+
+    def close(self) -> None:
+        """关闭缓存连接"""
+        with self._lock:
+            self.conn.close()
+
+
 class BugReportParser:
     """Bug 报告解析器 - 支持任意格式的文本文件
 
@@ -137,7 +209,9 @@ class BugReportParser:
 
         return metadata
 
-    def parse_file(self, file_path: str) -> Optional[BugReport]:
+    def parse_file(
+        self, file_path: str, cache: Optional[BugReportCache] = None
+    ) -> Optional[BugReport]:
         """
         解析单个文件
 
@@ -145,6 +219,7 @@ class BugReportParser:
 
         Args:
             file_path: 文件路径
+            cache: 可选的解析结果缓存，文件未变化时跳过读取和解析
 
         Returns:
             BugReport 对象，解析失败返回 None
@@ -152,7 +227,9 @@ class BugReportParser:
         path = Path(file_path)
 
         # 检查文件是否存在
-        if not path.exists():
+        try:
+            stat_result = path.stat()
+        except OSError:
             logger.warning(f"文件不存在: {file_path}")
             return None
 
@@ -162,6 +239,14 @@ class BugReportParser:
             logger.debug(f"不支持的文件类型: {suffix}, 跳过 {file_path}")
             return None
 
+        cache_key = None
+        if cache is not None:
+            cache_key = cache.make_key(str(path), stat_result)
+            cached_report = cache.get(cache_key)
+            if cached_report is not None:
+                # ID 依赖本次解析的计数器，命中时重新生成以保持与未缓存时一致
+                return replace(cached_report, id=self._generate_id(file_path))
+
         try:
             with open(path, "r", encoding="utf-8") as f:
                 raw_content = f.read()
@@ -183,7 +268,7 @@ class BugReportParser:
             # 提取标题
             title = self._extract_title(content, str(path), metadata)
 
-            return BugReport(
+            report = BugReport(
                 id=self._generate_id(file_path),
                 title=title,
                 file_path=str(path),
@@ -191,52 +276,132 @@ class BugReportParser:
                 file_type=suffix.lstrip("."),
                 metadata=metadata,
             )
+            if cache is not None and cache_key is not None:
+                cache.put(cache_key, report)
+            return report
 
         except Exception as e:
             logger.warning(f"解析 Bug 报告失败 {file_path}: {e}")
             return None
 
-    def parse_directory(self, directory: str) -> List[BugReport]:
+    def iter_paths(self, dir_path: Path) -> Iterator[str]:
+        """
+        递归遍历目录，逐个产出支持的文件路径
+
+        使用 os.scandir 单次遍历整个目录树，替代按扩展名多次 glob。
+
+        Args:
+            dir_path: 目录路径
+
+        Yields:
+            支持的文件路径
+        """
+        pending = [str(dir_path)]
+        while pending:
+            current = pending.pop()
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.append(entry.path)
+                        elif (
+                            entry.is_file()
+                            and os.path.splitext(entry.name)[1].lower() in self.SUPPORTED_EXTENSIONS
+                        ):
+                            yield entry.path
+            except OSError as e:
+                logger.warning(f"无法读取目录 {current}: {e}")
+
+    def parse_directory(
+        self, directory: str, cache: Optional[BugReportCache] = None
+    ) -> List[BugReport]:
         """
         解析目录下的所有支持的文件
 
         Args:
             directory: 目录路径
+            cache: 可选的解析结果缓存
 
         Returns:
             BugReport 列表
         """
+        return list(self.iter_directory(directory, cache=cache))
+
+    def iter_directory(
+        self, directory: str, cache: Optional[BugReportCache] = None
+    ) -> Iterator[BugReport]:
+        """
+        逐个解析目录下的所有支持的文件
+
+        Args:
+            directory: 目录路径
+            cache: 可选的解析结果缓存
+
+        Yields:
+            BugReport
+        """
         dir_path = Path(directory)
         if not dir_path.exists() or not dir_path.is_dir():
             logger.warning(f"Bug 报告目录不存在: {directory}")
-            return []
+            return
 
-        reports = []
+        count = 0
 
-        # 遍历所有支持的文件类型
-        for ext in self.SUPPORTED_EXTENSIONS:
-            pattern = f"**/*{ext}"
-            for file_path in dir_path.glob(pattern):
-                report = self.parse_file(str(file_path))
-                if report:
-                    reports.append(report)
+        # 单次遍历目录树，边发现边解析，不预先物化文件列表
+        for file_path in self.iter_paths(dir_path):
+            report = self.parse_file(file_path, cache=cache)
+            if report:
+                count += 1
+                yield report
 
-        logger.info(f"从 {directory} 解析了 {len(reports)} 个 Bug 报告")
-        return reports
+        logger.info(f"从 {directory} 解析了 {count} 个 Bug 报告")
 
 
-def load_bug_reports(directory: Optional[str]) -> List[BugReport]:
+def load_bug_reports(directory: Optional[str], cache_dir: Optional[str] = None) -> List[BugReport]:
     """
     加载 Bug 报告的便捷函数
 
     Args:
         directory: Bug 报告目录
+        cache_dir: 解析结果缓存目录，为 None 则不缓存
 
     Returns:
         BugReport 列表
     """
+    return list(iter_bug_reports(directory, cache_dir=cache_dir))
+
+
+def iter_bug_reports(
+    directory: Optional[str], cache_dir: Optional[str] = None
+) -> Iterator[BugReport]:
+    """
+    流式加载 Bug 报告，边遍历目录边解析
+
+    缓存连接在生成器结束或被关闭时释放。
+
+    Args:
+        directory: Bug 报告目录
+        cache_dir: 解析结果缓存目录，为 None 则不缓存
+
+    Yields:
+        BugReport
+    """
     if not directory:
-        return []
+        return
 
     parser = BugReportParser()
-    return parser.parse_directory(directory)
+    if not cache_dir:
+        yield from parser.iter_directory(directory)
+        return
+
+    try:
+        cache = BugReportCache(cache_dir)
+    except (OSError, sqlite3.Error) as e:
+        logger.warning(f"打开 Bug 报告缓存失败，将不使用缓存: {e}")
+        yield from parser.iter_directory(directory)
+        return
+
+    try:
+        yield from parser.iter_directory(directory, cache=cache)
+    finally:
+        cache.close()
@@ -37,6 +37,30 @@ def count_tokens(text: str) -> int:
     return len(text) // 3
 
 
+_CODE_COMMENT_PATTERN = re.compile(r"//[^\n]*|/\*.*?\*/", re.DOTALL)
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def code_query_snippet(code: str, limit: int) -> str:
+    """
+    生成用于检索查询的代码片段
+
+    先去掉注释并压缩空白再截断，使有限的字符预算承载更多代码信息；
+    同一份代码总是得到相同的片段，便于命中 embedding 缓存。
+
+    Args:
+        code: 源代码
+        limit: 片段最大字符数
+
+    Returns:
+        规范化后的代码片段
+    """
+    # 只处理足够长的前缀，避免对整个大文件做正则替换
+    prefix = code[: limit * 4]
+    without_comments = _CODE_COMMENT_PATTERN.sub(" ", prefix)
+    return _WHITESPACE_PATTERN.sub(" ", without_comments).strip()[:limit]
+
+
 @dataclass
 class TextChunk:
     """文本块"""
@@ -1,7 +1,6 @@
 """Embedding 服务模块"""
 
 import hashlib
-import json
 import logging
 import os
 import threading
@@ -9,7 +8,8 @@ import time
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
-from openai import OpenAI
+import orjson
+from openai import NOT_GIVEN, OpenAI
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +24,7 @@ class EmbeddingService:
         model: str = "text-embedding-3-small",
         batch_size: int = 100,
         cache_dir: Optional[str] = None,
+        dimensions: Optional[int] = None,
     ):
         """
         初始化 Embedding 服务
@@ -34,20 +35,36 @@ class EmbeddingService:
             model: Embedding 模型名称
             batch_size: 批量 embedding 的大小
             cache_dir: 缓存目录，为 None 则不缓存
+            dimensions: 输出向量维度，由 Matryoshka 模型在服务端截断，None 表示模型默认维度
         """
         self.base_url = base_url
         self.api_key = api_key
-        self.model = model
-        self.batch_size = batch_size
-        self.cache_dir = Path(cache_dir) if cache_dir else None
 
         # 初始化 OpenAI 客户端
         self.client = OpenAI(base_url=base_url, api_key=api_key)
 
+        self._init_common(model, batch_size, cache_dir, dimensions)
+
+    def _init_common(
+        self,
+        model: str,
+        batch_size: int,
+        cache_dir: Optional[str],
+        dimensions: Optional[int] = None,
+    ) -> None:
+        """初始化各后端共用的模型标识、批大小、输出维度及 embedding 缓存"""
+        self.model = model
+        self.batch_size = batch_size
+        self.dimensions = dimensions
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+
         # 内存缓存
         self._cache: Dict[str, List[float]] = {}
         self._cache_lock = threading.RLock()
 
+        # 维度探测结果缓存
+        self._dimension: Optional[int] = None
+
         # 确保缓存目录存在
         if self.cache_dir:
             self.cache_dir.mkdir(parents=True, exist_ok=True)
@@ -55,7 +72,9 @@ class EmbeddingService:
 
     def _get_cache_key(self, text: str) -> str:
         """生成缓存键"""
-        content = f"{self.model}:{text}"
+        # 截断维度的向量与完整向量不能混用；未设置维度时保持原有键，已有缓存继续有效
+        model = f"{self.model}@{self.dimensions}" if self.dimensions else self.model
+        content = f"{model}:{text}"
         return hashlib.md5(content.encode()).hexdigest()
 
     def _load_cache(self) -> None:
@@ -66,20 +85,21 @@ class EmbeddingService:
         cache_file = self.cache_dir / "embedding_cache.json"
         if cache_file.exists():
             try:
+                # orjson 直接解析字节，避免标准库 json 逐个构造浮点数的开销
+                cache_data = orjson.loads(cache_file.read_bytes())
                 with self._cache_lock:
-                    with open(cache_file, "r", encoding="utf-8") as f:
-                        self._cache = json.load(f)
-                logger.info(f"从缓存加载了 {len(self._cache)} 个 embedding")
+                    self._cache = cache_data
+                logger.info("从缓存加载了 %s 个 embedding", len(self._cache))
             except Exception as e:
-                logger.warning(f"加载 embedding 缓存失败: {e}")
+                logger.warning("加载 embedding 缓存失败: %s", e)
                 with self._cache_lock:
                     self._cache = {}
                 corrupt_file = self.cache_dir / f"embedding_cache.corrupt-{int(time.time())}.json"
                 try:
                     cache_file.replace(corrupt_file)
-                    logger.warning(f"已隔离损坏的 embedding 缓存文件: {corrupt_file}")
+                    logger.warning("已隔离损坏的 embedding 缓存文件: %s", corrupt_file)
                 except Exception as rename_error:
-                    logger.warning(f"隔离损坏的 embedding 缓存文件失败: {rename_error}")
+                    logger.warning("隔离损坏的 embedding 缓存文件失败: %s", rename_error)
 
     def _save_cache(self) -> None:
         """保存缓存到磁盘"""
@@ -91,13 +111,13 @@ class EmbeddingService:
         try:
             with self._cache_lock:
                 cache_copy = dict(self._cache)
-                with open(temp_file, "w", encoding="utf-8") as f:
-                    json.dump(cache_copy, f)
+                with open(temp_file, "wb") as f:
+                    f.write(orjson.dumps(cache_copy))
                     f.flush()
                     os.fsync(f.fileno())
                 os.replace(temp_file, cache_file)
         except Exception as e:
-            logger.warning(f"保存 embedding 缓存失败: {e}")
+            logger.warning("保存 embedding 缓存失败: %s", e)
             if temp_file.exists():
                 try:
                     temp_file.unlink()
@@ -123,11 +143,7 @@ class EmbeddingService:
 
         # 调用 API
         try:
-            response = self.client.embeddings.create(
-                model=self.model,
-                input=text,
-            )
-            embedding = response.data[0].embedding
+            embedding = self._request_embeddings([text])[0]
 
             # 更新缓存
             with self._cache_lock:
@@ -136,7 +152,7 @@ class EmbeddingService:
 
             return embedding
         except Exception as e:
-            logger.warning(f"获取 embedding 失败: {e}")
+            logger.warning("获取 embedding 失败: %s", e)
             raise
 
     def embed_batch(self, texts: List[str]) -> List[List[float]]:
@@ -174,16 +190,12 @@ class EmbeddingService:
             batch_texts = [t[1] for t in batch]
 
             try:
-                response = self.client.embeddings.create(
-                    model=self.model,
-                    input=batch_texts,
-                )
+                batch_embeddings = self._request_embeddings(batch_texts)
 
                 # 处理响应
-                for j, embedding_data in enumerate(response.data):
+                for j, embedding in enumerate(batch_embeddings):
                     original_idx = batch[j][0]
                     original_text = batch[j][1]
-                    embedding = embedding_data.embedding
 
                     results[original_idx] = embedding
 
@@ -194,7 +206,7 @@ class EmbeddingService:
                     cache_updated = True
 
             except Exception as e:
-                logger.warning(f"批量获取 embedding 失败: {e}")
+                logger.warning("批量获取 embedding 失败: %s", e)
                 raise
 
         # 保存缓存
@@ -203,16 +215,37 @@ class EmbeddingService:
 
         return [r for r in results if r is not None]
 
+    def _request_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        调用后端计算一批未命中缓存的文本的 embedding
+
+        Args:
+            texts: 文本列表
+
+        Returns:
+            与输入顺序一致的 embedding 向量列表
+        """
+        response = self.client.embeddings.create(
+            model=self.model,
+            input=texts,
+            dimensions=self.dimensions or NOT_GIVEN,
+        )
+        return [embedding_data.embedding for embedding_data in response.data]
+
     def get_embedding_dimension(self) -> int:
         """
         获取 embedding 维度
 
+        只在首次调用时探测一次，后续直接返回缓存结果。
+
         Returns:
             embedding 维度
         """
-        # 使用一个简单的测试文本获取维度
-        test_embedding = self.embed("test")
-        return len(test_embedding)
+        if self._dimension is None:
+            # 使用一个简单的测试文本获取维度
+            test_embedding = self.embed("test")
+            self._dimension = len(test_embedding)
+        return self._dimension
 
     @classmethod
     def from_config(
@@ -232,6 +265,15 @@ class EmbeddingService:
         Returns:
             EmbeddingService 实例
         """
+        if embedding_config.backend == "onnx_int8":
+            if not embedding_config.model_path:
+                raise ValueError("本地 ONNX Embedding 需要配置 model_path")
+            return ONNXEmbeddingService(
+                model_path=embedding_config.model_path,
+                batch_size=embedding_config.batch_size,
+                cache_dir=cache_dir,
+            )
+
         api_key = embedding_config.api_key or llm_api_key
         if not api_key:
             raise ValueError("Embedding API 密钥未配置")
@@ -242,4 +284,100 @@ class EmbeddingService:
             model=embedding_config.model,
             batch_size=embedding_config.batch_size,
             cache_dir=cache_dir,
+            dimensions=embedding_config.dimensions,
         )
+
+
+class ONNXEmbeddingService(EmbeddingService):
+    """
+    本地 ONNX Embedding 服务 - 使用 int8 量化的 Sentence Transformer 模型
+
+    模型目录需包含 tokenizer.json 以及 model_quantized.onnx（或 model.onnx），
+    例如用 optimum 对 all-MiniLM-L6-v2 做动态 int8 量化后的导出结果。
+    与 API 后端共用缓存与分批逻辑，无需网络请求。
+    """
+
+    MODEL_FILES = ("model_quantized.onnx", "model.onnx")
+
+    def __init__(
+        self,
+        model_path: str,
+        batch_size: int = 100,
+        cache_dir: Optional[str] = None,
+        max_length: int = 256,
+    ):
+        """
+        初始化本地 ONNX Embedding 服务
+
+        Args:
+            model_path: 导出的 ONNX 模型目录
+            batch_size: 单次推理的批大小
+            cache_dir: 缓存目录，为 None 则不缓存
+            max_length: 分词后的最大 token 数，超出部分截断
+        """
+        self.model_path = Path(model_path).expanduser().resolve()
+        self.max_length = max_length
+        self._session: Any = None
+        self._tokenizer: Any = None
+        self._session_lock = threading.Lock()
+
+        # 缓存键带上后端与模型目录的绝对路径，避免与 API 模型或同名目录下的其他模型混用
+        self._init_common(f"onnx_int8:{self.model_path}", batch_size, cache_dir)
+
+    def _load_model(self) -> tuple[Any, Any]:
+        """首次推理时加载分词器和推理会话"""
+        with self._session_lock:
+            if self._session is None:
+                try:
+                    import onnxruntime as ort
+                    from tokenizers import Tokenizer
+                except ImportError as e:
+                    raise ImportError(
+                        "本地 ONNX Embedding 需要安装可选依赖 onnx: "
+                        "pip install 'comet-l[onnx]' 或 uv sync --extra onnx"
+                    ) from e
+
+                model_file = next(
+                    (
+                        self.model_path / name
+                        for name in self.MODEL_FILES
+                        if (self.model_path / name).exists()
+                    ),
+                    None,
+                )
+                if model_file is None:
+                    raise FileNotFoundError(f"未找到 ONNX 模型文件: {self.model_path}")
+
+                tokenizer = Tokenizer.from_file(str(self.model_path / "tokenizer.json"))
+                tokenizer.enable_truncation(max_length=self.max_length)
+                tokenizer.enable_padding()
+
+                options = ort.SessionOptions()
+                options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+                self._session = ort.InferenceSession(
+                    str(model_file), options, providers=["CPUExecutionProvider"]
+                )
+                self._tokenizer = tokenizer
+                logger.info("已加载本地 ONNX Embedding 模型: %s", model_file)
+        return self._session, self._tokenizer
+
+    def _request_embeddings(self, texts: List[str]) -> List[List[float]]:
+        import numpy as np
+
+        session, tokenizer = self._load_model()
+        encodings = tokenizer.encode_batch(texts)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": attention_mask,
+        }
+        if any(item.name == "token_type_ids" for item in session.get_inputs()):
+            feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+
+        token_embeddings = session.run(None, feeds)[0]
+
+        # 按注意力掩码做均值池化，再做 L2 归一化，与 sentence-transformers 的输出一致
+        mask = attention_mask[..., None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return (pooled / norms).tolist()
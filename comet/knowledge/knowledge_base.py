@@ -2,24 +2,122 @@
 
 from __future__ import annotations
 
+import bisect
+import hashlib
 import json
 import logging
 import math
+import queue
 import threading
-from dataclasses import dataclass
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, Dict, List, Mapping, Optional
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Tuple,
+    cast,
+)
+
+import orjson
+from pydantic import ConfigDict, TypeAdapter
 
 from ..config.settings import KnowledgeConfig
 from ..models import Contract, Pattern
 from ..store.knowledge_store import KnowledgeStore
+from ..utils.log_context import bind_current_log_context
+from .bug_parser import BugReport, iter_bug_reports, load_bug_reports
+from .chunker import MethodAnalysisChunker, code_query_snippet
 
 logger = logging.getLogger(__name__)
 
+# 缓存快照按列表整体序列化/校验，一次调用处理全部元素；延迟构建以免导入时生成 schema
+_PATTERN_LIST_ADAPTER = TypeAdapter(List[Pattern], config=ConfigDict(defer_build=True))
+_CONTRACT_LIST_ADAPTER = TypeAdapter(List[Contract], config=ConfigDict(defer_build=True))
+
 if TYPE_CHECKING:
     from .embedding import EmbeddingService
     from .retriever import KnowledgeRetriever
-    from .vector_store import VectorStore
+    from .vector_store import Document, KnowledgeType, SearchResult, VectorStore
+
+
+class _VectorStoreSymbols(NamedTuple):
+    document: type[Document]
+    knowledge_type: type[KnowledgeType]
+    search_result: type[SearchResult]
+
+
+# vector_store 依赖 chromadb，只在首次使用时导入一次，之后直接复用模块级引用
+_vector_store_symbols: _VectorStoreSymbols | None = None
+
+
+def _get_vector_store_symbols() -> _VectorStoreSymbols:
+    global _vector_store_symbols
+    if _vector_store_symbols is None:
+        from .vector_store import Document, KnowledgeType, SearchResult
+
+        _vector_store_symbols = _VectorStoreSymbols(Document, KnowledgeType, SearchResult)
+    return _vector_store_symbols
+
+
+@lru_cache(maxsize=4096)
+def _format_contract_text(
+    class_name: str,
+    method_name: str,
+    method_signature: str,
+    preconditions: tuple[str, ...],
+    postconditions: tuple[str, ...],
+    exceptions: tuple[str, ...],
+    description: Optional[str],
+) -> str:
+    """按字段内容缓存契约的索引文本，重复索引同一契约时直接复用"""
+    return "\n".join(
+        filter(
+            None,
+            (
+                f"Contract for {class_name}.{method_name}",
+                f"Signature: {method_signature}",
+                f"Preconditions: {', '.join(preconditions)}" if preconditions else "",
+                f"Postconditions: {', '.join(postconditions)}" if postconditions else "",
+                f"Exceptions: {', '.join(exceptions)}" if exceptions else "",
+                f"Description: {description}" if description else "",
+            ),
+        )
+    )
+
+
+@lru_cache(maxsize=4096)
+def _format_pattern_text(
+    name: str,
+    category: str,
+    description: str,
+    template: str,
+    examples: tuple[str, ...],
+    mutation_strategy: Optional[str],
+) -> str:
+    """按字段内容缓存模式的索引文本"""
+    return "\n".join(
+        filter(
+            None,
+            (
+                f"Defect Pattern: {name}",
+                f"Category: {category}",
+                f"Description: {description}",
+                f"Template: {template}",
+                f"Examples: {', '.join(examples)}" if examples else "",
+                f"Mutation Strategy: {mutation_strategy}" if mutation_strategy else "",
+            ),
+        )
+    )
 
 
 @dataclass(slots=True, frozen=True)
@@ -54,7 +152,6 @@ def build_bug_report_shared_asset(
     llm_api_key: str | None,
     asset_root: str | Path,
 ) -> BugReportSharedAsset:
-    from .bug_parser import load_bug_reports
     from .embedding import EmbeddingService
 
     resolved_bug_reports_dir = Path(bug_reports_dir).expanduser().resolve()
@@ -65,7 +162,10 @@ def build_bug_report_shared_asset(
     snapshot_path = resolved_asset_root / "documents.json"
     embedding_cache_dir = resolved_asset_root / "embedding_cache"
 
-    reports = load_bug_reports(str(resolved_bug_reports_dir))
+    reports = load_bug_reports(
+        str(resolved_bug_reports_dir),
+        cache_dir=str(resolved_asset_root / "bug_report_cache"),
+    )
     contents = [report.to_text() for report in reports]
     embedding_service = EmbeddingService.from_config(
         config.embedding,
@@ -123,8 +223,72 @@ def build_bug_report_shared_asset(
     )
 
 
+def _pattern_rank(pattern: Pattern) -> tuple[float, int]:
+    """模式排序键，与存储层 ORDER BY success_rate DESC, usage_count DESC 一致"""
+    return (-pattern.success_rate, -pattern.usage_count)
+
+
+@dataclass(slots=True)
+class _ClassContracts:
+    """单个类的契约缓存，附带按方法名的索引"""
+
+    contracts: List[Contract]
+    by_method: Dict[str, List[Contract]]
+
+    @classmethod
+    def build(cls, contracts: List[Contract]) -> "_ClassContracts":
+        by_method: Dict[str, List[Contract]] = {}
+        for contract in contracts:
+            by_method.setdefault(contract.method_name, []).append(contract)
+        return cls(contracts=contracts, by_method=by_method)
+
+
+@dataclass(slots=True)
+class _PatternCache:
+    """
+    全量模式缓存及按最小置信度过滤的有序视图
+
+    创建后列表不再修改，更新时生成新对象整体替换，读取方无需加锁。
+    """
+
+    patterns: List[Pattern]
+    views: Dict[float, List[Pattern]] = field(default_factory=dict)
+    by_id: Dict[str, Pattern] = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.by_id = {p.id: p for p in self.patterns}
+
+    def top(self, min_confidence: float) -> List[Pattern]:
+        view = self.views.get(min_confidence)
+        if view is None:
+            view = [p for p in self.patterns if p.confidence >= min_confidence]
+            view = self.views.setdefault(min_confidence, view)
+        return view
+
+    def with_replaced(self, old: Pattern, updated: Pattern) -> "_PatternCache":
+        """返回用 updated 替换 old 后的新缓存，新对象按排序键二分插入"""
+
+        def replace_in(ordered: List[Pattern]) -> List[Pattern]:
+            result = [p for p in ordered if p is not old]
+            bisect.insort(result, updated, key=_pattern_rank)
+            return result
+
+        return _PatternCache(
+            patterns=replace_in(self.patterns),
+            views={
+                min_confidence: (replace_in(view) if old.confidence >= min_confidence else view)
+                for min_confidence, view in self.views.items()
+            },
+        )
+
+
 class KnowledgeBase:
-    """知识库管理类 - 管理 Patterns 和 Contracts（传统模式）"""
+    """
+    知识库管理类 - 管理 Patterns 和 Contracts（传统模式）
+
+    缓存可被多个线程共享：读取方不加锁，只读取已发布的不可变对象；
+    写入方（从存储加载、失效、更新）在 _cache_lock 下生成新对象后整体替换。
+    """
 
     def __init__(self, store: KnowledgeStore):
         """
@@ -134,9 +298,13 @@ class KnowledgeBase:
             store: 知识库存储实例
         """
         self.store = store
-        self._contracts_cache: Dict[str, List[Contract]] = {}
-        self._patterns_cache: Optional[List[Pattern]] = None
+        self._contracts_cache: Dict[str, _ClassContracts] = {}
+        self._pattern_cache: Optional[_PatternCache] = None
+        self._cache_lock = threading.Lock()
         self._closed = False
+        # 内存缓存所对应的数据库文件版本；为 None 时不写缓存快照
+        self._cache_db_version: Optional[List[int]] = self._db_version()
+        self._load_cache_snapshot()
 
     def add_contract(self, contract: Contract) -> None:
         """
@@ -145,11 +313,11 @@ class KnowledgeBase:
         Args:
             contract: 契约对象
         """
-        self.store.save_contract(contract)
+        self._write_store(self.store.save_contract, contract)
         # 清除缓存
-        if contract.class_name in self._contracts_cache:
-            del self._contracts_cache[contract.class_name]
-        logger.info(f"添加契约: {contract.class_name}.{contract.method_name}")
+        with self._cache_lock:
+            self._contracts_cache.pop(contract.class_name, None)
+        logger.info("添加契约: %s.%s", contract.class_name, contract.method_name)
 
     def get_contracts_for_class(self, class_name: str) -> List[Contract]:
         """
@@ -161,9 +329,19 @@ class KnowledgeBase:
         Returns:
             契约列表
         """
-        if class_name not in self._contracts_cache:
-            self._contracts_cache[class_name] = self.store.get_contracts_by_class(class_name)
-        return self._contracts_cache[class_name]
+        return self._get_class_contracts(class_name).contracts
+
+    def _get_class_contracts(self, class_name: str) -> _ClassContracts:
+        entry = self._contracts_cache.get(class_name)
+        if entry is not None:
+            return entry
+
+        with self._cache_lock:
+            entry = self._contracts_cache.get(class_name)
+            if entry is None:
+                loaded = _ClassContracts.build(self.store.get_contracts_by_class(class_name))
+                entry = self._contracts_cache.setdefault(class_name, loaded)
+        return entry
 
     def get_contracts_for_method(
         self,
@@ -174,14 +352,20 @@ class KnowledgeBase:
         """
         获取方法的契约
 
+        复用类级缓存中的按方法名索引，同一类的后续查询无需再访问数据库。
+
         Args:
             class_name: 类名
             method_name: 方法名
+            method_signature: 方法签名，提供时只返回签名完全匹配的契约
 
         Returns:
             契约列表
         """
-        return self.store.get_contracts_by_method(class_name, method_name, method_signature)
+        contracts = self._get_class_contracts(class_name).by_method.get(method_name, [])
+        if method_signature is None:
+            return list(contracts)
+        return [c for c in contracts if c.method_signature == method_signature]
 
     def add_pattern(self, pattern: Pattern) -> None:
         """
@@ -190,10 +374,10 @@ class KnowledgeBase:
         Args:
             pattern: 模式对象
         """
-        self.store.save_pattern(pattern)
+        self._write_store(self.store.save_pattern, pattern)
         # 清除缓存
-        self._patterns_cache = None
-        logger.info(f"添加模式: {pattern.name} ({pattern.category})")
+        self._invalidate_patterns_cache()
+        logger.info("添加模式: %s (%s)", pattern.name, pattern.category)
 
     def get_all_patterns(self) -> List[Pattern]:
         """
@@ -202,9 +386,28 @@ class KnowledgeBase:
         Returns:
             模式列表（按成功率和使用次数排序）
         """
-        if self._patterns_cache is None:
-            self._patterns_cache = self.store.get_all_patterns()
-        return self._patterns_cache
+        return self._load_pattern_cache().patterns
+
+    @property
+    def _patterns_cache(self) -> Optional[List[Pattern]]:
+        cache = self._pattern_cache
+        return cache.patterns if cache is not None else None
+
+    def _load_pattern_cache(self) -> _PatternCache:
+        cache = self._pattern_cache
+        if cache is not None:
+            return cache
+
+        with self._cache_lock:
+            cache = self._pattern_cache
+            if cache is None:
+                cache = _PatternCache(self.store.get_all_patterns())
+                self._pattern_cache = cache
+        return cache
+
+    def _invalidate_patterns_cache(self) -> None:
+        with self._cache_lock:
+            self._pattern_cache = None
 
     def get_patterns_by_category(self, category: str) -> List[Pattern]:
         """
@@ -229,9 +432,41 @@ class KnowledgeBase:
         Returns:
             模式列表
         """
-        all_patterns = self.get_all_patterns()
-        filtered = [p for p in all_patterns if p.confidence >= min_confidence]
-        return filtered[:n]
+        if n <= 0:
+            return []
+
+        # 全量缓存已就绪时直接切片；否则在 SQL 侧完成过滤和截断，避免为取前 n 个加载整表
+        cache = self._pattern_cache
+        if cache is None:
+            return self.store.get_top_patterns(n, min_confidence)
+        return cache.top(min_confidence)[:n]
+
+    def _top_patterns_excluding(
+        self,
+        n: int,
+        exclude_ids: set[str],
+        min_confidence: float = 0.5,
+    ) -> List[Pattern]:
+        """
+        获取不在 exclude_ids 中的前 n 个最佳模式
+
+        缓存已就绪时沿有序视图遍历，凑够 n 个即停止；否则多取 len(exclude_ids) 个，
+        保证去重后数量仍然足够。
+        """
+        cache = self._pattern_cache
+        candidates: List[Pattern] = (
+            cache.top(min_confidence)
+            if cache is not None
+            else self.store.get_top_patterns(n + len(exclude_ids), min_confidence)
+        )
+        result: List[Pattern] = []
+        for pattern in candidates:
+            if pattern.id in exclude_ids:
+                continue
+            result.append(pattern)
+            if len(result) == n:
+                break
+        return result
 
     def update_pattern_usage(self, pattern_id: str, success: bool) -> None:
         """
@@ -241,10 +476,40 @@ class KnowledgeBase:
             pattern_id: 模式 ID
             success: 是否成功（发现了缺陷）
         """
-        self.store.update_pattern_stats(pattern_id, success)
-        # 清除缓存
-        self._patterns_cache = None
-        logger.debug(f"更新模式统计: {pattern_id}, 成功={success}")
+        self._write_store(self.store.update_pattern_stats, pattern_id, success)
+        # 只更新缓存中的这一个模式，避免整表重新加载
+        self._update_cached_pattern_stats(pattern_id, success)
+        logger.debug("更新模式统计: %s, 成功=%s", pattern_id, success)
+
+    def _update_cached_pattern_stats(self, pattern_id: str, success: bool) -> None:
+        """
+        在缓存中按与存储层相同的公式更新模式统计，并用二分插入保持排序
+
+        Args:
+            pattern_id: 模式 ID
+            success: 是否成功
+        """
+        with self._cache_lock:
+            cache = self._pattern_cache
+            if cache is None:
+                return
+            old = cache.by_id.get(pattern_id)
+            if old is None:
+                return
+            self._pattern_cache = cache.with_replaced(old, self._with_usage_recorded(old, success))
+
+    @staticmethod
+    def _with_usage_recorded(old: Pattern, success: bool) -> Pattern:
+        """返回记录一次使用后的模式副本（公式与 update_pattern_stats 一致）"""
+        usage_count = old.usage_count
+        return old.model_copy(
+            update={
+                "usage_count": usage_count + 1,
+                "success_rate": (old.success_rate * usage_count + (1.0 if success else 0.0))
+                / (usage_count + 1),
+                "updated_at": datetime.now(),
+            }
+        )
 
     def get_relevant_patterns(self, class_code: str, max_patterns: int = 10) -> List[Pattern]:
         """
@@ -268,16 +533,22 @@ class KnowledgeBase:
             统计信息字典
         """
         all_contracts = self.store.get_all_contracts()
-        all_patterns = self.get_all_patterns()
+
+        # 一次遍历同时统计模式数量、类别和成功率
+        categories: set[str] = set()
+        total_success_rate = 0.0
+        pattern_count = 0
+        for pattern in self.get_all_patterns():
+            categories.add(pattern.category)
+            total_success_rate += pattern.success_rate
+            pattern_count += 1
 
         return {
             "total_contracts": len(all_contracts),
-            "total_patterns": len(all_patterns),
-            "pattern_categories": len(set(p.category for p in all_patterns)),
+            "total_patterns": pattern_count,
+            "pattern_categories": len(categories),
             "avg_pattern_success_rate": (
-                sum(p.success_rate for p in all_patterns) / len(all_patterns)
-                if all_patterns
-                else 0.0
+                total_success_rate / pattern_count if pattern_count else 0.0
             ),
         }
 
@@ -290,10 +561,117 @@ class KnowledgeBase:
     ) -> None:
         raise AttributeError("知识库不支持只读 Bug 报告共享资产")
 
+    def _cache_snapshot_path(self) -> Optional[Path]:
+        """缓存快照文件路径（与知识库数据库同目录），内存数据库没有快照"""
+        db_path = getattr(self.store, "db_path", None)
+        if not isinstance(db_path, Path) or str(db_path) == ":memory:":
+            return None
+        return db_path.with_name(f"{db_path.name}.cache.json")
+
+    def _db_version(self) -> Optional[List[int]]:
+        """
+        数据库文件版本：修改时间、大小及 SQLite 文件头中的变更计数器
+
+        变更计数器在每次提交事务时递增，可弥补文件系统时间戳精度不足的问题。
+        """
+        if self._cache_snapshot_path() is None:
+            return None
+        db_path: Path = self.store.db_path
+        try:
+            stat = db_path.stat()
+            with open(db_path, "rb") as f:
+                f.seek(24)
+                change_counter = int.from_bytes(f.read(4), "big")
+        except OSError:
+            return None
+        return [stat.st_mtime_ns, stat.st_size, change_counter]
+
+    def _write_store(self, write: Callable[..., None], *args: Any) -> None:
+        """
+        执行一次存储写入，并跟踪数据库修改时间
+
+        写入前数据库已被其他连接修改时，内存缓存不再可信，本次进程不再保存快照。
+        """
+        if self._cache_db_version is None:
+            write(*args)
+            return
+
+        unchanged = self._db_version() == self._cache_db_version
+        write(*args)
+        self._cache_db_version = self._db_version() if unchanged else None
+
+    def _load_cache_snapshot(self) -> None:
+        """
+        从磁盘加载上次进程关闭时保存的缓存快照
+
+        快照记录的数据库版本与当前不一致时说明数据库已被修改，直接忽略。
+        """
+        snapshot_path = self._cache_snapshot_path()
+        if snapshot_path is None or self._cache_db_version is None:
+            return
+
+        try:
+            payload = orjson.loads(snapshot_path.read_bytes())
+            if payload.get("db_version") != self._cache_db_version:
+                return
+            patterns = payload.get("patterns")
+            if patterns is not None:
+                self._pattern_cache = _PatternCache(_PATTERN_LIST_ADAPTER.validate_python(patterns))
+            for class_name, contracts in payload.get("contracts", {}).items():
+                self._contracts_cache[class_name] = _ClassContracts.build(
+                    _CONTRACT_LIST_ADAPTER.validate_python(contracts)
+                )
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.warning("加载知识库缓存快照失败: %s", e)
+            self._clear_memory_cache()
+
+    def _save_cache_snapshot(self) -> None:
+        """将当前缓存写入磁盘，供下次进程启动时直接加载"""
+        snapshot_path = self._cache_snapshot_path()
+        if snapshot_path is None:
+            return
+        if self._cache_db_version is None or self._db_version() != self._cache_db_version:
+            # 数据库在本进程之外被修改过，旧快照也不再可用
+            snapshot_path.unlink(missing_ok=True)
+            return
+        patterns = self._patterns_cache
+        contracts_cache = dict(self._contracts_cache)
+        if patterns is None and not contracts_cache:
+            return
+
+        payload = {
+            "db_version": self._cache_db_version,
+            "patterns": (
+                _PATTERN_LIST_ADAPTER.dump_python(patterns, mode="json")
+                if patterns is not None
+                else None
+            ),
+            "contracts": {
+                class_name: _CONTRACT_LIST_ADAPTER.dump_python(entry.contracts, mode="json")
+                for class_name, entry in contracts_cache.items()
+            },
+        }
+        temp_path = snapshot_path.with_name(f"{snapshot_path.name}.tmp")
+        try:
+            temp_path.write_bytes(orjson.dumps(payload))
+            temp_path.replace(snapshot_path)
+        except Exception as e:
+            logger.warning("保存知识库缓存快照失败: %s", e)
+            temp_path.unlink(missing_ok=True)
+
+    def _clear_memory_cache(self) -> None:
+        with self._cache_lock:
+            self._contracts_cache.clear()
+            self._pattern_cache = None
+
     def clear_cache(self) -> None:
-        """清除缓存"""
-        self._contracts_cache.clear()
-        self._patterns_cache = None
+        """清除缓存（包括磁盘上的缓存快照）"""
+        self._clear_memory_cache()
+        snapshot_path = self._cache_snapshot_path()
+        if snapshot_path is not None:
+            snapshot_path.unlink(missing_ok=True)
 
     def initialize(self) -> bool:
         return True
@@ -302,7 +680,8 @@ class KnowledgeBase:
         if self._closed:
             return
 
-        self.clear_cache()
+        self._save_cache_snapshot()
+        self._clear_memory_cache()
         close_method = getattr(self.store, "close", None)
         if callable(close_method):
             close_method()
@@ -312,6 +691,13 @@ class KnowledgeBase:
 class RAGKnowledgeBase(KnowledgeBase):
     """RAG 增强的知识库 - 支持向量检索"""
 
+    # sync_to_vector_store 每批从存储读取并写入向量存储的条目数
+    SYNC_BATCH_SIZE = 256
+    # 检索上下文缓存的最大条目数
+    RETRIEVAL_CACHE_SIZE = 512
+    # index_bug_reports 每批写入向量存储的报告数
+    BUG_REPORT_BATCH_SIZE = 32
+
     def __init__(
         self,
         store: KnowledgeStore,
@@ -342,6 +728,11 @@ class RAGKnowledgeBase(KnowledgeBase):
         self._shared_bug_report_documents: list[dict[str, Any]] | None = None
         self._shared_bug_report_embedding_service: EmbeddingService | None = None
 
+        # 检索上下文 LRU 缓存；知识变更时递增代数，旧代数的条目自然失效
+        self._retrieval_cache: OrderedDict[tuple[Any, ...], str] = OrderedDict()
+        self._retrieval_cache_lock = threading.Lock()
+        self._knowledge_generation = 0
+
     def initialize(self) -> bool:
         return self._ensure_initialized()
 
@@ -355,6 +746,8 @@ class RAGKnowledgeBase(KnowledgeBase):
         self._shared_bug_report_embedding_service = None
         self._shared_bug_report_documents = None
         self._initialized = False
+        # 撤销初始化时的方法替换，恢复完整的初始化检查
+        self.__dict__.pop("_ensure_initialized", None)
         self._vector_store = None
 
         if vector_store is not None:
@@ -427,14 +820,22 @@ class RAGKnowledgeBase(KnowledgeBase):
                 self._vector_store = vector_store
                 self._retriever = retriever
 
+                _get_vector_store_symbols()
                 self._initialized = True
+                # 初始化成功后以实例属性遮蔽本方法，后续调用直接返回，不再检查状态
+                setattr(self, "_ensure_initialized", self._initialized_fast_path)
                 logger.info("RAG 知识库初始化完成")
                 return True
 
             except Exception as e:
-                logger.warning(f"RAG 知识库初始化失败: {e}")
+                logger.warning("RAG 知识库初始化失败: %s", e)
                 return False
 
+    @staticmethod
+    def _initialized_fast_path() -> bool:
+        """初始化完成后 _ensure_initialized 的替身"""
+        return True
+
     @property
     def is_rag_enabled(self) -> bool:
         """检查 RAG 是否启用"""
@@ -452,9 +853,79 @@ class RAGKnowledgeBase(KnowledgeBase):
         _ = self._ensure_initialized()
         return self._require_retriever()
 
+    def _invalidate_retrieval_cache(self) -> None:
+        """知识发生变更时使已缓存的检索上下文失效"""
+        with self._retrieval_cache_lock:
+            self._knowledge_generation += 1
+            self._retrieval_cache.clear()
+
+    def _cached_retrieval(
+        self,
+        kind: str,
+        class_name: str,
+        method_name: str,
+        method_signature: Optional[str],
+        source_code: Optional[str],
+        compute: Callable[[], str],
+    ) -> str:
+        """
+        按目标方法缓存格式化后的检索上下文
+
+        同一方法在多轮生成中会被反复检索，命中缓存时跳过全部向量检索。
+        缓存键包含知识代数，检索期间发生的变更不会写回过期结果。
+
+        Args:
+            kind: 检索类型
+            class_name: 类名
+            method_name: 方法名
+            method_signature: 方法签名
+            source_code: 源代码
+            compute: 未命中缓存时执行的检索
+
+        Returns:
+            格式化的知识文本
+        """
+        code_hash = (
+            hashlib.blake2b(source_code.encode(), digest_size=16).hexdigest()
+            if source_code
+            else None
+        )
+        with self._retrieval_cache_lock:
+            key = (
+                kind,
+                class_name,
+                method_name,
+                method_signature,
+                code_hash,
+                self._knowledge_generation,
+            )
+            cached = self._retrieval_cache.get(key)
+            if cached is not None:
+                self._retrieval_cache.move_to_end(key)
+                return cached
+
+        context = compute()
+
+        # RAG 未能初始化时的空结果不缓存，以便后续重试
+        if not self._initialized:
+            return context
+
+        with self._retrieval_cache_lock:
+            if key[-1] == self._knowledge_generation:
+                self._retrieval_cache[key] = context
+                self._retrieval_cache.move_to_end(key)
+                while len(self._retrieval_cache) > self.RETRIEVAL_CACHE_SIZE:
+                    self._retrieval_cache.popitem(last=False)
+        return context
+
+    def _clear_memory_cache(self) -> None:
+        super()._clear_memory_cache()
+        self._invalidate_retrieval_cache()
+
     def add_contract(self, contract: Contract) -> None:
         """添加契约到知识库（同时更新向量存储）"""
         super().add_contract(contract)
+        self._invalidate_retrieval_cache()
 
         # 同步到向量存储
         if self._ensure_initialized():
@@ -463,21 +934,36 @@ class RAGKnowledgeBase(KnowledgeBase):
     def add_pattern(self, pattern: Pattern) -> None:
         """添加缺陷模式到知识库（同时更新向量存储）"""
         super().add_pattern(pattern)
+        self._invalidate_retrieval_cache()
 
         # 同步到向量存储
         if self._ensure_initialized():
             self._index_pattern(pattern)
 
+    def update_pattern_usage(self, pattern_id: str, success: bool) -> None:
+        """更新模式使用统计（同时使检索上下文缓存失效）"""
+        super().update_pattern_usage(pattern_id, success)
+        self._invalidate_retrieval_cache()
+
     def _index_contract(self, contract: Contract) -> None:
         """将契约索引到向量存储"""
-        from .vector_store import Document, KnowledgeType
+        self.vector_store.add_single(
+            _get_vector_store_symbols().knowledge_type.CONTRACTS,
+            self._build_contract_document(contract),
+        )
 
-        # 构建文档内容
-        content = self._format_contract_for_indexing(contract)
+    def _index_pattern(self, pattern: Pattern) -> None:
+        """将模式索引到向量存储"""
+        self.vector_store.add_single(
+            _get_vector_store_symbols().knowledge_type.PATTERNS,
+            self._build_pattern_document(pattern),
+        )
 
-        doc = Document(
+    def _build_contract_document(self, contract: Contract) -> Document:
+        """构建契约的向量文档"""
+        return _get_vector_store_symbols().document(
             id=contract.id,
-            content=content,
+            content=self._format_contract_for_indexing(contract),
             metadata={
                 "class_name": contract.class_name,
                 "method_name": contract.method_name,
@@ -487,18 +973,11 @@ class RAGKnowledgeBase(KnowledgeBase):
             },
         )
 
-        self.vector_store.add_single(KnowledgeType.CONTRACTS, doc)
-
-    def _index_pattern(self, pattern: Pattern) -> None:
-        """将模式索引到向量存储"""
-        from .vector_store import Document, KnowledgeType
-
-        # 构建文档内容
-        content = self._format_pattern_for_indexing(pattern)
-
-        doc = Document(
+    def _build_pattern_document(self, pattern: Pattern) -> Document:
+        """构建模式的向量文档"""
+        return _get_vector_store_symbols().document(
             id=pattern.id,
-            content=content,
+            content=self._format_pattern_for_indexing(pattern),
             metadata={
                 "name": pattern.name,
                 "category": pattern.category,
@@ -507,45 +986,28 @@ class RAGKnowledgeBase(KnowledgeBase):
             },
         )
 
-        self.vector_store.add_single(KnowledgeType.PATTERNS, doc)
-
     def _format_contract_for_indexing(self, contract: Contract) -> str:
         """格式化契约用于索引"""
-        parts = [
-            f"Contract for {contract.class_name}.{contract.method_name}",
-            f"Signature: {contract.method_signature}",
-        ]
-
-        if contract.preconditions:
-            parts.append(f"Preconditions: {', '.join(contract.preconditions)}")
-
-        if contract.postconditions:
-            parts.append(f"Postconditions: {', '.join(contract.postconditions)}")
-
-        if contract.exceptions:
-            parts.append(f"Exceptions: {', '.join(contract.exceptions)}")
-
-        if contract.description:
-            parts.append(f"Description: {contract.description}")
-
-        return "\n".join(parts)
+        return _format_contract_text(
+            contract.class_name,
+            contract.method_name,
+            contract.method_signature,
+            tuple(contract.preconditions),
+            tuple(contract.postconditions),
+            tuple(contract.exceptions),
+            contract.description,
+        )
 
     def _format_pattern_for_indexing(self, pattern: Pattern) -> str:
         """格式化模式用于索引"""
-        parts = [
-            f"Defect Pattern: {pattern.name}",
-            f"Category: {pattern.category}",
-            f"Description: {pattern.description}",
-            f"Template: {pattern.template}",
-        ]
-
-        if pattern.examples:
-            parts.append(f"Examples: {', '.join(pattern.examples[:3])}")
-
-        if pattern.mutation_strategy:
-            parts.append(f"Mutation Strategy: {pattern.mutation_strategy}")
-
-        return "\n".join(parts)
+        return _format_pattern_text(
+            pattern.name,
+            pattern.category,
+            pattern.description,
+            pattern.template,
+            tuple(pattern.examples[:3]),
+            pattern.mutation_strategy,
+        )
 
     def get_relevant_patterns(self, class_code: str, max_patterns: int = 10) -> List[Pattern]:
         """
@@ -562,31 +1024,24 @@ class RAGKnowledgeBase(KnowledgeBase):
             # 回退到传统方式
             return super().get_relevant_patterns(class_code, max_patterns)
 
-        from .vector_store import KnowledgeType
-
         # 使用向量检索
         config = self._require_config()
         results = self.vector_store.search(
-            KnowledgeType.PATTERNS,
-            f"defect patterns for code: {class_code[:500]}",
+            _get_vector_store_symbols().knowledge_type.PATTERNS,
+            f"defect patterns for code: {code_query_snippet(class_code, 500)}",
             top_k=max_patterns,
             score_threshold=config.retrieval.score_threshold,
         )
 
-        # 获取完整的 Pattern 对象
-        patterns = []
-        for r in results:
-            pattern = self.store.get_pattern(r.document.id)
-            if pattern:
-                patterns.append(pattern)
-
-        # 如果检索结果不足，用传统方式补充
-        if len(patterns) < max_patterns:
-            top_patterns = super().get_top_patterns(n=max_patterns - len(patterns))
-            existing_ids = {p.id for p in patterns}
-            for p in top_patterns:
-                if p.id not in existing_ids:
-                    patterns.append(p)
+        # 一次查询批量获取完整的 Pattern 对象，并保持检索结果的顺序
+        pattern_ids = [r.document.id for r in results]
+        patterns_by_id = self.store.get_patterns_by_ids(pattern_ids)
+        patterns = [patterns_by_id[pid] for pid in pattern_ids if pid in patterns_by_id]
+
+        # 如果检索结果不足，用最佳模式补充
+        shortfall = max_patterns - len(patterns)
+        if shortfall > 0:
+            patterns.extend(self._top_patterns_excluding(shortfall, {p.id for p in patterns}))
 
         return patterns[:max_patterns]
 
@@ -609,6 +1064,24 @@ class RAGKnowledgeBase(KnowledgeBase):
         Returns:
             格式化的知识文本
         """
+        return self._cached_retrieval(
+            "test",
+            class_name,
+            method_name,
+            method_signature,
+            source_code,
+            lambda: self._retrieve_for_test_generation(
+                class_name, method_name, method_signature, source_code
+            ),
+        )
+
+    def _retrieve_for_test_generation(
+        self,
+        class_name: str,
+        method_name: str,
+        method_signature: Optional[str],
+        source_code: Optional[str],
+    ) -> str:
         if self._shared_bug_report_asset is None:
             if not self._ensure_initialized():
                 return ""
@@ -617,49 +1090,36 @@ class RAGKnowledgeBase(KnowledgeBase):
                 class_name, method_name, method_signature, source_code
             )
 
-        results: Dict[str, List[Any]] = {
-            "contracts": [],
-            "bug_reports": self._search_bug_reports(
-                query=self._build_test_gen_query(
-                    class_name, method_name, method_signature, source_code
-                )
-            ),
-            "patterns": [],
-        }
+        target = f"{class_name}.{method_name}"
+        query = self._build_test_gen_query(target, method_signature, source_code)
+        results: Dict[str, List[Any]] = {"contracts": [], "bug_reports": [], "patterns": []}
 
+        # 同一查询在多个集合及 Bug 报告快照中检索，只计算一次查询 embedding
+        query_embedding: Optional[List[float]] = None
         if self._ensure_initialized():
-            query = self._build_test_gen_query(
-                class_name, method_name, method_signature, source_code
-            )
             vector_store = self.vector_store
-            from .vector_store import KnowledgeType
+            KnowledgeType = _get_vector_store_symbols().knowledge_type
+            query_embedding = vector_store.embed_query(query)
 
-            results["contracts"] = vector_store.search(
+            results["contracts"] = vector_store.search_with_embedding(
                 KnowledgeType.CONTRACTS,
-                query,
+                query_embedding,
                 top_k=self._top_k,
                 score_threshold=self._score_threshold,
-                filter_metadata=(
-                    {
-                        "class_name": class_name,
-                        **(
-                            {"method_signature": method_signature}
-                            if method_signature
-                            else {"method_name": method_name}
-                        ),
-                    }
-                    if class_name
-                    else None
+                filter_metadata=self._build_method_filter(
+                    class_name, method_name, method_signature
                 ),
             )
-            results["patterns"] = vector_store.search(
+            results["patterns"] = vector_store.search_with_embedding(
                 KnowledgeType.PATTERNS,
-                query,
+                query_embedding,
                 top_k=self._top_k,
                 score_threshold=self._score_threshold,
             )
 
-        return self._format_test_gen_context(results, class_name, method_name)
+        results["bug_reports"] = self._search_bug_reports(query, query_embedding=query_embedding)
+
+        return self._format_test_gen_context(results, target)
 
     def retrieve_for_mutation_generation(
         self,
@@ -679,6 +1139,24 @@ class RAGKnowledgeBase(KnowledgeBase):
         Returns:
             格式化的知识文本
         """
+        return self._cached_retrieval(
+            "mutation",
+            class_name,
+            method_name,
+            method_signature,
+            source_code,
+            lambda: self._retrieve_for_mutation_generation(
+                class_name, method_name, method_signature, source_code
+            ),
+        )
+
+    def _retrieve_for_mutation_generation(
+        self,
+        class_name: str,
+        method_name: str,
+        method_signature: Optional[str],
+        source_code: Optional[str],
+    ) -> str:
         if self._shared_bug_report_asset is None:
             if not self._ensure_initialized():
                 return ""
@@ -690,43 +1168,35 @@ class RAGKnowledgeBase(KnowledgeBase):
                 source_code,
             )
 
-        query = self._build_mutation_gen_query(class_name, method_name, source_code)
-        results: Dict[str, List[Any]] = {
-            "source_analysis": [],
-            "patterns": [],
-            "bug_reports": self._search_bug_reports(query=query),
-        }
+        target = f"{class_name}.{method_name}"
+        query = self._build_mutation_gen_query(target, source_code)
+        results: Dict[str, List[Any]] = {"source_analysis": [], "patterns": [], "bug_reports": []}
 
+        query_embedding: Optional[List[float]] = None
         if self._ensure_initialized():
             vector_store = self.vector_store
-            from .vector_store import KnowledgeType
+            KnowledgeType = _get_vector_store_symbols().knowledge_type
+            query_embedding = vector_store.embed_query(query)
 
-            results["source_analysis"] = vector_store.search(
+            results["source_analysis"] = vector_store.search_with_embedding(
                 KnowledgeType.SOURCE_ANALYSIS,
-                query,
+                query_embedding,
                 top_k=self._top_k,
                 score_threshold=self._score_threshold,
-                filter_metadata=(
-                    {
-                        "class_name": class_name,
-                        **(
-                            {"method_signature": method_signature}
-                            if method_signature
-                            else {"method_name": method_name}
-                        ),
-                    }
-                    if class_name
-                    else None
+                filter_metadata=self._build_method_filter(
+                    class_name, method_name, method_signature
                 ),
             )
-            results["patterns"] = vector_store.search(
+            results["patterns"] = vector_store.search_with_embedding(
                 KnowledgeType.PATTERNS,
-                query,
+                query_embedding,
                 top_k=self._top_k * 2,
                 score_threshold=self._score_threshold,
             )
 
-        return self._format_mutation_gen_context(results, class_name, method_name)
+        results["bug_reports"] = self._search_bug_reports(query, query_embedding=query_embedding)
+
+        return self._format_mutation_gen_context(results, target)
 
     def attach_bug_report_shared_asset(
         self,
@@ -734,6 +1204,7 @@ class RAGKnowledgeBase(KnowledgeBase):
     ) -> None:
         self._shared_bug_report_asset = _coerce_bug_report_shared_asset(asset)
         self._shared_bug_report_documents = None
+        self._invalidate_retrieval_cache()
 
     @property
     def _top_k(self) -> int:
@@ -800,26 +1271,41 @@ class RAGKnowledgeBase(KnowledgeBase):
         )
         return self._shared_bug_report_embedding_service
 
-    def _search_bug_reports(self, query: str) -> List[Any]:
+    def _search_bug_reports(
+        self,
+        query: str,
+        query_embedding: Optional[List[float]] = None,
+    ) -> List[Any]:
         if self._shared_bug_report_asset is None:
             if not self._ensure_initialized():
                 return []
-            from .vector_store import KnowledgeType
-
-            return self.vector_store.search(
+            vector_store = self.vector_store
+            KnowledgeType = _get_vector_store_symbols().knowledge_type
+            if query_embedding is None:
+                return vector_store.search(
+                    KnowledgeType.BUG_REPORTS,
+                    query,
+                    top_k=self._top_k,
+                    score_threshold=self._score_threshold,
+                )
+            return vector_store.search_with_embedding(
                 KnowledgeType.BUG_REPORTS,
-                query,
+                query_embedding,
                 top_k=self._top_k,
                 score_threshold=self._score_threshold,
             )
 
-        from .vector_store import Document, SearchResult
+        symbols = _get_vector_store_symbols()
+        Document, SearchResult = symbols.document, symbols.search_result
 
         documents = self._load_shared_bug_report_documents()
         if not documents:
             return []
 
-        query_embedding = self._shared_bug_report_query_embedding_service().embed(query)
+        embedding_service = self._shared_bug_report_query_embedding_service()
+        # 只有与向量存储使用同一个 embedding 服务时，预先算好的查询向量才可复用
+        if query_embedding is None or embedding_service is not self._embedding_service:
+            query_embedding = embedding_service.embed(query)
         results: list[SearchResult] = []
         for item in documents:
             score = self._cosine_similarity(query_embedding, item["embedding"])
@@ -852,35 +1338,44 @@ class RAGKnowledgeBase(KnowledgeBase):
         return numerator / (left_norm * right_norm)
 
     @staticmethod
-    def _build_test_gen_query(
+    def _build_method_filter(
         class_name: str,
         method_name: str,
+        method_signature: Optional[str],
+    ) -> Optional[Dict[str, Any]]:
+        if not class_name:
+            return None
+        if method_signature:
+            return {"class_name": class_name, "method_signature": method_signature}
+        return {"class_name": class_name, "method_name": method_name}
+
+    @staticmethod
+    def _build_test_gen_query(
+        target: str,
         method_signature: Optional[str] = None,
         source_code: Optional[str] = None,
     ) -> str:
-        parts = [f"test generation for {class_name}.{method_name}"]
+        parts = [f"test generation for {target}"]
         if method_signature:
             parts.append(f"signature: {method_signature}")
         if source_code:
-            parts.append(f"code: {source_code[:300]}")
+            parts.append(f"code: {code_query_snippet(source_code, 300)}")
         return " ".join(parts)
 
     @staticmethod
     def _build_mutation_gen_query(
-        class_name: str,
-        method_name: str,
+        target: str,
         source_code: Optional[str] = None,
     ) -> str:
-        query = f"mutation patterns for {class_name}.{method_name}"
+        query = f"mutation patterns for {target}"
         if source_code:
-            query += f" with code: {source_code[:500]}"
+            query += f" with code: {code_query_snippet(source_code, 500)}"
         return query
 
     @staticmethod
     def _format_test_gen_context(
         results: Dict[str, List[Any]],
-        class_name: str,
-        method_name: str,
+        target: str,
     ) -> str:
         sections = []
 
@@ -904,13 +1399,12 @@ class RAGKnowledgeBase(KnowledgeBase):
 
         if not sections:
             return ""
-        return f"# {class_name}.{method_name} 的相关知识\n" + "\n".join(sections)
+        return f"# {target} 的相关知识\n" + "\n".join(sections)
 
     @staticmethod
     def _format_mutation_gen_context(
         results: Dict[str, List[Any]],
-        class_name: str,
-        method_name: str,
+        target: str,
     ) -> str:
         sections = []
 
@@ -935,7 +1429,7 @@ class RAGKnowledgeBase(KnowledgeBase):
 
         if not sections:
             return ""
-        return f"# {class_name}.{method_name} 的变异知识\n" + "\n".join(sections)
+        return f"# {target} 的变异知识\n" + "\n".join(sections)
 
     def index_source_analysis(
         self,
@@ -949,46 +1443,73 @@ class RAGKnowledgeBase(KnowledgeBase):
             class_name: 类名
             analysis_result: DeepAnalyzer 的分析结果
         """
+        self.index_source_analyses([(class_name, analysis_result)])
+
+    def index_source_analyses(
+        self,
+        analyses: Iterable[Tuple[str, Dict[str, Any]]],
+    ) -> None:
+        """
+        批量索引多个类的源代码深度分析结果
+
+        所有类、所有方法的分析块汇总后一次写入向量存储，embedding 按服务的批大小分批计算。
+
+        Args:
+            analyses: (类名, DeepAnalyzer 分析结果) 序列
+        """
         if not self._ensure_initialized():
             return
 
-        from .chunker import MethodAnalysisChunker
-        from .vector_store import Document, KnowledgeType
+        symbols = _get_vector_store_symbols()
+        Document, KnowledgeType = symbols.document, symbols.knowledge_type
 
         chunker = MethodAnalysisChunker()
 
         documents = []
-
-        # 分析结果中的每个方法
-        methods = analysis_result.get("methods", [])
-        for method in methods:
-            chunks = chunker.chunk_method_analysis(method, class_name)
-
-            for chunk in chunks:
-                documents.append(
-                    Document(
-                        id=(
-                            "analysis_"
-                            f"{class_name}_{method.get('name', 'unknown')}_"
-                            f"{chunk.metadata.get('method_signature', 'unknown')}_"
-                            f"{chunk.chunk_index}"
-                        ),
-                        content=chunk.content,
-                        metadata=chunk.metadata,
+        class_count = 0
+        method_count = 0
+
+        for class_name, analysis_result in analyses:
+            class_count += 1
+
+            # 分析结果中的每个方法
+            methods = analysis_result.get("methods", [])
+            method_count += len(methods)
+            for method in methods:
+                chunks = chunker.chunk_method_analysis(method, class_name)
+
+                for chunk in chunks:
+                    documents.append(
+                        Document(
+                            id=(
+                                "analysis_"
+                                f"{class_name}_{method.get('name', 'unknown')}_"
+                                f"{chunk.metadata.get('method_signature', 'unknown')}_"
+                                f"{chunk.chunk_index}"
+                            ),
+                            content=chunk.content,
+                            metadata=chunk.metadata,
+                        )
                     )
-                )
 
         if documents:
             self.vector_store.add(KnowledgeType.SOURCE_ANALYSIS, documents)
+            self._invalidate_retrieval_cache()
 
         logger.info(
-            f"索引了 {class_name} 的 {len(methods)} 个方法分析结果，共 {len(documents)} 个分析块"
+            "索引了 %s 个类的 %s 个方法分析结果，共 %s 个分析块",
+            class_count,
+            method_count,
+            len(documents),
         )
 
     def index_bug_reports(self, bug_reports_dir: str) -> int:
         """
         索引 Bug 报告目录
 
+        后台线程遍历目录并解析报告，按批放入有界队列；当前线程取出后构建文档并批量写入，
+        使磁盘读取、解析与 embedding 计算相互重叠。
+
         Args:
             bug_reports_dir: Bug 报告目录
 
@@ -998,25 +1519,86 @@ class RAGKnowledgeBase(KnowledgeBase):
         if not self._ensure_initialized():
             return 0
 
-        from .bug_parser import load_bug_reports
-        from .vector_store import Document, KnowledgeType
-
-        reports = load_bug_reports(bug_reports_dir)
+        symbols = _get_vector_store_symbols()
+        Document, KnowledgeType = symbols.document, symbols.knowledge_type
+        vector_store = self.vector_store
+
+        vector_store_directory = self.vector_store_directory or "./state/chromadb"
+        bug_report_cache_dir = Path(vector_store_directory) / "bug_report_cache"
+
+        batch_size = self.BUG_REPORT_BATCH_SIZE
+        batch_queue: queue.Queue[tuple[str, object]] = queue.Queue(maxsize=4)
+        stop = threading.Event()
+
+        def _put(item: tuple[str, object]) -> bool:
+            # 消费方出错退出后不再阻塞在满队列上
+            while not stop.is_set():
+                try:
+                    batch_queue.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
 
-        for report in reports:
-            doc = Document(
-                id=report.id,
-                content=report.to_text(),
-                metadata={
-                    "title": report.title,
-                    "file_path": report.file_path,
-                    "file_type": report.file_type,
-                },
-            )
-            self.vector_store.add_single(KnowledgeType.BUG_REPORTS, doc)
+        def _produce() -> None:
+            reports = iter_bug_reports(bug_reports_dir, cache_dir=str(bug_report_cache_dir))
+            try:
+                batch: List[BugReport] = []
+                for report in reports:
+                    batch.append(report)
+                    if len(batch) == batch_size:
+                        if not _put(("batch", batch)):
+                            return
+                        batch = []
+                if batch and not _put(("batch", batch)):
+                    return
+                _put(("done", None))
+            except Exception as exc:
+                _put(("exception", exc))
+            finally:
+                reports.close()
+
+        producer = threading.Thread(
+            target=bind_current_log_context(_produce),
+            name="bug-report-reader",
+            daemon=True,
+        )
+        producer.start()
+
+        count = 0
+        try:
+            while True:
+                item_type, payload = batch_queue.get()
+                if item_type == "done":
+                    break
+                if item_type == "exception":
+                    raise cast(Exception, payload)
+
+                reports = cast(List[BugReport], payload)
+                vector_store.add(
+                    KnowledgeType.BUG_REPORTS,
+                    [
+                        Document(
+                            id=report.id,
+                            content=report.to_text(),
+                            metadata={
+                                "title": report.title,
+                                "file_path": report.file_path,
+                                "file_type": report.file_type,
+                            },
+                        )
+                        for report in reports
+                    ],
+                )
+                count += len(reports)
+        finally:
+            stop.set()
+            producer.join()
+            if count:
+                self._invalidate_retrieval_cache()
 
-        logger.info(f"索引了 {len(reports)} 个 Bug 报告")
-        return len(reports)
+        logger.info("索引了 %s 个 Bug 报告", count)
+        return count
 
     def sync_to_vector_store(self) -> None:
         """
@@ -1025,17 +1607,28 @@ class RAGKnowledgeBase(KnowledgeBase):
         if not self._ensure_initialized():
             return
 
-        # 同步所有契约
-        all_contracts = self.store.get_all_contracts()
-        for contract in all_contracts:
-            self._index_contract(contract)
+        KnowledgeType = _get_vector_store_symbols().knowledge_type
+        vector_store = self.vector_store
 
-        # 同步所有模式
-        all_patterns = self.get_all_patterns()
-        for pattern in all_patterns:
-            self._index_pattern(pattern)
+        # 分批从存储中流式读取，每批构建文档后批量写入，内存占用只与批大小相关
+        contract_count = 0
+        for contracts in self.store.iter_contracts(self.SYNC_BATCH_SIZE):
+            vector_store.add(
+                KnowledgeType.CONTRACTS,
+                [self._build_contract_document(contract) for contract in contracts],
+            )
+            contract_count += len(contracts)
+
+        pattern_count = 0
+        for patterns in self.store.iter_patterns(self.SYNC_BATCH_SIZE):
+            vector_store.add(
+                KnowledgeType.PATTERNS,
+                [self._build_pattern_document(pattern) for pattern in patterns],
+            )
+            pattern_count += len(patterns)
 
-        logger.info(f"同步完成: {len(all_contracts)} 个契约, {len(all_patterns)} 个模式")
+        self._invalidate_retrieval_cache()
+        logger.info("同步完成: %s 个契约, %s 个模式", contract_count, pattern_count)
 
     def get_stats(self) -> Dict[str, Any]:
         """获取知识库统计信息（包括 RAG 统计）"""
@@ -1,12 +1,21 @@
 """知识检索器模块"""
 
 import logging
-from typing import Any, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
 
+from ..utils.log_context import submit_with_log_context
+from .chunker import code_query_snippet
 from .vector_store import KnowledgeType, SearchResult, VectorStore
 
 logger = logging.getLogger(__name__)
 
+# 多个知识类型的检索彼此独立，共享一个线程池并发执行
+_search_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="rag-search")
+
+# (知识类型, top_k, 元数据过滤条件)
+SearchRequest = Tuple[str, int, Optional[Dict[str, Any]]]
+
 
 class KnowledgeRetriever:
     """知识检索器 - 统一的知识检索接口"""
@@ -53,50 +62,27 @@ class KnowledgeRetriever:
         Returns:
             格式化的知识文本，可直接注入到 prompt
         """
-        query = self._build_test_gen_query(class_name, method_name, method_signature, source_code)
+        # 查询和标题共用同一个方法全名
+        target = f"{class_name}.{method_name}"
+        query = self._build_test_gen_query(target, method_signature, source_code)
 
-        results = {}
-
-        # 检索契约
-        contracts = self.vector_store.search(
-            KnowledgeType.CONTRACTS,
+        results = self._search_concurrently(
             query,
-            top_k=self.top_k,
-            score_threshold=self.score_threshold,
-            filter_metadata=(
-                {
-                    "class_name": class_name,
-                    **(
-                        {"method_signature": method_signature}
-                        if method_signature
-                        else {"method_name": method_name}
-                    ),
-                }
-                if class_name
-                else None
-            ),
+            {
+                # 检索契约
+                "contracts": (
+                    KnowledgeType.CONTRACTS,
+                    self.top_k,
+                    self._build_method_filter(class_name, method_name, method_signature),
+                ),
+                # 检索相关 Bug 报告
+                "bug_reports": (KnowledgeType.BUG_REPORTS, self.top_k, None),
+                # 检索缺陷模式
+                "patterns": (KnowledgeType.PATTERNS, self.top_k, None),
+            },
         )
-        results["contracts"] = contracts
 
-        # 检索相关 Bug 报告
-        bug_reports = self.vector_store.search(
-            KnowledgeType.BUG_REPORTS,
-            query,
-            top_k=self.top_k,
-            score_threshold=self.score_threshold,
-        )
-        results["bug_reports"] = bug_reports
-
-        # 检索缺陷模式
-        patterns = self.vector_store.search(
-            KnowledgeType.PATTERNS,
-            query,
-            top_k=self.top_k,
-            score_threshold=self.score_threshold,
-        )
-        results["patterns"] = patterns
-
-        return self._format_test_gen_context(results, class_name, method_name)
+        return self._format_test_gen_context(results, target)
 
     def retrieve_for_mutation_generation(
         self,
@@ -121,53 +107,29 @@ class KnowledgeRetriever:
         Returns:
             格式化的知识文本
         """
-        query = f"mutation patterns for {class_name}.{method_name}"
+        target = f"{class_name}.{method_name}"
+        query = f"mutation patterns for {target}"
         if source_code:
             # 添加源代码的特征
-            query += f" with code: {source_code[:500]}"
-
-        results = {}
+            query += f" with code: {code_query_snippet(source_code, 500)}"
 
-        # 检索源代码分析
-        source_analysis = self.vector_store.search(
-            KnowledgeType.SOURCE_ANALYSIS,
+        results = self._search_concurrently(
             query,
-            top_k=self.top_k,
-            score_threshold=self.score_threshold,
-            filter_metadata=(
-                {
-                    "class_name": class_name,
-                    **(
-                        {"method_signature": method_signature}
-                        if method_signature
-                        else {"method_name": method_name}
-                    ),
-                }
-                if class_name
-                else None
-            ),
+            {
+                # 检索源代码分析
+                "source_analysis": (
+                    KnowledgeType.SOURCE_ANALYSIS,
+                    self.top_k,
+                    self._build_method_filter(class_name, method_name, method_signature),
+                ),
+                # 检索缺陷模式（变异生成优先，多获取一些模式）
+                "patterns": (KnowledgeType.PATTERNS, self.top_k * 2, None),
+                # 检索相关 Bug
+                "bug_reports": (KnowledgeType.BUG_REPORTS, self.top_k, None),
+            },
         )
-        results["source_analysis"] = source_analysis
 
-        # 检索缺陷模式（变异生成优先）
-        patterns = self.vector_store.search(
-            KnowledgeType.PATTERNS,
-            query,
-            top_k=self.top_k * 2,  # 多获取一些模式
-            score_threshold=self.score_threshold,
-        )
-        results["patterns"] = patterns
-
-        # 检索相关 Bug
-        bugs = self.vector_store.search(
-            KnowledgeType.BUG_REPORTS,
-            query,
-            top_k=self.top_k,
-            score_threshold=self.score_threshold,
-        )
-        results["bug_reports"] = bugs
-
-        return self._format_mutation_gen_context(results, class_name, method_name)
+        return self._format_mutation_gen_context(results, target)
 
     def retrieve_similar_bugs(
         self,
@@ -268,30 +230,85 @@ class KnowledgeRetriever:
             filter_metadata=filter_meta,
         )
 
-    def _build_test_gen_query(
+    def _search_concurrently(
         self,
+        query: str,
+        requests: Dict[str, SearchRequest],
+    ) -> Dict[str, List[SearchResult]]:
+        """
+        用同一个查询并发检索多个知识类型
+
+        查询 embedding 只计算一次，各集合的检索提交到共享线程池并行执行；
+        所有集合都为空时不会调用 embedding 服务。
+
+        Args:
+            query: 查询文本
+            requests: 结果键到检索参数的映射
+
+        Returns:
+            按结果键分组的搜索结果
+        """
+        results: Dict[str, List[SearchResult]] = {key: [] for key in requests}
+        pending = {
+            key: request
+            for key, request in requests.items()
+            if self.vector_store.count(request[0]) > 0
+        }
+        if not pending:
+            return results
+
+        query_embedding = self.vector_store.embed_query(query)
+        futures = {
+            key: submit_with_log_context(
+                _search_pool,
+                self.vector_store.search_with_embedding,
+                knowledge_type,
+                query_embedding,
+                top_k=top_k,
+                score_threshold=self.score_threshold,
+                filter_metadata=filter_metadata,
+            )
+            for key, (knowledge_type, top_k, filter_metadata) in pending.items()
+        }
+        for key, future in futures.items():
+            results[key] = future.result()
+        return results
+
+    @staticmethod
+    def _build_method_filter(
         class_name: str,
         method_name: str,
+        method_signature: Optional[str],
+    ) -> Optional[Dict[str, Any]]:
+        """构建按方法过滤的元数据条件，优先使用方法签名"""
+        if not class_name:
+            return None
+        if method_signature:
+            return {"class_name": class_name, "method_signature": method_signature}
+        return {"class_name": class_name, "method_name": method_name}
+
+    def _build_test_gen_query(
+        self,
+        target: str,
         method_signature: Optional[str] = None,
         source_code: Optional[str] = None,
     ) -> str:
         """构建测试生成查询"""
-        parts = [f"test generation for {class_name}.{method_name}"]
+        parts = [f"test generation for {target}"]
 
         if method_signature:
             parts.append(f"signature: {method_signature}")
 
         if source_code:
-            # 取源代码的前 300 个字符作为上下文
-            parts.append(f"code: {source_code[:300]}")
+            # 取规范化后源代码的前 300 个字符作为上下文
+            parts.append(f"code: {code_query_snippet(source_code, 300)}")
 
         return " ".join(parts)
 
     def _format_test_gen_context(
         self,
         results: Dict[str, List[SearchResult]],
-        class_name: str,
-        method_name: str,
+        target: str,
     ) -> str:
         """格式化测试生成上下文"""
         sections = []
@@ -320,14 +337,13 @@ class KnowledgeRetriever:
         if not sections:
             return ""
 
-        header = f"# {class_name}.{method_name} 的相关知识\n"
+        header = f"# {target} 的相关知识\n"
         return header + "\n".join(sections)
 
     def _format_mutation_gen_context(
         self,
         results: Dict[str, List[SearchResult]],
-        class_name: str,
-        method_name: str,
+        target: str,
     ) -> str:
         """格式化变异生成上下文"""
         sections = []
@@ -357,7 +373,7 @@ class KnowledgeRetriever:
         if not sections:
             return ""
 
-        header = f"# {class_name}.{method_name} 的变异知识\n"
+        header = f"# {target} 的变异知识\n"
         return header + "\n".join(sections)
 
     @classmethod
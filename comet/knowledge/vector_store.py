@@ -1,19 +1,32 @@
 """向量存储模块 - ChromaDB 封装"""
 
+import heapq
 import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Literal, Optional, Sequence, Tuple
 
 import chromadb
+import numpy as np
+import numpy.typing as npt
 from chromadb.api.types import Metadata as ChromaMetadata
-from chromadb.api.types import PyEmbedding
 from chromadb.config import Settings as ChromaSettings
 
+from ..utils.log_context import submit_with_log_context
 from .embedding import EmbeddingService
 
 logger = logging.getLogger(__name__)
 
+# search_multi 中各集合的检索彼此独立，共享一个线程池并发执行
+_search_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="vector-search")
+
+# add 分批写入时，下一批的 embedding 在该线程池中计算，与当前批的写入重叠
+_embed_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="vector-embed")
+
 
 # 知识类型常量
 class KnowledgeType:
@@ -25,6 +38,18 @@ class KnowledgeType:
     PATTERNS = "patterns"  # 缺陷模式
 
 
+# 各知识类型创建集合时使用的 HNSW 参数（键省略 "hnsw:" 前缀），只对新建的集合生效。
+# 契约和缺陷模式集合规模小，用较小的图（M、construction_ef）节省内存和建索引时间；
+# 它们的检索常带 where 过滤，search_ef 保持 ChromaDB 默认值，避免过滤后结果不足。
+# 源代码分析和 Bug 报告规模大，提高召回率。
+DEFAULT_HNSW_PARAMS: Dict[str, Dict[str, int]] = {
+    KnowledgeType.SOURCE_ANALYSIS: {"construction_ef": 200, "M": 32, "search_ef": 64},
+    KnowledgeType.BUG_REPORTS: {"construction_ef": 200, "M": 32, "search_ef": 64},
+    KnowledgeType.CONTRACTS: {"construction_ef": 100, "M": 8},
+    KnowledgeType.PATTERNS: {"construction_ef": 100, "M": 8},
+}
+
+
 @dataclass
 class Document:
     """文档模型"""
@@ -43,23 +68,50 @@ class SearchResult:
     score: float  # 相似度分数 (0-1，越高越相似)
 
 
+# get_all 可选返回的文档字段
+DocumentField = Literal["documents", "metadatas"]
+
+# search 结果缓存键：(知识类型, 集合文档数量, 查询文本, top_k, 相似度阈值, 过滤条件)
+SearchCacheKey = Tuple[str, int, str, int, float, Optional[str]]
+
+
 class VectorStore:
     """向量存储 - ChromaDB 封装"""
 
+    # search 结果缓存的最大条目数，写入某个知识类型时清除该类型的缓存
+    SEARCH_CACHE_SIZE = 1024
+
+    # 文档数量缓存的有效期（秒）；其他实例或进程写入同一目录后，最迟在此时间后可见
+    COUNT_CACHE_TTL = 5.0
+
     def __init__(
         self,
         embedding_service: EmbeddingService,
         persist_directory: str = "./state/chromadb",
+        add_batch_size: Optional[int] = None,
+        hnsw_params: Optional[Dict[str, Dict[str, int]]] = None,
+        eager_init: bool = True,
     ):
         """
         初始化向量存储
 
+        查询结果缓存和文档数量缓存按“单写入者”设计：本实例的写入立即使缓存失效；
+        其他实例或进程写入同一持久化目录时，只有在文档数量变化且数量缓存过期
+        （COUNT_CACHE_TTL）后才会重新检索，数量不变的原地更新不会被察觉。
+
         Args:
             embedding_service: Embedding 服务
             persist_directory: 持久化目录
+            add_batch_size: add 分批写入的大小，默认与 embedding 服务的批大小一致
+            hnsw_params: 按知识类型覆盖 DEFAULT_HNSW_PARAMS 中的 HNSW 参数
+            eager_init: 是否在初始化时预先加载全部知识类型的集合
         """
         self.embedding_service = embedding_service
         self.persist_directory = Path(persist_directory)
+        self.add_batch_size = add_batch_size or embedding_service.batch_size
+        self.hnsw_params = {kt: dict(params) for kt, params in DEFAULT_HNSW_PARAMS.items()}
+        for kt, params in (hnsw_params or {}).items():
+            self.hnsw_params.setdefault(kt, {}).update(params)
 
         # 确保目录存在
         self.persist_directory.mkdir(parents=True, exist_ok=True)
@@ -74,13 +126,27 @@ class VectorStore:
         # 集合缓存
         self._collections: Dict[str, chromadb.Collection] = {}
 
-        logger.info(f"向量存储初始化完成，持久化目录: {self.persist_directory}")
+        # 查询结果缓存
+        self._search_cache: OrderedDict[SearchCacheKey, List[SearchResult]] = OrderedDict()
+        self._search_cache_lock = threading.Lock()
+        self._search_cache_generation = 0
+
+        # 各集合的文档数量缓存：(数量, 查询时间)，超过 COUNT_CACHE_TTL 或本实例写入后失效
+        self._counts: Dict[str, Tuple[int, float]] = {}
+
+        # 预先加载各集合，避免首次检索或写入时才付出集合创建和索引加载的开销
+        if eager_init:
+            for knowledge_type in DEFAULT_HNSW_PARAMS:
+                _ = self._get_collection(knowledge_type)
+
+        logger.info("向量存储初始化完成，持久化目录: %s", self.persist_directory)
 
     def close(self) -> None:
         if self._closed:
             return
 
         self._collections.clear()
+        self._invalidate_caches()
         close_method = getattr(self.client, "close", None)
         if callable(close_method):
             close_method()
@@ -97,12 +163,32 @@ class VectorStore:
             ChromaDB Collection
         """
         if knowledge_type not in self._collections:
+            metadata: Dict[str, Any] = {"hnsw:space": "cosine"}  # 使用余弦相似度
+            for key, value in self.hnsw_params.get(knowledge_type, {}).items():
+                metadata[f"hnsw:{key}"] = value
             self._collections[knowledge_type] = self.client.get_or_create_collection(
                 name=knowledge_type,
-                metadata={"hnsw:space": "cosine"},  # 使用余弦相似度
+                metadata=metadata,
             )
         return self._collections[knowledge_type]
 
+    def _invalidate_caches(self, knowledge_type: Optional[str] = None) -> None:
+        """
+        清除某个知识类型（为 None 时为全部）的查询结果缓存和文档数量缓存
+
+        在集合写入完成后调用；与写入重叠的读取因代数变化不会写回缓存。
+        """
+        with self._search_cache_lock:
+            self._search_cache_generation += 1
+            if knowledge_type is None:
+                self._search_cache.clear()
+                self._counts.clear()
+                return
+            _ = self._counts.pop(knowledge_type, None)
+            stale_keys = [key for key in self._search_cache if key[0] == knowledge_type]
+            for key in stale_keys:
+                del self._search_cache[key]
+
     @staticmethod
     def _normalize_metadata(
         metadata: ChromaMetadata | None,
@@ -132,6 +218,9 @@ class VectorStore:
         """
         添加文档到向量存储
 
+        文档超过 add_batch_size 时分批处理：当前批写入集合的同时，下一批的 embedding
+        已在后台计算，同一时刻最多只有两批在途。
+
         Args:
             knowledge_type: 知识类型
             documents: 文档列表
@@ -140,26 +229,59 @@ class VectorStore:
             return
 
         collection = self._get_collection(knowledge_type)
+        batch_size = self.add_batch_size
+        batches = [
+            documents[start : start + batch_size] for start in range(0, len(documents), batch_size)
+        ]
+
+        try:
+            if len(batches) == 1:
+                self._add_embedded(collection, documents, self._embed_documents(documents))
+            else:
+                pending = submit_with_log_context(_embed_pool, self._embed_documents, batches[0])
+                for index, batch in enumerate(batches):
+                    embeddings = pending.result()
+                    if index + 1 < len(batches):
+                        pending = submit_with_log_context(
+                            _embed_pool, self._embed_documents, batches[index + 1]
+                        )
+                    self._add_embedded(collection, batch, embeddings)
+        finally:
+            # 中途失败时前面的批次可能已经写入，同样需要失效缓存
+            self._invalidate_caches(knowledge_type)
+
+        logger.info("添加了 %s 个文档到 %s", len(documents), knowledge_type)
+
+    def _embed_documents(self, documents: List[Document]) -> npt.NDArray[np.float32]:
+        """
+        计算一批文档内容的 embedding，内容相同的文档只计算一次
 
-        # 获取 embeddings
-        texts = [doc.content for doc in documents]
-        embeddings = self.embedding_service.embed_batch(texts)
-        chroma_embeddings: list[PyEmbedding] = [embedding for embedding in embeddings]
+        返回 (文档数, 维度) 的 float32 矩阵，ChromaDB 直接按行使用，不再逐个转换 Python 浮点数。
+        """
+        text_rows: Dict[str, int] = {}
+        rows = [text_rows.setdefault(doc.content, len(text_rows)) for doc in documents]
+        unique_embeddings = np.asarray(
+            self.embedding_service.embed_batch(list(text_rows)), dtype=np.float32
+        )
+        if len(text_rows) == len(documents):
+            return unique_embeddings
+        return unique_embeddings[rows]
 
-        # 准备数据
-        ids = [doc.id for doc in documents]
+    @staticmethod
+    def _add_embedded(
+        collection: chromadb.Collection,
+        documents: List[Document],
+        embeddings: npt.NDArray[np.float32],
+    ) -> None:
+        """将已计算 embedding 的一批文档写入集合"""
         metadatas: list[ChromaMetadata] = [doc.metadata for doc in documents]
-
-        # 添加到集合
         collection.add(
-            ids=ids,
-            embeddings=chroma_embeddings,
-            documents=texts,
+            ids=[doc.id for doc in documents],
+            embeddings=embeddings,
+            documents=[doc.content for doc in documents],
             metadatas=metadatas,
         )
 
-        logger.info(f"添加了 {len(documents)} 个文档到 {knowledge_type}")
-
     def add_single(
         self,
         knowledge_type: str,
@@ -186,22 +308,41 @@ class VectorStore:
             knowledge_type: 知识类型
             document: 文档
         """
+        self.update_batch(knowledge_type, [document])
+
+    def update_batch(
+        self,
+        knowledge_type: str,
+        documents: List[Document],
+    ) -> None:
+        """
+        批量更新文档
+
+        所有文档的 embedding 通过一次 embed_batch 计算，再用一次 collection.update 写入。
+
+        Args:
+            knowledge_type: 知识类型
+            documents: 文档列表
+        """
+        if not documents:
+            return
+
         collection = self._get_collection(knowledge_type)
 
-        # 获取 embedding
-        embedding = self.embedding_service.embed(document.content)
-        chroma_embeddings: list[PyEmbedding] = [embedding]
-        metadatas: list[ChromaMetadata] = [document.metadata]
+        # 获取 embeddings
+        embeddings = self._embed_documents(documents)
+        metadatas: list[ChromaMetadata] = [doc.metadata for doc in documents]
 
         # 更新
         collection.update(
-            ids=[document.id],
-            embeddings=chroma_embeddings,
-            documents=[document.content],
+            ids=[doc.id for doc in documents],
+            embeddings=embeddings,
+            documents=[doc.content for doc in documents],
             metadatas=metadatas,
         )
+        self._invalidate_caches(knowledge_type)
 
-        logger.debug(f"更新文档: {document.id}")
+        logger.debug("更新了 %s 个文档", len(documents))
 
     def delete(
         self,
@@ -220,8 +361,23 @@ class VectorStore:
 
         collection = self._get_collection(knowledge_type)
         collection.delete(ids=document_ids)
+        self._invalidate_caches(knowledge_type)
 
-        logger.debug(f"删除了 {len(document_ids)} 个文档")
+        logger.debug("删除了 %s 个文档", len(document_ids))
+
+    def embed_query(self, query: str) -> List[float]:
+        """
+        计算查询文本的 embedding
+
+        结果可传给 search_with_embedding，在多个知识类型中复用。
+
+        Args:
+            query: 查询文本
+
+        Returns:
+            查询向量
+        """
+        return self.embedding_service.embed(query)
 
     def search(
         self,
@@ -234,6 +390,8 @@ class VectorStore:
         """
         相似度搜索
 
+        相同参数的查询在集合写入前直接返回缓存结果，不再计算 embedding 和检索索引。
+
         Args:
             knowledge_type: 知识类型
             query: 查询文本
@@ -244,20 +402,80 @@ class VectorStore:
         Returns:
             搜索结果列表
         """
-        collection = self._get_collection(knowledge_type)
+        # 检查集合是否为空；文档数量同时作为缓存键的一部分，其他实例写入后不会命中旧结果
+        document_count = self.count(knowledge_type)
+        if document_count == 0:
+            return []
+
+        cache_key: SearchCacheKey = (
+            knowledge_type,
+            document_count,
+            query,
+            top_k,
+            score_threshold,
+            repr(sorted(filter_metadata.items())) if filter_metadata else None,
+        )
+        with self._search_cache_lock:
+            cached = self._search_cache.get(cache_key)
+            if cached is not None:
+                self._search_cache.move_to_end(cache_key)
+                return list(cached)
+            generation = self._search_cache_generation
+
+        # 获取查询 embedding
+        query_embedding = self.embed_query(query)
+        results = self.search_with_embedding(
+            knowledge_type,
+            query_embedding,
+            top_k=top_k,
+            score_threshold=score_threshold,
+            filter_metadata=filter_metadata,
+        )
+
+        with self._search_cache_lock:
+            if generation != self._search_cache_generation:
+                return results
+            self._search_cache[cache_key] = list(results)
+            while len(self._search_cache) > self.SEARCH_CACHE_SIZE:
+                _ = self._search_cache.popitem(last=False)
+        return results
 
+    def search_with_embedding(
+        self,
+        knowledge_type: str,
+        query_embedding: List[float],
+        top_k: int = 5,
+        score_threshold: float = 0.0,
+        filter_metadata: Optional[Dict[str, Any]] = None,
+    ) -> List[SearchResult]:
+        """
+        使用已计算好的查询向量进行相似度搜索
+
+        同一查询需要在多个知识类型中检索时，只需计算一次 embedding。
+
+        Args:
+            knowledge_type: 知识类型
+            query_embedding: 查询向量
+            top_k: 返回数量
+            score_threshold: 相似度阈值 (0-1)
+            filter_metadata: 元数据过滤条件
+
+        Returns:
+            搜索结果列表
+        """
         # 检查集合是否为空
-        if collection.count() == 0:
+        document_count = self.count(knowledge_type)
+        if document_count == 0:
             return []
 
-        # 获取查询 embedding
-        query_embedding = self.embedding_service.embed(query)
+        collection = self._get_collection(knowledge_type)
+
         normalized_filter = self._normalize_filter_metadata(filter_metadata)
 
         # 执行搜索
         results = collection.query(
-            query_embeddings=[query_embedding],
-            n_results=min(top_k, collection.count()),
+            query_embeddings=np.asarray([query_embedding], dtype=np.float32),
+            n_results=min(top_k, document_count),
             where=normalized_filter,
             include=["documents", "metadatas", "distances"],
         )
@@ -297,6 +515,8 @@ class VectorStore:
         """
         在多个知识类型中搜索
 
+        同一查询只计算一次 embedding，空集合直接跳过。
+
         Args:
             knowledge_types: 知识类型列表
             query: 查询文本
@@ -306,11 +526,58 @@ class VectorStore:
         Returns:
             按知识类型分组的搜索结果
         """
-        results = {}
-        for kt in knowledge_types:
-            results[kt] = self.search(kt, query, top_k, score_threshold)
+        results: Dict[str, List[SearchResult]] = {kt: [] for kt in knowledge_types}
+        pending = [kt for kt in results if self.count(kt) > 0]
+        if not pending:
+            return results
+
+        # 查询 embedding 只计算一次，各集合的检索并发执行
+        query_embedding = self.embed_query(query)
+        futures = {
+            kt: submit_with_log_context(
+                _search_pool,
+                self.search_with_embedding,
+                kt,
+                query_embedding,
+                top_k=top_k,
+                score_threshold=score_threshold,
+            )
+            for kt in pending
+        }
+        for kt, future in futures.items():
+            results[kt] = future.result()
         return results
 
+    def search_merged(
+        self,
+        knowledge_types: List[str],
+        query: str,
+        top_k: int = 5,
+        score_threshold: float = 0.0,
+    ) -> List[SearchResult]:
+        """
+        在多个知识类型中搜索，并合并为一个按相似度排序的 top_k 列表
+
+        每个集合最多贡献 top_k 个候选，合并时只取全局分数最高的 top_k 个。
+
+        Args:
+            knowledge_types: 知识类型列表
+            query: 查询文本
+            top_k: 返回数量
+            score_threshold: 相似度阈值
+
+        Returns:
+            按相似度从高到低排列的搜索结果
+        """
+        results = self.search_multi(
+            knowledge_types, query, top_k=top_k, score_threshold=score_threshold
+        )
+        return heapq.nlargest(
+            top_k,
+            (result for type_results in results.values() for result in type_results),
+            key=lambda result: result.score,
+        )
+
     def get_by_id(
         self,
         knowledge_type: str,
@@ -347,6 +614,7 @@ class VectorStore:
         self,
         knowledge_type: str,
         limit: Optional[int] = None,
+        fields: Sequence[DocumentField] = ("documents", "metadatas"),
     ) -> List[Document]:
         """
         获取所有文档
@@ -354,21 +622,22 @@ class VectorStore:
         Args:
             knowledge_type: 知识类型
             limit: 返回数量限制
+            fields: 需要读取的字段，未读取的内容和元数据分别以 "" 和 {} 填充
 
         Returns:
             文档列表
         """
-        collection = self._get_collection(knowledge_type)
-
-        count = collection.count()
+        count = self.count(knowledge_type)
         if count == 0:
             return []
 
+        collection = self._get_collection(knowledge_type)
+
         n = limit if limit and limit < count else count
 
         results = collection.get(
             limit=n,
-            include=["documents", "metadatas"],
+            include=list(fields),
         )
 
         documents = []
@@ -385,18 +654,49 @@ class VectorStore:
 
         return documents
 
+    def list_ids(
+        self,
+        knowledge_type: str,
+        limit: Optional[int] = None,
+    ) -> List[str]:
+        """
+        只获取文档 ID，不读取内容和元数据
+
+        Args:
+            knowledge_type: 知识类型
+            limit: 返回数量限制
+
+        Returns:
+            文档 ID 列表
+        """
+        collection = self._get_collection(knowledge_type)
+        return collection.get(limit=limit, include=[])["ids"]
+
     def count(self, knowledge_type: str) -> int:
         """
         获取文档数量
 
+        结果缓存 COUNT_CACHE_TTL 秒，本实例写入该集合时立即失效，一次检索中的多次
+        空集合判断不必每次查询 ChromaDB；其他实例的写入在有效期过后即可见。
+
         Args:
             knowledge_type: 知识类型
 
         Returns:
             文档数量
         """
-        collection = self._get_collection(knowledge_type)
-        return collection.count()
+        now = time.monotonic()
+        with self._search_cache_lock:
+            cached = self._counts.get(knowledge_type)
+            if cached is not None and now - cached[1] < self.COUNT_CACHE_TTL:
+                return cached[0]
+            generation = self._search_cache_generation
+
+        count = self._get_collection(knowledge_type).count()
+        with self._search_cache_lock:
+            if generation == self._search_cache_generation:
+                self._counts[knowledge_type] = (count, now)
+        return count
 
     def clear(self, knowledge_type: str) -> None:
         """
@@ -409,8 +709,9 @@ class VectorStore:
         self.client.delete_collection(knowledge_type)
         if knowledge_type in self._collections:
             del self._collections[knowledge_type]
+        self._invalidate_caches(knowledge_type)
 
-        logger.info(f"清空集合: {knowledge_type}")
+        logger.info("清空集合: %s", knowledge_type)
 
     def get_stats(self) -> Dict[str, int]:
         """
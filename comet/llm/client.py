@@ -1,21 +1,114 @@
 """LLM 客户端封装"""
 
+import hashlib
 import logging
 import queue
+import sqlite3
 import threading
 import time
+import zlib
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from math import ceil
-from typing import Any, Dict, List, Optional, cast
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, cast
 
 import httpx
+import orjson
 import tiktoken
-from openai import APITimeoutError, OpenAI
-from openai.types.chat import ChatCompletion
+from openai import APITimeoutError, BadRequestError, OpenAI
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+from ..utils.log_context import bind_current_log_context, submit_with_log_context
 
 logger = logging.getLogger(__name__)
 
 _TOKEN_HEADROOM = 8
 
+# 持久化响应缓存的数据库文件名（位于 cache_dir 下）
+_RESPONSE_CACHE_FILE = "llm_response_cache.sqlite3"
+
+
+class _DaemonThreadPool:
+    """
+    复用守护线程执行阻塞任务
+
+    只有没有空闲线程时才新建线程，线程数等于历史最大并发数。与 ThreadPoolExecutor
+    不同，工作线程是守护线程，超时后仍在等待响应的请求不会阻塞进程退出。
+
+    超时的请求会继续占用工作线程直到底层调用返回，因此线程数以 max_threads 为上限，
+    达到上限后新任务排队等待空闲线程，并记录警告以便发现卡住的请求。
+    """
+
+    def __init__(self, thread_name_prefix: str, max_threads: int = 64):
+        self._thread_name_prefix = thread_name_prefix
+        self._max_threads = max_threads
+        self._tasks: queue.SimpleQueue[tuple[Future[Any], Callable[[], Any]]] = queue.SimpleQueue()
+        self._idle = threading.Semaphore(0)
+        self._lock = threading.Lock()
+        self._thread_count = 0
+        # 线程数达到上限时排队、尚未分配工作线程的任务数
+        self._backlog = 0
+
+    def submit(self, fn: Callable[[], Any]) -> Future[Any]:
+        future: Future[Any] = Future()
+        self._tasks.put((future, fn))
+        if self._idle.acquire(blocking=False):
+            return future
+
+        with self._lock:
+            # 与 _mark_idle 在同一把锁下确认，避免工作线程刚空闲时误判为已满
+            if self._idle.acquire(blocking=False):
+                return future
+            if self._thread_count >= self._max_threads:
+                self._backlog += 1
+                backlog = self._backlog
+                name = None
+            else:
+                self._thread_count += 1
+                name = f"{self._thread_name_prefix}-{self._thread_count}"
+
+        if name is None:
+            logger.warning(
+                "%s 工作线程已达上限 %s 且全部繁忙，可能有请求卡住，排队任务数: %s",
+                self._thread_name_prefix,
+                self._max_threads,
+                backlog,
+            )
+        else:
+            threading.Thread(target=self._work, name=name, daemon=True).start()
+        return future
+
+    def _mark_idle(self) -> None:
+        with self._lock:
+            if self._backlog:
+                # 队列中有等待分配的任务，本线程直接接手，不登记为空闲
+                self._backlog -= 1
+            else:
+                self._idle.release()
+
+    def _work(self) -> None:
+        while True:
+            future, fn = self._tasks.get()
+            if not future.set_running_or_notify_cancel():
+                self._mark_idle()
+                continue
+            try:
+                result = fn()
+            except BaseException as exc:
+                # 先登记为空闲再发布结果，调用方拿到结果后的下一次提交一定能复用本线程
+                self._mark_idle()
+                future.set_exception(exc)
+            else:
+                self._mark_idle()
+                future.set_result(result)
+            del future, fn
+
+
+# LLM 请求在复用的工作线程中执行以实现硬超时，避免每次请求都新建线程
+_request_pool = _DaemonThreadPool(thread_name_prefix="llm-request")
+
 
 class LLMClient:
     """LLM 客户端 - 封装 OpenAI 兼容 API"""
@@ -33,6 +126,8 @@ class LLMClient:
         reasoning_effort: Optional[str] = None,
         reasoning_enabled: Optional[bool] = None,
         verbosity: Optional[str] = None,
+        response_cache_size: int = 256,
+        cache_dir: Optional[str] = None,
     ):
         """
         初始化 LLM 客户端
@@ -49,6 +144,8 @@ class LLMClient:
             reasoning_effort: 推理努力程度，可选值: 'none', 'low', 'medium', 'high'
             reasoning_enabled: 是否启用推理，None 表示不下发该配置
             verbosity: 响应详细程度，可选值: 'low', 'medium', 'high'
+            response_cache_size: 确定性请求（temperature 为 0）的响应缓存容量，0 表示禁用
+            cache_dir: 持久化响应缓存目录，为 None 则只在内存中缓存
         """
         self.api_key = api_key
         self.base_url = base_url
@@ -70,12 +167,26 @@ class LLMClient:
         self.total_tokens = 0
         self.total_cost = 0.0
 
+        # 流式请求默认通过 stream_options 要求返回 usage，服务端拒绝该参数后不再发送
+        self._stream_include_usage = True
+
+        # 响应缓存：仅缓存 temperature 为 0 的请求，相同请求直接复用上次的响应
+        self.response_cache_size = response_cache_size
+        self._response_cache: OrderedDict[bytes, str] = OrderedDict()
+        self._response_cache_lock = threading.Lock()
+        self.cache_hits = 0
+
+        # 持久化响应缓存：内容压缩后写入 sqlite，跨运行复用确定性请求的响应
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self._disk_cache = self._open_disk_cache(self.cache_dir) if self.cache_dir else None
+
     def chat(
         self,
         messages: List[Dict[str, str]],
         temperature: Optional[float] = None,
         max_tokens: Optional[int] = None,
         response_format: Optional[Dict[str, str]] = None,
+        use_cache: bool = True,
     ) -> str:
         """
         调用聊天 API
@@ -85,66 +196,36 @@ class LLMClient:
             temperature: 温度参数（覆盖默认值）
             max_tokens: 输出 token 上限（覆盖默认值，但仍受总预算约束）
             response_format: 响应格式（如 {"type": "json_object"}）
+            use_cache: 是否读取响应缓存；调用方在上次回复无法使用而重试时应传 False，
+                新回复仍会写入缓存并覆盖旧条目
 
         Returns:
             模型响应内容
         """
         temp = temperature if temperature is not None else self.temperature
-        configured_budget = self.max_tokens
-        prompt_tokens = self._estimate_prompt_tokens(messages)
-
-        if prompt_tokens >= configured_budget:
-            raise ValueError(
-                f"提示词 token 数已达到或超过预算上限: prompt={prompt_tokens}, budget={configured_budget}"
-            )
-
-        remaining_budget = configured_budget - prompt_tokens
-        available_completion_budget = remaining_budget - _TOKEN_HEADROOM
+        outbound_max_tokens = self._outbound_max_tokens(messages, max_tokens)
 
-        if available_completion_budget < 1:
-            raise ValueError("提示词已接近预算上限，扣除请求开销后没有可用的输出 token 预算")
-
-        output_cap = max_tokens if max_tokens is not None else available_completion_budget
-        outbound_max_tokens = min(output_cap, available_completion_budget)
+        cache_key = None
+        if temp == 0 and (self.response_cache_size > 0 or self._disk_cache is not None):
+            cache_key = self._response_cache_key(messages, outbound_max_tokens, response_format)
+            cached = self._get_cached_response(cache_key) if use_cache else None
+            if cached is not None:
+                logger.debug("LLM 响应缓存命中")
+                return cached
 
         for attempt in range(self.max_retries):
             start_time = time.time()
             try:
-                kwargs: Dict[str, Any] = {
-                    "model": self.model,
-                    "messages": messages,
-                    "temperature": temp,
-                    "max_tokens": outbound_max_tokens,
-                    "stream": False,  # 明确禁用流式响应
-                    "timeout": self.timeout,
-                }
-
-                if response_format and self.supports_json_mode:
-                    kwargs["response_format"] = response_format
-
-                # 添加 reasoning effort 配置（Chat Completions API 使用顶级参数）
-                if self.reasoning_effort is not None:
-                    kwargs["reasoning_effort"] = self.reasoning_effort
-
-                if self.reasoning_enabled is not None:
-                    kwargs["extra_body"] = {"reasoning": {"enabled": self.reasoning_enabled}}
-
-                # 添加 verbosity 配置（如果模型支持）
-                if self.verbosity is not None:
-                    kwargs["verbosity"] = self.verbosity
-
-                logger.debug(
-                    f"LLM 调用参数: model={self.model}, max_tokens={outbound_max_tokens}, "
-                    f"temperature={temp}, timeout={self.timeout}s, "
-                    f"prompt_tokens={prompt_tokens}, remaining_budget={remaining_budget}, "
-                    f"available_completion_budget={available_completion_budget}"
+                # 明确禁用流式响应
+                kwargs = self._build_request_kwargs(
+                    messages, temp, outbound_max_tokens, response_format, stream=False
                 )
-                logger.debug(f"开始请求 LLM，超时设置: {self.timeout}s")
+                logger.debug("开始请求 LLM，超时设置: %ss", self.timeout)
 
                 response = self._create_with_hard_timeout(kwargs)
 
                 elapsed = time.time() - start_time
-                logger.debug(f"LLM 请求完成，耗时: {elapsed:.2f}s")
+                logger.debug("LLM 请求完成，耗时: %.2fs", elapsed)
 
                 with self._stats_lock:
                     self.total_calls += 1
@@ -157,11 +238,13 @@ class LLMClient:
                 # 记录详细的响应信息
                 if response.usage:
                     logger.debug(
-                        f"LLM 响应: finish_reason={finish_reason}, "
-                        f"prompt_tokens={response.usage.prompt_tokens}, "
-                        f"completion_tokens={response.usage.completion_tokens}, "
-                        f"total_tokens={response.usage.total_tokens}, "
-                        f"content_length={len(content) if content else 0}"
+                        "LLM 响应: finish_reason=%s, prompt_tokens=%s, completion_tokens=%s, "
+                        "total_tokens=%s, content_length=%s",
+                        finish_reason,
+                        response.usage.prompt_tokens,
+                        response.usage.completion_tokens,
+                        response.usage.total_tokens,
+                        len(content) if content else 0,
                     )
 
                 if content is None or content == "":
@@ -172,15 +255,22 @@ class LLMClient:
                     raise ValueError(error_msg)
 
                 logger.debug(
-                    f"LLM 调用成功，使用 {response.usage.total_tokens if response.usage else '?'} tokens"
+                    "LLM 调用成功，使用 %s tokens",
+                    response.usage.total_tokens if response.usage else "?",
                 )
+                # 只缓存正常结束的回复，截断（finish_reason=length）等不完整回复不应被复用
+                if cache_key is not None and finish_reason == "stop":
+                    self._store_cached_response(cache_key, content)
                 return content
 
             except (APITimeoutError, httpx.TimeoutException) as e:
                 elapsed = time.time() - start_time
                 logger.warning(
-                    f"LLM 请求超时 (尝试 {attempt + 1}/{self.max_retries}): "
-                    f"耗时 {elapsed:.2f}s, 错误: {e}"
+                    "LLM 请求超时 (尝试 %s/%s): 耗时 %.2fs, 错误: %s",
+                    attempt + 1,
+                    self.max_retries,
+                    elapsed,
+                    e,
                 )
                 if attempt == self.max_retries - 1:
                     raise RuntimeError(f"LLM 请求超时，已重试 {self.max_retries} 次: {e}")
@@ -189,8 +279,11 @@ class LLMClient:
             except Exception as e:
                 elapsed = time.time() - start_time
                 logger.warning(
-                    f"LLM 调用失败 (尝试 {attempt + 1}/{self.max_retries}): "
-                    f"耗时 {elapsed:.2f}s, 错误: {e}"
+                    "LLM 调用失败 (尝试 %s/%s): 耗时 %.2fs, 错误: %s",
+                    attempt + 1,
+                    self.max_retries,
+                    elapsed,
+                    e,
                 )
                 if attempt == self.max_retries - 1:
                     raise
@@ -198,6 +291,315 @@ class LLMClient:
 
         raise RuntimeError("LLM 调用失败，已达最大重试次数")
 
+    def chat_many(
+        self,
+        messages_list: List[List[Dict[str, str]]],
+        concurrency: int = 8,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        response_format: Optional[Dict[str, str]] = None,
+    ) -> List[str]:
+        """
+        并发调用多个互不依赖的聊天请求
+
+        每个请求都按 chat 的规则处理预算、缓存和重试，最多同时发出 concurrency 个请求。
+
+        Args:
+            messages_list: 每个请求的消息列表
+            concurrency: 最大并发请求数
+            temperature: 温度参数（覆盖默认值）
+            max_tokens: 输出 token 上限（覆盖默认值，但仍受总预算约束）
+            response_format: 响应格式（如 {"type": "json_object"}）
+
+        Returns:
+            与 messages_list 顺序一致的模型响应内容
+        """
+        if not messages_list:
+            return []
+
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(concurrency, len(messages_list))),
+            thread_name_prefix="llm-chat",
+        ) as executor:
+            futures = [
+                submit_with_log_context(
+                    executor, self.chat, messages, temperature, max_tokens, response_format
+                )
+                for messages in messages_list
+            ]
+            return [future.result() for future in futures]
+
+    def chat_stream(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        response_format: Optional[Dict[str, str]] = None,
+    ) -> Iterator[str]:
+        """
+        以流式方式调用聊天 API，逐段返回模型输出
+
+        调用方可以在生成结束前开始处理输出。只在建立流之前按 max_retries 重试，
+        开始产出内容后的错误直接抛出；单个分片的等待时间受 SDK 的 timeout 约束。
+
+        Args:
+            messages: 消息列表
+            temperature: 温度参数（覆盖默认值）
+            max_tokens: 输出 token 上限（覆盖默认值，但仍受总预算约束）
+            response_format: 响应格式（如 {"type": "json_object"}）
+
+        Yields:
+            模型响应内容的增量文本
+        """
+        temp = temperature if temperature is not None else self.temperature
+        outbound_max_tokens = self._outbound_max_tokens(messages, max_tokens)
+        kwargs = self._build_request_kwargs(
+            messages, temp, outbound_max_tokens, response_format, stream=True
+        )
+
+        stream: Iterable[ChatCompletionChunk] = ()
+        for attempt in range(self.max_retries):
+            try:
+                stream = self._open_stream(kwargs)
+                break
+            except Exception as e:
+                logger.warning(
+                    "LLM 流式请求建立失败 (尝试 %s/%s): %s", attempt + 1, self.max_retries, e
+                )
+                if attempt == self.max_retries - 1:
+                    raise
+                time.sleep(2**attempt)  # 指数退避
+
+        start_time = time.time()
+        content_parts: List[str] = []
+        usage = None
+        try:
+            for chunk in stream:
+                # 部分后端会在最后一个分片中附带 usage
+                if chunk.usage:
+                    usage = chunk.usage
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    content_parts.append(delta)
+                    yield delta
+        finally:
+            # 调用方提前结束迭代或处理出错时也要释放连接，并计入已消耗的 token
+            close = getattr(stream, "close", None)
+            if callable(close):
+                close()
+
+            content = "".join(content_parts)
+            if usage is not None:
+                total_tokens = usage.total_tokens
+            else:
+                # 后端未返回 usage 时按提示词和输出文本估算
+                reply = [{"role": "assistant", "content": content}]
+                prompt_tokens = self._estimate_prompt_tokens(messages)
+                total_tokens = prompt_tokens + self._estimate_prompt_tokens(reply)
+            with self._stats_lock:
+                self.total_calls += 1
+                self.total_tokens += total_tokens
+
+            logger.debug(
+                "LLM 流式请求结束，耗时: %.2fs，content_length=%s",
+                time.time() - start_time,
+                len(content),
+            )
+
+        if not content:
+            raise ValueError("模型返回空内容 (stream)")
+
+    def _open_stream(self, kwargs: Dict[str, Any]) -> Iterable[ChatCompletionChunk]:
+        """建立流式请求；服务端拒绝 stream_options 时去掉该参数重试一次"""
+        with self._client_lock:
+            client = self.client
+
+        try:
+            return cast(Iterable[ChatCompletionChunk], client.chat.completions.create(**kwargs))
+        except BadRequestError as e:
+            if "stream_options" not in kwargs:
+                raise
+            logger.warning("LLM 服务拒绝 stream_options 参数，去掉后重试: %s", e)
+            retry_kwargs = {k: v for k, v in kwargs.items() if k != "stream_options"}
+            stream = cast(
+                Iterable[ChatCompletionChunk], client.chat.completions.create(**retry_kwargs)
+            )
+            # 去掉参数后请求成功，说明 400 由 stream_options 引起，后续流式请求不再发送
+            self._stream_include_usage = False
+            del kwargs["stream_options"]
+            return stream
+
+    def _outbound_max_tokens(
+        self, messages: List[Dict[str, str]], max_tokens: Optional[int]
+    ) -> int:
+        """按总 token 预算扣除提示词后，计算本次请求的输出 token 上限"""
+        configured_budget = self.max_tokens
+        prompt_tokens = self._estimate_prompt_tokens(messages)
+
+        if prompt_tokens >= configured_budget:
+            raise ValueError(
+                f"提示词 token 数已达到或超过预算上限: prompt={prompt_tokens}, budget={configured_budget}"
+            )
+
+        remaining_budget = configured_budget - prompt_tokens
+        available_completion_budget = remaining_budget - _TOKEN_HEADROOM
+
+        if available_completion_budget < 1:
+            raise ValueError("提示词已接近预算上限，扣除请求开销后没有可用的输出 token 预算")
+
+        output_cap = max_tokens if max_tokens is not None else available_completion_budget
+        outbound_max_tokens = min(output_cap, available_completion_budget)
+
+        logger.debug(
+            "LLM 调用参数: model=%s, max_tokens=%s, timeout=%ss, prompt_tokens=%s, "
+            "remaining_budget=%s, available_completion_budget=%s",
+            self.model,
+            outbound_max_tokens,
+            self.timeout,
+            prompt_tokens,
+            remaining_budget,
+            available_completion_budget,
+        )
+        return outbound_max_tokens
+
+    def _build_request_kwargs(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        response_format: Optional[Dict[str, str]],
+        stream: bool,
+    ) -> Dict[str, Any]:
+        """构建 chat.completions.create 的请求参数"""
+        kwargs: Dict[str, Any] = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": stream,
+            "timeout": self.timeout,
+        }
+
+        # OpenAI 只有在显式请求时才会在流的最后一个分片中返回 usage
+        if stream and self._stream_include_usage:
+            kwargs["stream_options"] = {"include_usage": True}
+
+        if response_format and self.supports_json_mode:
+            kwargs["response_format"] = response_format
+
+        # 添加 reasoning effort 配置（Chat Completions API 使用顶级参数）
+        if self.reasoning_effort is not None:
+            kwargs["reasoning_effort"] = self.reasoning_effort
+
+        if self.reasoning_enabled is not None:
+            kwargs["extra_body"] = {"reasoning": {"enabled": self.reasoning_enabled}}
+
+        # 添加 verbosity 配置（如果模型支持）
+        if self.verbosity is not None:
+            kwargs["verbosity"] = self.verbosity
+
+        return kwargs
+
+    def _response_cache_key(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: int,
+        response_format: Optional[Dict[str, str]],
+    ) -> bytes:
+        """由决定响应内容的全部请求参数计算缓存键"""
+        payload = orjson.dumps(
+            {
+                "base_url": self.base_url,
+                "model": self.model,
+                "messages": messages,
+                "max_tokens": max_tokens,
+                "response_format": response_format if self.supports_json_mode else None,
+                "reasoning_effort": self.reasoning_effort,
+                "reasoning_enabled": self.reasoning_enabled,
+                "verbosity": self.verbosity,
+            },
+            option=orjson.OPT_SORT_KEYS,
+        )
+        return hashlib.blake2b(payload, digest_size=16).digest()
+
+    def _get_cached_response(self, key: bytes) -> Optional[str]:
+        with self._response_cache_lock:
+            content = self._response_cache.get(key)
+            if content is not None:
+                self._response_cache.move_to_end(key)
+            elif self._disk_cache is not None:
+                content = self._load_disk_response(self._disk_cache, key)
+                if content is not None:
+                    self._remember_response(key, content)
+        if content is None:
+            return None
+        with self._stats_lock:
+            self.cache_hits += 1
+        return content
+
+    def _store_cached_response(self, key: bytes, content: str) -> None:
+        with self._response_cache_lock:
+            self._remember_response(key, content)
+            if self._disk_cache is not None:
+                self._save_disk_response(self._disk_cache, key, content)
+
+    def _remember_response(self, key: bytes, content: str) -> None:
+        """写入内存 LRU（调用方需持有 _response_cache_lock）"""
+        if self.response_cache_size <= 0:
+            return
+        self._response_cache[key] = content
+        self._response_cache.move_to_end(key)
+        while len(self._response_cache) > self.response_cache_size:
+            _ = self._response_cache.popitem(last=False)
+
+    @staticmethod
+    def _open_disk_cache(cache_dir: Path) -> Optional[sqlite3.Connection]:
+        """打开持久化响应缓存，失败时退化为只使用内存缓存"""
+        try:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(
+                cache_dir / _RESPONSE_CACHE_FILE, check_same_thread=False, isolation_level=None
+            )
+            _ = conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key BLOB PRIMARY KEY, content BLOB NOT NULL, created_at REAL NOT NULL)"
+            )
+            return conn
+        except (OSError, sqlite3.Error) as e:
+            logger.warning("无法打开 LLM 响应缓存 %s: %s", cache_dir, e)
+            return None
+
+    @staticmethod
+    def _load_disk_response(conn: sqlite3.Connection, key: bytes) -> Optional[str]:
+        try:
+            row = conn.execute("SELECT content FROM responses WHERE key = ?", (key,)).fetchone()
+            return zlib.decompress(row[0]).decode("utf-8") if row else None
+        except (sqlite3.Error, zlib.error, UnicodeDecodeError) as e:
+            logger.warning("读取 LLM 响应缓存失败: %s", e)
+            return None
+
+    @staticmethod
+    def _save_disk_response(conn: sqlite3.Connection, key: bytes, content: str) -> None:
+        try:
+            _ = conn.execute(
+                "INSERT OR REPLACE INTO responses (key, content, created_at) VALUES (?, ?, ?)",
+                (key, zlib.compress(content.encode("utf-8")), time.time()),
+            )
+        except sqlite3.Error as e:
+            logger.warning("写入 LLM 响应缓存失败: %s", e)
+
+    def clear_response_cache(self) -> None:
+        """清空响应缓存（包括持久化缓存）"""
+        with self._response_cache_lock:
+            self._response_cache.clear()
+            if self._disk_cache is not None:
+                try:
+                    _ = self._disk_cache.execute("DELETE FROM responses")
+                except sqlite3.Error as e:
+                    logger.warning("清空 LLM 响应缓存失败: %s", e)
+
     def _build_client(self) -> OpenAI:
         return OpenAI(
             api_key=self.api_key,
@@ -215,41 +617,21 @@ class LLMClient:
             try:
                 close()
             except Exception as exc:
-                logger.warning(f"关闭 LLM 客户端失败，将继续重建客户端: {exc}")
+                logger.warning("关闭 LLM 客户端失败，将继续重建客户端: %s", exc)
 
     def _create_with_hard_timeout(self, kwargs: Dict[str, Any]) -> ChatCompletion:
-        result_queue: queue.Queue[tuple[str, object]] = queue.Queue(maxsize=1)
-
         with self._client_lock:
             client = self.client
 
-        def _worker() -> None:
-            try:
-                response = client.chat.completions.create(**kwargs)
-                result_queue.put(("response", response))
-            except Exception as exc:
-                result_queue.put(("exception", exc))
-
-        worker = threading.Thread(target=_worker, daemon=True)
-        worker.start()
-        worker.join(timeout=self.timeout)
-
-        if worker.is_alive():
+        future = _request_pool.submit(
+            bind_current_log_context(client.chat.completions.create, **kwargs)
+        )
+        try:
+            return cast(ChatCompletion, future.result(timeout=self.timeout))
+        except FutureTimeoutError:
             self._reset_client()
             raise self._hard_timeout_error()
 
-        try:
-            result_type, payload = result_queue.get_nowait()
-        except queue.Empty as exc:
-            raise RuntimeError("LLM 请求线程已结束，但未返回结果") from exc
-
-        if result_type == "exception":
-            if isinstance(payload, Exception):
-                raise payload
-            raise RuntimeError("LLM 请求线程返回了非异常错误对象")
-
-        return cast(ChatCompletion, payload)
-
     def _hard_timeout_error(self) -> httpx.ReadTimeout:
         return httpx.ReadTimeout(f"LLM 请求超过硬超时限制 {self.timeout}s")
 
@@ -281,6 +663,7 @@ class LLMClient:
         temperature: Optional[float] = None,
         max_tokens: Optional[int] = None,
         response_format: Optional[Dict[str, str]] = None,
+        use_cache: bool = True,
     ) -> str:
         """
         使用系统提示词和用户提示词调用 API
@@ -291,6 +674,7 @@ class LLMClient:
             temperature: 温度参数
             max_tokens: 输出 token 上限
             response_format: 响应格式
+            use_cache: 是否读取响应缓存（见 chat）
 
         Returns:
             模型响应内容
@@ -299,7 +683,7 @@ class LLMClient:
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt},
         ]
-        return self.chat(messages, temperature, max_tokens, response_format)
+        return self.chat(messages, temperature, max_tokens, response_format, use_cache)
 
     def get_stats(self) -> Dict[str, Any]:
         """获取统计信息"""
@@ -307,12 +691,14 @@ class LLMClient:
             total_calls = self.total_calls
             total_tokens = self.total_tokens
             total_cost = self.total_cost
+            cache_hits = self.cache_hits
 
         return {
             "total_calls": total_calls,
             "total_tokens": total_tokens,
             "total_cost": total_cost,
             "avg_tokens_per_call": (total_tokens / total_calls if total_calls > 0 else 0),
+            "cache_hits": cache_hits,
         }
 
     def get_total_calls(self) -> int:
@@ -325,3 +711,4 @@ class LLMClient:
             self.total_calls = 0
             self.total_tokens = 0
             self.total_cost = 0.0
+            self.cache_hits = 0
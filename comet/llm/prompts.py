@@ -1,15 +1,150 @@
 """提示词模板管理"""
 
-from typing import Any, Dict, List, Optional
+import logging
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
 
-from jinja2 import Template
+from jinja2 import DictLoader, Environment
 
-from ..utils.code_utils import add_line_numbers
+from ..utils.code_utils import add_line_numbers, add_line_numbers_around_methods
+
+logger = logging.getLogger(__name__)
+
+# 可选参数缺省时共享的只读空容器，模板只遍历不修改，无需每次渲染新建
+_EMPTY: Tuple[Any, ...] = ()
+_EMPTY_MAPPING: Mapping[str, Any] = MappingProxyType({})
+
+# 变异提示词共用的 Java 8 语法约束
+_MUTATION_JAVA8_RULES = """**Java 8 语法要求**：
+- **必须使用 Java 8 语法**，不能使用更高版本的特性
+- ✗ 禁止使用 `var` 关键字（Java 10+）
+- ✗ 禁止使用 switch 表达式（Java 14+）
+- ✗ 禁止使用文本块（triple quotes，Java 15+）
+- ✗ 禁止使用 record 类型（Java 14+）
+- ✗ 禁止使用 pattern matching（Java 16+）
+- ✗ 禁止使用 sealed classes（Java 17+）
+- ✔ 可以使用 Lambda 表达式和 Stream API（Java 8 特性）
+- ✔ 可以使用方法引用（Java 8 特性）
+- ✔ 可以使用 Optional（Java 8 特性）
+"""
+
+# 测试完善与修复提示词共用的 Java 8 语法约束
+_TEST_JAVA8_RULES = """**Java 8 语法要求**：
+- **必须使用 Java 8 语法**，不能使用更高版本的特性
+- ✗ 禁止使用 `var` 关键字（Java 10+），必须显式声明类型
+- ✗ 禁止使用 switch 表达式（Java 14+），使用传统的 switch 语句
+- ✗ 禁止使用文本块（triple quotes，Java 15+），使用普通字符串拼接
+- ✗ 禁止使用 record 类型（Java 14+）
+- ✗ 禁止使用 pattern matching（Java 16+）
+- ✗ 禁止使用 sealed classes（Java 17+）
+- ✔ 可以使用 Lambda 表达式和 Stream API（Java 8 特性）
+- ✔ 可以使用方法引用（Java 8 特性）
+- ✔ 可以使用 Optional（Java 8 特性）
+"""
+
+# 测试生成与完善提示词共用的断言写法约束
+_ASSERTION_RULES = """**断言方法使用规范**：
+- ✔ 正确：直接使用 `assertEquals(expected, actual)`
+- ✖ 错误：不要使用 `Assertions.assertEquals(expected, actual)`
+- ✔ 正确：直接使用 `assertTrue(condition)`
+- ✖ 错误：不要使用 `Assertions.assertTrue(condition)`
+- 原因：测试类会使用静态导入 `import static org.junit.jupiter.api.Assertions.*`
+"""
+
+
+def _join_items(items: Optional[Iterable[Any]]) -> str:
+    """以 ", " 拼接列表，与 Jinja 的 join(', ') 过滤器输出一致"""
+    return ", ".join(map(str, items or _EMPTY))
+
+
+def _round_str(value: Any, ndigits: int) -> str:
+    """按 Jinja round 过滤器的结果格式化数值，缺失的指标输出 None 而不是渲染失败"""
+    if value is None:
+        return "None"
+    return str(round(value, ndigits))
+
+
+def _planner_state_view(state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    为调度提示词准备状态视图，数值在 Python 侧预先格式化
+
+    模板只读取 *_str 字段，不再逐个调用 round 过滤器。
+    """
+    method_coverage = state.get("current_method_coverage")
+    return {
+        **state,
+        "global_mutation_score_str": _round_str(state.get("global_mutation_score"), 3),
+        "line_coverage_str": _round_str(state.get("line_coverage"), 3),
+        "branch_coverage_str": _round_str(state.get("branch_coverage"), 3),
+        "mutation_score_str": _round_str(state.get("mutation_score"), 3),
+        "current_method_coverage_str": (
+            _round_str(method_coverage * 100, 1) if method_coverage is not None else "None"
+        ),
+        "recent_improvements": [
+            {
+                **imp,
+                "mutation_score_delta_str": _round_str(imp.get("mutation_score_delta"), 3),
+                "coverage_delta_str": _round_str(imp.get("coverage_delta"), 3),
+            }
+            for imp in state.get("recent_improvements") or _EMPTY
+        ],
+        "available_targets": [
+            {**target, "coverage_str": _round_str(target.get("coverage"), 2)}
+            for target in state.get("available_targets") or _EMPTY
+        ],
+    }
+
+
+def _number_class_code(
+    class_code: str, class_name: str, method_name: Optional[str], max_chars: int
+) -> str:
+    """
+    为被测类代码加行号，超长的类只保留构造方法和目标方法附近的代码
+
+    Args:
+        class_code: 被测类源代码
+        class_name: 类名（可以是全限定名），用于保留构造方法
+        method_name: 目标方法名，为空时总是返回完整代码
+        max_chars: 超过该长度才截取
+
+    Returns:
+        带行号的代码（截取时行号与原始代码一致）
+    """
+    if method_name and len(class_code) > max_chars:
+        simple_name = class_name.rsplit(".", 1)[-1]
+        excerpt = add_line_numbers_around_methods(class_code, (simple_name, method_name))
+        if excerpt is not None:
+            logger.info(
+                "类 %s 代码过长（%s 字符），提示词中只保留 %s 附近的代码",
+                class_name,
+                len(class_code),
+                method_name,
+            )
+            return excerpt
+    return add_line_numbers(class_code)
+
+
+def _contract_view(contract: Any) -> Dict[str, Any]:
+    """
+    将契约转换为模板使用的视图，条件列表在 Python 侧预先拼接
+
+    模板中只做属性读取，不再对每个契约逐次调用 join 过滤器。
+    """
+    return {
+        "method_name": contract.method_name,
+        "preconditions_str": _join_items(contract.preconditions),
+        "postconditions_str": _join_items(contract.postconditions),
+        "exceptions_str": _join_items(contract.exceptions),
+    }
 
 
 class PromptManager:
     """提示词管理器 - 管理所有 LLM 提示词模板"""
 
+    # 测试生成/完善提示词中被测类代码的长度上限（字符），超过时只保留目标方法附近的代码
+    MAX_CLASS_CODE_CHARS = 20000
+
     # 契约提取提示词
     EXTRACT_CONTRACT_SYSTEM = """你是一个 Java 代码分析专家，专门从代码中提取契约信息（前置条件、后置条件、异常条件）。
 
@@ -20,25 +155,6 @@ class PromptManager:
 - postconditions: 后置条件列表（返回值的保证）
 - exceptions: 异常条件列表（什么情况下抛出什么异常）"""
 
-    EXTRACT_CONTRACT_USER = Template(
-        """请分析以下 Java 方法：
-
-类名：{{ class_name }}
-方法签名：{{ method_signature }}
-
-源代码：
-```java
-{{ source_code }}
-```
-
-{% if javadoc %}
-Javadoc：
-{{ javadoc }}
-{% endif %}
-
-请提取该方法的契约信息。"""
-    )
-
     # 模式提取提示词
     EXTRACT_PATTERN_SYSTEM = """你是一个软件缺陷分析专家，专门从 Bug 报告和修复补丁中学习缺陷模式。
 
@@ -51,56 +167,16 @@ Javadoc：
 - template: 如何应用这个模式进行代码变异
 - examples: 具体示例"""
 
-    EXTRACT_PATTERN_USER = Template(
-        """请分析以下 Bug 报告：
-
-{% if bug_description %}
-Bug 描述：
-{{ bug_description }}
-{% endif %}
-
-{% if diff_patch %}
-修复补丁（diff）：
-```diff
-{{ diff_patch }}
-```
-{% endif %}
-
-{% if before_code %}
-修复前代码：
-```java
-{{ before_code }}
-```
-{% endif %}
-
-{% if after_code %}
-修复后代码：
-```java
-{{ after_code }}
-```
-{% endif %}
-
-请提取该 Bug 反映的缺陷模式。"""
-    )
-
     # 变异生成提示词
-    GENERATE_MUTATION_SYSTEM = """你是一个代码变异专家，专门生成语义变异来暴露测试的不足。
+    GENERATE_MUTATION_SYSTEM = (
+        """你是一个代码变异专家，专门生成语义变异来暴露测试的不足。
 
 你的任务是分析给定的 Java 类，基于提供的缺陷模式（Patterns）和契约（Contracts），生成有意义的变异体。
 **你可以根据代码复杂度和缺陷模式自主决定生成多少个变异体**，不受数量限制。
 
-**Java 8 语法要求**：
-- **必须使用 Java 8 语法**，不能使用更高版本的特性
-- ✗ 禁止使用 `var` 关键字（Java 10+）
-- ✗ 禁止使用 switch 表达式（Java 14+）
-- ✗ 禁止使用文本块（triple quotes，Java 15+）
-- ✗ 禁止使用 record 类型（Java 14+）
-- ✗ 禁止使用 pattern matching（Java 16+）
-- ✗ 禁止使用 sealed classes（Java 17+）
-- ✔ 可以使用 Lambda 表达式和 Stream API（Java 8 特性）
-- ✔ 可以使用方法引用（Java 8 特性）
-- ✔ 可以使用 Optional（Java 8 特性）
-
+"""
+        + _MUTATION_JAVA8_RULES
+        + """
 变异应该：
 1. 针对特定的语义问题（而非简单的语法变化）
 2. 小范围修改（几行代码）
@@ -144,9 +220,9 @@ MUTATED:
 9. 确保代码缩进与原代码完全一致
 
 **重要**：只返回变异体列表，不要返回任何说明文字或其他额外内容。"""
+    )
 
-    GENERATE_MUTATION_USER = Template(
-        """请为以下 Java 类生成变异体：
+    GENERATE_MUTATION_USER = """请为以下 Java 类生成变异体：
 
 类名：{{ class_name }}
 
@@ -163,9 +239,9 @@ MUTATED:
 相关契约：
 {% for contract in contracts %}
 - {{ contract.method_name }}:
-  前置条件: {{ contract.preconditions | join(', ') }}
-  后置条件: {{ contract.postconditions | join(', ') }}
-  异常条件: {{ contract.exceptions | join(', ') }}
+  前置条件: {{ contract.preconditions_str }}
+  后置条件: {{ contract.postconditions_str }}
+  异常条件: {{ contract.exceptions_str }}
 {% endfor %}
 {% endif %}
 
@@ -193,26 +269,17 @@ MUTATED:
 {% endif %}
 
 请生成有意义的变异体。"""
-    )
 
     # 变异完善提示词
-    REFINE_MUTATION_SYSTEM = """你是一个高级代码变异专家，专门基于现有测试的弱点生成更具针对性的变异体。
+    REFINE_MUTATION_SYSTEM = (
+        """你是一个高级代码变异专家，专门基于现有测试的弱点生成更具针对性的变异体。
 
 你的任务是分析现有的变异体、测试代码和击杀率，生成新的、更难被测试检测的变异体。
 **你可以根据测试的覆盖情况和弱点自主决定生成多少个变异体**，不受数量限制。
 
-**Java 8 语法要求**：
-- **必须使用 Java 8 语法**，不能使用更高版本的特性
-- ✗ 禁止使用 `var` 关键字（Java 10+）
-- ✗ 禁止使用 switch 表达式（Java 14+）
-- ✗ 禁止使用文本块（triple quotes，Java 15+）
-- ✗ 禁止使用 record 类型（Java 14+）
-- ✗ 禁止使用 pattern matching（Java 16+）
-- ✗ 禁止使用 sealed classes（Java 17+）
-- ✔ 可以使用 Lambda 表达式和 Stream API（Java 8 特性）
-- ✔ 可以使用方法引用（Java 8 特性）
-- ✔ 可以使用 Optional（Java 8 特性）
-
+"""
+        + _MUTATION_JAVA8_RULES
+        + """
 分析策略：
 1. **研究测试代码**：查看测试方法的断言、边界检查、异常处理
 2. **识别测试盲区**：找出测试没有充分验证的场景（如未测试的边界值、遗漏的异常情况）
@@ -261,9 +328,9 @@ MUTATED:
 9. 确保代码缩进与原代码完全一致
 
 **重要**：只返回变异体列表，不要返回任何说明文字或其他额外内容。"""
+    )
 
-    REFINE_MUTATION_USER = Template(
-        """请基于现有测试生成更具针对性的变异体：
+    REFINE_MUTATION_USER = """请基于现有测试生成更具针对性的变异体：
 
 类名：{{ class_name }}
 
@@ -303,9 +370,9 @@ MUTATED:
 相关契约：
 {% for contract in contracts %}
 - {{ contract.method_name }}:
-  前置条件: {{ contract.preconditions | join(', ') }}
-  后置条件: {{ contract.postconditions | join(', ') }}
-  异常条件: {{ contract.exceptions | join(', ') }}
+  前置条件: {{ contract.preconditions_str }}
+  后置条件: {{ contract.postconditions_str }}
+  异常条件: {{ contract.exceptions_str }}
 {% endfor %}
 {% endif %}
 
@@ -337,10 +404,10 @@ MUTATED:
 {% endif %}
 
 请生成针对性的变异体。"""
-    )
 
     # 测试生成提示词
-    GENERATE_TEST_SYSTEM = """你是一个 JUnit 测试专家，专门为 Java 代码生成高质量的测试用例。
+    GENERATE_TEST_SYSTEM = (
+        """你是一个 JUnit 测试专家，专门为 Java 代码生成高质量的测试用例。
 
 你的任务是为给定的方法生成多个测试方法（具体数量由你根据复杂度决定），每个测试方法覆盖不同的测试场景。
 
@@ -389,13 +456,9 @@ void testAddBoundary() {
 6. **测试方法必须在方法内部创建被测对象的实例**（不要依赖共享的类字段或 @BeforeEach 初始化）
 7. **严格遵守 Java 8 语法规范**
 
-**断言方法使用规范**：
-- ✔ 正确：直接使用 `assertEquals(expected, actual)`
-- ✖ 错误：不要使用 `Assertions.assertEquals(expected, actual)`
-- ✔ 正确：直接使用 `assertTrue(condition)`
-- ✖ 错误：不要使用 `Assertions.assertTrue(condition)`
-- 原因：测试类会使用静态导入 `import static org.junit.jupiter.api.Assertions.*`
-
+"""
+        + _ASSERTION_RULES
+        + """
 **Mockito 使用规范**：
 - 使用 Mockito 创建 mock 对象来隔离被测单元，避免依赖外部系统
 - ✔ 正确：直接使用 `mock(ClassName.class)` 创建 mock 对象
@@ -416,9 +479,9 @@ void testAddBoundary() {
 3. 每个测试方法都是独立的，包含 @Test 注解和完整的方法体
 4. 测试方法名应清晰描述测试场景（如 testAddPositive、testAddBoundary、testAddException）
 5. 不要返回任何 Markdown (```java)、JSON、说明文字、类定义或其他额外内容"""
+    )
 
-    GENERATE_TEST_USER = Template(
-        """请为以下方法生成多个测试方法：
+    GENERATE_TEST_USER = """请为以下方法生成多个测试方法：
 
 类名：{{ class_name }}
 方法签名：{{ method_signature }}
@@ -430,9 +493,9 @@ void testAddBoundary() {
 
 {% if contracts %}
 方法契约：
-前置条件: {{ contracts.preconditions | join(', ') }}
-后置条件: {{ contracts.postconditions | join(', ') }}
-异常条件: {{ contracts.exceptions | join(', ') }}
+前置条件: {{ contracts.preconditions_str }}
+后置条件: {{ contracts.postconditions_str }}
+异常条件: {{ contracts.exceptions_str }}
 {% endif %}
 
 {% if existing_tests %}
@@ -457,7 +520,7 @@ void testAddBoundary() {
 - 当前行覆盖率：{{ "%.1f"|format(coverage_gaps.coverage_rate * 100) }}%
 - 已覆盖：{{ coverage_gaps.covered_lines }}/{{ coverage_gaps.total_lines }} 行
 {% if coverage_gaps.uncovered_lines %}
-- 未覆盖的行号：{{ coverage_gaps.uncovered_lines | join(', ') }}
+- 未覆盖的行号：{{ uncovered_lines_str }}
 - **请重点针对这些未覆盖的行号生成测试用例**
 {% else %}
 - **该方法已达到100%行覆盖率，请关注分支覆盖和边界情况**
@@ -481,10 +544,10 @@ void testAddBoundary() {
 11. **只返回测试方法的代码**，使用 `===TEST_METHOD===` 分隔，不要返回任何说明、注释或其他内容
 
 请按照格式返回多个测试方法。"""
-    )
 
     # 测试完善提示词
-    REFINE_TEST_SYSTEM = """你是一个 JUnit 测试专家，专门完善和改进现有的测试用例。
+    REFINE_TEST_SYSTEM = (
+        """你是一个 JUnit 测试专家，专门完善和改进现有的测试用例。
 
 你的任务是根据评估反馈（如幸存的变异体、覆盖缺口等）来优化测试。你可以：
 1. **改进现有测试方法**：增强断言、添加边界检查、修复逻辑错误
@@ -515,18 +578,9 @@ void testAddBoundary() {
 - 你返回的所有测试方法将完全替换当前测试文件中的所有方法
 - 可以改进某些方法、删除某些方法、或添加新方法，但必须返回完整的方法列表
 
-**Java 8 语法要求**：
-- **必须使用 Java 8 语法**，不能使用更高版本的特性
-- ✗ 禁止使用 `var` 关键字（Java 10+），必须显式声明类型
-- ✗ 禁止使用 switch 表达式（Java 14+），使用传统的 switch 语句
-- ✗ 禁止使用文本块（triple quotes，Java 15+），使用普通字符串拼接
-- ✗ 禁止使用 record 类型（Java 14+）
-- ✗ 禁止使用 pattern matching（Java 16+）
-- ✗ 禁止使用 sealed classes（Java 17+）
-- ✔ 可以使用 Lambda 表达式和 Stream API（Java 8 特性）
-- ✔ 可以使用方法引用（Java 8 特性）
-- ✔ 可以使用 Optional（Java 8 特性）
-
+"""
+        + _TEST_JAVA8_RULES
+        + """
 **策略选择**：
 - 如果现有测试覆盖了基本场景但不够细致：改进现有测试
 - 如果存在明显的测试缺口：在方法内补充断言
@@ -534,13 +588,9 @@ void testAddBoundary() {
 - 优先考虑击杀幸存变异体的测试
 - 如果测试依赖外部资源：引入 Mockito 进行隔离
 
-**断言方法使用规范**：
-- ✔ 正确：直接使用 `assertEquals(expected, actual)`
-- ✖ 错误：不要使用 `Assertions.assertEquals(expected, actual)`
-- ✔ 正确：直接使用 `assertTrue(condition)`
-- ✖ 错误：不要使用 `Assertions.assertTrue(condition)`
-- 原因：测试类会使用静态导入 `import static org.junit.jupiter.api.Assertions.*`
-
+"""
+        + _ASSERTION_RULES
+        + """
 **Mockito 使用规范**：
 - ✔ 正确：直接使用 `mock(ClassName.class)` 创建 mock 对象
 - ✔ 正确：直接使用 `when(mock.method()).thenReturn(value)` 设置 mock 行为
@@ -559,9 +609,9 @@ void testAddBoundary() {
 2. 每个测试方法都是独立的，包含 @Test 注解和完整的方法体
 3. 这些方法将完全替换当前测试文件中的所有方法
 4. 不要返回任何 Markdown (```java)、JSON、说明文字或其他额外内容"""
+    )
 
-    REFINE_TEST_USER = Template(
-        """请优化以下测试用例：
+    REFINE_TEST_USER = """请优化以下测试用例：
 
 目标类：{{ test_case.target_class }}
 {% if target_method %}
@@ -598,8 +648,8 @@ void testAddBoundary() {
 {% if target_method %}
 以下是目标方法 {{ target_method }} 的覆盖缺口：
 {% endif %}
-未覆盖的行: {{ coverage_gaps.uncovered_lines | join(', ') }}
-未覆盖的分支: {{ coverage_gaps.uncovered_branches | join(', ') }}
+未覆盖的行: {{ uncovered_lines_str }}
+未覆盖的分支: {{ uncovered_branches_str }}
 {% endif %}
 
 {% if evaluation_feedback %}
@@ -623,24 +673,15 @@ void testAddBoundary() {
 9. **只返回测试方法代码**，不要返回任何说明、注释或其他内容
 
 请按照格式返回所有测试方法。"""
-    )
 
     # 测试修复提示词
-    FIX_TEST_SYSTEM = """你是一个 Java 测试代码修复专家。
+    FIX_TEST_SYSTEM = (
+        """你是一个 Java 测试代码修复专家。
 你的任务是根据错误信息修复测试代码（包括编译错误和测试运行失败）。
 
-**Java 8 语法要求**：
-- **必须使用 Java 8 语法**，不能使用更高版本的特性
-- ✗ 禁止使用 `var` 关键字（Java 10+），必须显式声明类型
-- ✗ 禁止使用 switch 表达式（Java 14+），使用传统的 switch 语句
-- ✗ 禁止使用文本块（triple quotes，Java 15+），使用普通字符串拼接
-- ✗ 禁止使用 record 类型（Java 14+）
-- ✗ 禁止使用 pattern matching（Java 16+）
-- ✗ 禁止使用 sealed classes（Java 17+）
-- ✔ 可以使用 Lambda 表达式和 Stream API（Java 8 特性）
-- ✔ 可以使用方法引用（Java 8 特性）
-- ✔ 可以使用 Optional（Java 8 特性）
-
+"""
+        + _TEST_JAVA8_RULES
+        + """
 **严格限制**：
 1. **只能修改测试方法内部的实现代码**（方法体内的语句）
 2. **不能修改测试方法名称**（如 testAddWithPositiveNumbers）
@@ -670,9 +711,9 @@ void testAddBoundary() {
 - 只修改测试方法的方法体内部代码
 
 **重要**：只返回修复后的完整测试类代码。不要返回任何 JSON、说明文字或其他额外内容。"""
+    )
 
-    FIX_TEST_USER = Template(
-        """请修复以下测试代码的错误：
+    FIX_TEST_USER = """请修复以下测试代码的错误：
 
 被测类代码：
 ```java
@@ -705,26 +746,17 @@ void testAddBoundary() {
 9. **只返回完整的测试类代码，不要返回任何说明、注释或其他内容**
 
 请直接返回修复后的完整测试类代码。"""
-    )
 
     # 单个测试方法修复提示词
-    FIX_SINGLE_METHOD_SYSTEM = """你是一个专业的 Java 单元测试专家。
+    FIX_SINGLE_METHOD_SYSTEM = (
+        """你是一个专业的 Java 单元测试专家。
 你的任务是修复一个失败的 JUnit5 测试方法。
 
 请分析错误信息，找出问题所在，并返回修复后的完整方法代码。
 
-**Java 8 语法要求**：
-- **必须使用 Java 8 语法**，不能使用更高版本的特性
-- ✗ 禁止使用 `var` 关键字（Java 10+），必须显式声明类型
-- ✗ 禁止使用 switch 表达式（Java 14+），使用传统的 switch 语句
-- ✗ 禁止使用文本块（triple quotes，Java 15+），使用普通字符串拼接
-- ✗ 禁止使用 record 类型（Java 14+）
-- ✗ 禁止使用 pattern matching（Java 16+）
-- ✗ 禁止使用 sealed classes（Java 17+）
-- ✔ 可以使用 Lambda 表达式和 Stream API（Java 8 特性）
-- ✔ 可以使用方法引用（Java 8 特性）
-- ✔ 可以使用 Optional（Java 8 特性）
-
+"""
+        + _TEST_JAVA8_RULES
+        + """
 **常见错误类型**：
 1. **断言失败**（AssertionFailedError）：
    - 检查期望值是否正确（注意整数溢出、边界值等）
@@ -742,9 +774,9 @@ void testAddBoundary() {
 5. **严格遵守 Java 8 语法规范**：所有变量必须显式声明类型（不能使用 var），不能使用 switch 表达式、文本块等 Java 8+ 特性
 
 **重要**：只返回修复后的完整测试方法代码，包含 @Test 注解和方法体。不要返回任何 JSON、说明文字或其他额外内容。"""
+    )
 
-    FIX_SINGLE_METHOD_USER = Template(
-        """请修复以下失败的测试方法：
+    FIX_SINGLE_METHOD_USER = """请修复以下失败的测试方法：
 
 被测类代码：
 ```java
@@ -762,15 +794,16 @@ void testAddBoundary() {
 ```
 
 请分析错误原因，修复这个测试方法。**只返回修复后的完整方法代码（包含 @Test 注解），不要返回任何说明、注释或其他内容**。"""
-    )
 
-    # Agent 调度提示词（使用 Template 支持动态工具描述）
-    AGENT_PLANNER_SYSTEM = Template(
-        """你是 COMET-L 系统的调度器 Agent，负责协调测试生成和变异生成的协同进化过程。
+    # Agent 调度提示词：工具描述在运行时插入到前后两段静态文本之间，
+    # 同一次运行中工具集合不变，拼接出的系统提示词逐字节一致，可命中服务端前缀缓存
+    AGENT_PLANNER_SYSTEM_PREFIX = """你是 COMET-L 系统的调度器 Agent，负责协调测试生成和变异生成的协同进化过程。
 
 你可以使用以下工具及其参数：
 
-{{ tools_description }}
+"""
+
+    AGENT_PLANNER_SYSTEM_SUFFIX = """
 
 **工作流程建议**：
 1. 如果"当前选中的目标"为"无"，应调用 select_target（可选择策略）
@@ -875,19 +908,17 @@ void testAddBoundary() {
     "reasoning": "决策理由（字符串）",
     "should_stop": false  // 可选，如果建议停止设为 true
 }"""
-    )
 
-    AGENT_PLANNER_USER = Template(
-        """当前状态：
+    AGENT_PLANNER_USER = """当前状态：
 
 迭代次数: {{ state.iteration }}
 LLM 调用次数: {{ state.llm_calls }} / {{ state.budget }}
 
 === 全局统计（所有目标的累积）===
-全局变异分数: {{ state.global_mutation_score | round(3) }}
+全局变异分数: {{ state.global_mutation_score_str }}
 全局总变异体: {{ state.global_total_mutants }} (已击杀: {{ state.global_killed_mutants }}, 幸存: {{ state.global_survived_mutants }})
-全局行覆盖率: {{ state.line_coverage | round(3) }}（整个项目）
-全局分支覆盖率: {{ state.branch_coverage | round(3) }}（整个项目）
+全局行覆盖率: {{ state.line_coverage_str }}（整个项目）
+全局分支覆盖率: {{ state.branch_coverage_str }}（整个项目）
 总测试数: {{ state.total_tests }}
 
 {% if state.current_target %}
@@ -898,9 +929,9 @@ LLM 调用次数: {{ state.llm_calls }} / {{ state.budget }}
 - 方法签名: {{ state.current_target.method_signature }}
 {% endif %}
 - 当前目标变异体: {{ state.total_mutants }} (已击杀: {{ state.killed_mutants }}, 幸存: {{ state.survived_mutants }})
-- 当前目标变异分数: {{ state.mutation_score | round(3) }}
+- 当前目标变异分数: {{ state.mutation_score_str }}
 {% if state.current_method_coverage is not none %}
-- 当前方法行覆盖率: {{ (state.current_method_coverage * 100) | round(1) }}%
+- 当前方法行覆盖率: {{ state.current_method_coverage_str }}%
 {% endif %}
 {% else %}
 
@@ -918,19 +949,18 @@ LLM 调用次数: {{ state.llm_calls }} / {{ state.budget }}
 {% if state.recent_improvements %}
 最近改进：
 {% for imp in state.recent_improvements %}
-- 迭代 {{ imp.iteration }}: 变异分数 {{ imp.mutation_score_delta | round(3) }}, 覆盖率 {{ imp.coverage_delta | round(3) }}
+- 迭代 {{ imp.iteration }}: 变异分数 {{ imp.mutation_score_delta_str }}, 覆盖率 {{ imp.coverage_delta_str }}
 {% endfor %}
 {% endif %}
 
 {% if state.available_targets %}
 可用目标：
 {% for target in state.available_targets %}
-- {{ target.class_name }}.{{ target.method_name }}: 覆盖率 {{ target.coverage | round(2) }}, 变异数 {{ target.mutants }}
+- {{ target.class_name }}.{{ target.method_name }}: 覆盖率 {{ target.coverage_str }}, 变异数 {{ target.mutants }}
 {% endfor %}
 {% endif %}
 
 请决定下一步操作。"""
-    )
 
     @classmethod
     def render_extract_contract(
@@ -942,11 +972,15 @@ LLM 调用次数: {{ state.llm_calls }} / {{ state.budget }}
     ) -> tuple[str, str]:
         """渲染契约提取提示词"""
         system = cls.EXTRACT_CONTRACT_SYSTEM
-        user = cls.EXTRACT_CONTRACT_USER.render(
-            class_name=class_name,
-            method_signature=method_signature,
-            source_code=source_code,
-            javadoc=javadoc,
+        # 模板只有简单的变量替换，直接拼接字符串，省去 Jinja 渲染开销
+        javadoc_section = f"\nJavadoc：\n{javadoc}\n" if javadoc else ""
+        user = (
+            f"请分析以下 Java 方法：\n\n"
+            f"类名：{class_name}\n"
+            f"方法签名：{method_signature}\n\n"
+            f"源代码：\n```java\n{source_code}\n```\n\n"
+            f"{javadoc_section}\n\n"
+            f"请提取该方法的契约信息。"
         )
         return system, user
 
@@ -960,11 +994,17 @@ LLM 调用次数: {{ state.llm_calls }} / {{ state.budget }}
     ) -> tuple[str, str]:
         """渲染模式提取提示词"""
         system = cls.EXTRACT_PATTERN_SYSTEM
-        user = cls.EXTRACT_PATTERN_USER.render(
-            bug_description=bug_description,
-            diff_patch=diff_patch,
-            before_code=before_code,
-            after_code=after_code,
+        # 每个可选段落缺省时为空串，段落之间固定以空行分隔
+        sections = [
+            f"\nBug 描述：\n{bug_description}\n" if bug_description else "",
+            f"\n修复补丁（diff）：\n```diff\n{diff_patch}\n```\n" if diff_patch else "",
+            f"\n修复前代码：\n```java\n{before_code}\n```\n" if before_code else "",
+            f"\n修复后代码：\n```java\n{after_code}\n```\n" if after_code else "",
+        ]
+        user = (
+            "请分析以下 Bug 报告：\n\n"
+            + "\n\n".join(sections)
+            + "\n\n请提取该 Bug 反映的缺陷模式。"
         )
         return system, user
 
@@ -978,15 +1018,49 @@ LLM 调用次数: {{ state.llm_calls }} / {{ state.budget }}
         target_method: Optional[str] = None,
     ) -> tuple[str, str]:
         """渲染变异生成提示词"""
-        system = cls.GENERATE_MUTATION_SYSTEM
-        user = cls.GENERATE_MUTATION_USER.render(
-            class_name=class_name,
-            source_code_with_lines=source_code_with_lines,
-            contracts=contracts or [],
-            patterns=patterns or [],
-            target_method=target_method,
-        )
-        return system, user
+        return cls.render_generate_mutation_batch(
+            class_name,
+            source_code_with_lines,
+            [target_method],
+            contracts=contracts,
+            patterns=patterns,
+        )[0]
+
+    @classmethod
+    def render_generate_mutation_batch(
+        cls,
+        class_name: str,
+        source_code_with_lines: str,
+        target_methods: Sequence[Optional[str]],
+        contracts: Optional[List[Any]] = None,
+        patterns: Optional[List[Any]] = None,
+    ) -> List[tuple[str, str]]:
+        """
+        为同一个类的多个目标方法批量渲染变异生成提示词
+
+        类源码、契约视图和缺陷模式只准备一次，逐个方法只替换 target_method。
+
+        Args:
+            class_name: 类名
+            source_code_with_lines: 带行号的类源码
+            target_methods: 目标方法列表，None 表示不限定方法
+            contracts: 契约列表
+            patterns: 缺陷模式列表
+
+        Returns:
+            与 target_methods 一一对应的 (system_prompt, user_prompt) 列表
+        """
+        template = _ENV.get_template("generate_mutation_user")
+        shared = {
+            "class_name": class_name,
+            "source_code_with_lines": source_code_with_lines,
+            "contracts": [_contract_view(contract) for contract in contracts or _EMPTY],
+            "patterns": patterns or _EMPTY,
+        }
+        return [
+            (cls.GENERATE_MUTATION_SYSTEM, template.render(shared, target_method=target_method))
+            for target_method in target_methods
+        ]
 
     @classmethod
     def render_refine_mutation(
@@ -1002,14 +1076,14 @@ LLM 调用次数: {{ state.llm_calls }} / {{ state.budget }}
     ) -> tuple[str, str]:
         """渲染变异完善提示词"""
         system = cls.REFINE_MUTATION_SYSTEM
-        user = cls.REFINE_MUTATION_USER.render(
+        user = _ENV.get_template("refine_mutation_user").render(
             class_name=class_name,
             source_code_with_lines=source_code_with_lines,
             existing_mutants=existing_mutants,
             test_cases=test_cases,
             kill_rate=kill_rate,
-            contracts=contracts or [],
-            patterns=patterns or [],
+            contracts=[_contract_view(contract) for contract in contracts or _EMPTY],
+            patterns=patterns or _EMPTY,
             target_method=target_method,
         )
         return system, user
@@ -1028,15 +1102,21 @@ LLM 调用次数: {{ state.llm_calls }} / {{ state.budget }}
         """渲染测试生成提示词"""
         system = cls.GENERATE_TEST_SYSTEM
         # 添加行号以便LLM准确定位未覆盖的代码行
-        class_code_with_lines = add_line_numbers(class_code)
-        user = cls.GENERATE_TEST_USER.render(
+        signature_head = method_signature.split("(")[0].split()
+        method_name = signature_head[-1] if signature_head else None
+        class_code_with_lines = _number_class_code(
+            class_code, class_name, method_name, cls.MAX_CLASS_CODE_CHARS
+        )
+        gaps = coverage_gaps or _EMPTY_MAPPING
+        user = _ENV.get_template("generate_test_user").render(
             class_name=class_name,
             method_signature=method_signature,
             class_code_with_lines=class_code_with_lines,
-            contracts=contracts,
-            survived_mutants=survived_mutants or [],
-            coverage_gaps=coverage_gaps or {},
-            existing_tests=existing_tests or [],
+            contracts=_contract_view(contracts) if contracts else None,
+            survived_mutants=survived_mutants or _EMPTY,
+            coverage_gaps=gaps,
+            uncovered_lines_str=_join_items(gaps.get("uncovered_lines")),
+            existing_tests=existing_tests or _EMPTY,
         )
         return system, user
 
@@ -1053,13 +1133,18 @@ LLM 调用次数: {{ state.llm_calls }} / {{ state.budget }}
         """渲染测试完善提示词"""
         system = cls.REFINE_TEST_SYSTEM
         # 添加行号以便LLM准确定位未覆盖的代码行
-        class_code_with_lines = add_line_numbers(class_code)
-        user = cls.REFINE_TEST_USER.render(
+        class_code_with_lines = _number_class_code(
+            class_code, test_case.target_class, target_method, cls.MAX_CLASS_CODE_CHARS
+        )
+        gaps = coverage_gaps or _EMPTY_MAPPING
+        user = _ENV.get_template("refine_test_user").render(
             test_case=test_case,
             class_code_with_lines=class_code_with_lines,
             target_method=target_method,
-            survived_mutants=survived_mutants or [],
-            coverage_gaps=coverage_gaps or {},
+            survived_mutants=survived_mutants or _EMPTY,
+            coverage_gaps=gaps,
+            uncovered_lines_str=_join_items(gaps.get("uncovered_lines")),
+            uncovered_branches_str=_join_items(gaps.get("uncovered_branches")),
             evaluation_feedback=evaluation_feedback,
         )
         return system, user
@@ -1073,7 +1158,7 @@ LLM 调用次数: {{ state.llm_calls }} / {{ state.budget }}
     ) -> tuple[str, str]:
         """渲染测试修复提示词"""
         system = cls.FIX_TEST_SYSTEM
-        user = cls.FIX_TEST_USER.render(
+        user = _ENV.get_template("fix_test_user").render(
             test_code=test_code,
             compile_error=compile_error,
             class_code=class_code,
@@ -1089,7 +1174,7 @@ LLM 调用次数: {{ state.llm_calls }} / {{ state.budget }}
     ) -> tuple[str, str]:
         """渲染单个测试方法修复提示词"""
         system = cls.FIX_SINGLE_METHOD_SYSTEM
-        user = cls.FIX_SINGLE_METHOD_USER.render(
+        user = _ENV.get_template("fix_single_method_user").render(
             method_code=method_code,
             class_code=class_code,
             error_message=error_message,
@@ -1108,6 +1193,43 @@ LLM 调用次数: {{ state.llm_calls }} / {{ state.budget }}
         Returns:
             (system_prompt, user_prompt) 元组
         """
-        system = cls.AGENT_PLANNER_SYSTEM.render(tools_description=tools_description)
-        user = cls.AGENT_PLANNER_USER.render(state=state)
+        system = _agent_planner_system(tools_description)
+        user = _ENV.get_template("agent_planner_user").render(state=_planner_state_view(state))
         return system, user
+
+
+# 所有提示词模板共享一个 Environment：每个模板在首次渲染时才解析编译，之后按名称直接复用
+# 编译结果（cache_size=-1 不淘汰，auto_reload=False 不检查源码变化）。只导入不渲染的场景
+# （如 Web 服务、统计脚本）不承担编译开销，一次运行中用不到的模板也不会被编译。
+# 提示词是发给 LLM 的纯文本而非 HTML，显式关闭自动转义；保持默认的空白处理，避免改变渲染结果
+_ENV = Environment(
+    loader=DictLoader(
+        {
+            "generate_mutation_user": PromptManager.GENERATE_MUTATION_USER,
+            "refine_mutation_user": PromptManager.REFINE_MUTATION_USER,
+            "generate_test_user": PromptManager.GENERATE_TEST_USER,
+            "refine_test_user": PromptManager.REFINE_TEST_USER,
+            "fix_test_user": PromptManager.FIX_TEST_USER,
+            "fix_single_method_user": PromptManager.FIX_SINGLE_METHOD_USER,
+            "agent_planner_user": PromptManager.AGENT_PLANNER_USER,
+        }
+    ),
+    autoescape=False,
+    optimized=True,
+    auto_reload=False,
+    cache_size=-1,
+)
+
+
+@lru_cache(maxsize=4)
+def _agent_planner_system(tools_description: str) -> str:
+    """
+    拼接 Agent 调度系统提示词
+
+    工具描述在一次运行中基本不变，缓存后每轮迭代直接复用同一个字符串对象。
+    """
+    return (
+        PromptManager.AGENT_PLANNER_SYSTEM_PREFIX
+        + tools_description
+        + PromptManager.AGENT_PLANNER_SYSTEM_SUFFIX
+    )
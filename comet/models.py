@@ -1,9 +1,9 @@
 """核心数据模型定义"""
 
 from datetime import datetime
-from typing import ClassVar, Dict, List, Optional
+from typing import ClassVar, Dict, List, Literal, Optional, Set
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, computed_field
 
 
 class Contract(BaseModel):
@@ -21,6 +21,8 @@ class Contract(BaseModel):
     confidence: float = Field(default=1.0, ge=0.0, le=1.0, description="置信度")
     created_at: datetime = Field(default_factory=datetime.now, description="创建时间")
 
+    model_config = ConfigDict(defer_build=True)
+
 
 class Pattern(BaseModel):
     """缺陷模式模型 - 描述常见的代码缺陷模式"""
@@ -38,6 +40,8 @@ class Pattern(BaseModel):
     created_at: datetime = Field(default_factory=datetime.now, description="创建时间")
     updated_at: datetime = Field(default_factory=datetime.now, description="更新时间")
 
+    model_config = ConfigDict(defer_build=True)
+
 
 class MutationPatch(BaseModel):
     """变异补丁 - 描述如何修改代码"""
@@ -61,9 +65,9 @@ class Mutant(BaseModel):
     method_name: Optional[str] = Field(default=None, description="方法名")
     method_signature: Optional[str] = Field(default=None, description="方法签名")
     patch: MutationPatch = Field(description="变异补丁")
-    status: str = Field(
+    status: Literal["pending", "valid", "invalid", "killed", "survived", "outdated"] = Field(
         default="pending",
-        description="状态（pending、valid、invalid、killed、survived）",
+        description="状态（pending、valid、invalid、killed、survived、outdated）",
     )
     killed_by: List[str] = Field(default_factory=list, description="被哪些测试击杀")
     survived: bool = Field(default=False, description="是否幸存")
@@ -71,6 +75,8 @@ class Mutant(BaseModel):
     created_at: datetime = Field(default_factory=datetime.now, description="创建时间")
     evaluated_at: Optional[datetime] = Field(default=None, description="评估时间")
 
+    model_config = ConfigDict(defer_build=True)
+
 
 class TestMethod(BaseModel):
     """测试方法 - 单个测试方法的信息"""
@@ -105,6 +111,8 @@ class TestCase(BaseModel):
     created_at: datetime = Field(default_factory=datetime.now, description="创建时间")
     updated_at: datetime = Field(default_factory=datetime.now, description="更新时间")
 
+    model_config = ConfigDict(defer_build=True)
+
 
 class CoverageInfo(BaseModel):
     """覆盖率信息"""
@@ -118,6 +126,8 @@ class CoverageInfo(BaseModel):
     line_coverage: float = Field(default=0.0, ge=0.0, le=1.0, description="行覆盖率")
     branch_coverage: float = Field(default=0.0, ge=0.0, le=1.0, description="分支覆盖率")
 
+    model_config = ConfigDict(frozen=True)
+
 
 class EvaluationResult(BaseModel):
     """评估结果 - 单次测试执行的结果"""
@@ -130,32 +140,32 @@ class EvaluationResult(BaseModel):
     coverage: Optional[CoverageInfo] = Field(default=None, description="覆盖率信息")
     timestamp: datetime = Field(default_factory=datetime.now, description="时间戳")
 
+    model_config = ConfigDict(defer_build=True)
+
 
 class KillMatrix(BaseModel):
     """击杀矩阵 K(T,M) - 记录哪些测试击杀了哪些变异体"""
 
-    matrix: Dict[str, List[str]] = Field(
-        default_factory=dict, description="键为变异体 ID，值为击杀它的测试 ID 列表"
+    matrix: Dict[str, Set[str]] = Field(
+        default_factory=dict, description="键为变异体 ID，值为击杀它的测试 ID 集合"
     )
 
     def add_kill(self, mutant_id: str, test_id: str) -> None:
         """记录击杀"""
-        if mutant_id not in self.matrix:
-            self.matrix[mutant_id] = []
-        if test_id not in self.matrix[mutant_id]:
-            self.matrix[mutant_id].append(test_id)
+        self.matrix.setdefault(mutant_id, set()).add(test_id)
 
     def is_killed(self, mutant_id: str) -> bool:
         """检查变异体是否被击杀"""
-        return mutant_id in self.matrix and len(self.matrix[mutant_id]) > 0
+        return bool(self.matrix.get(mutant_id))
 
     def get_killers(self, mutant_id: str) -> List[str]:
-        """获取击杀特定变异体的测试列表"""
-        return self.matrix.get(mutant_id, [])
+        """获取击杀特定变异体的测试列表（按测试 ID 排序，保证结果稳定）"""
+        return sorted(self.matrix.get(mutant_id, ()))
 
     def get_survived_mutants(self, all_mutant_ids: List[str]) -> List[str]:
         """获取幸存的变异体列表"""
-        return [mid for mid in all_mutant_ids if not self.is_killed(mid)]
+        killed = {mid for mid, killers in self.matrix.items() if killers}
+        return [mid for mid in all_mutant_ids if mid not in killed]
 
 
 class Metrics(BaseModel):
@@ -166,15 +176,17 @@ class Metrics(BaseModel):
     killed_mutants: int = Field(default=0, ge=0, description="被击杀的变异体数")
     survived_mutants: int = Field(default=0, ge=0, description="幸存的变异体数")
     total_tests: int = Field(default=0, ge=0, description="总测试数")
-    mutation_score: float = Field(default=0.0, ge=0.0, le=1.0, description="变异分数")
     line_coverage: float = Field(default=0.0, ge=0.0, le=1.0, description="行覆盖率")
     branch_coverage: float = Field(default=0.0, ge=0.0, le=1.0, description="分支覆盖率")
     llm_calls: int = Field(default=0, ge=0, description="LLM 调用次数")
     timestamp: datetime = Field(default_factory=datetime.now, description="时间戳")
 
-    def calculate_mutation_score(self) -> None:
-        """计算变异分数"""
+    model_config = ConfigDict(defer_build=True)
+
+    @computed_field
+    @property
+    def mutation_score(self) -> float:
+        """变异分数，由击杀数和总变异体数实时推导"""
         if self.total_mutants > 0:
-            self.mutation_score = self.killed_mutants / self.total_mutants
-        else:
-            self.mutation_score = 0.0
+            return self.killed_mutants / self.total_mutants
+        return 0.0
@@ -260,10 +260,12 @@ class ParallelPreprocessor:
             analysis_result = self.java_executor.analyze_deep(file_path)
 
             if analysis_result:
-                # 索引分析结果
-                for cls in analysis_result.get("classes", []):
-                    if cls.get("name") == class_name or not class_name:
-                        self.knowledge_base.index_source_analysis(cls.get("name", class_name), cls)
+                # 索引分析结果（所有匹配的类一次批量写入）
+                self.knowledge_base.index_source_analyses(
+                    (cls.get("name", class_name), cls)
+                    for cls in analysis_result.get("classes", [])
+                    if cls.get("name") == class_name or not class_name
+                )
                 logger.debug(f"索引源码分析: {class_name}")
         except Exception as e:
             logger.warning(f"源码分析失败 {class_name}: {e}")
@@ -8,6 +8,8 @@ from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+from pydantic import ConfigDict, TypeAdapter
+
 from ..executor.coverage_parser import MethodCoverage
 from ..models import EvaluationResult, Mutant, TestCase, TestMethod
 from ..utils.code_utils import build_test_class
@@ -15,6 +17,9 @@ from ..utils.method_keys import build_method_key, canonicalize_coverage_method_s
 
 logger = logging.getLogger(__name__)
 
+# 测试方法列表整体序列化为 JSON，一次调用处理全部元素
+_TEST_METHOD_LIST_ADAPTER = TypeAdapter(List[TestMethod], config=ConfigDict(defer_build=True))
+
 
 class Database:
     """数据库管理类 - 使用 SQLite 存储测试用例、变异体和执行结果
@@ -516,7 +521,7 @@ class Database:
                     test_case.target_class,
                     test_case.package_name,
                     json.dumps(test_case.imports),
-                    json.dumps([m.model_dump(mode="json") for m in test_case.methods]),
+                    _TEST_METHOD_LIST_ADAPTER.dump_json(test_case.methods).decode(),
                     test_case.full_code,
                     1 if test_case.compile_success else 0,
                     test_case.compile_error,
@@ -883,10 +888,14 @@ class Database:
             self.conn.commit()
 
     def _row_to_mutant(self, row: sqlite3.Row) -> Mutant:
-        """将数据库行转换为 Mutant 对象"""
+        """将数据库行转换为 Mutant 对象
+
+        行数据由 save_mutant 从已校验的 Mutant 写入，各字段在此已转换为最终类型，
+        因此跳过整体校验直接构造；补丁 JSON 仍通过 MutationPatch 校验解析。
+        """
         from ..models import MutationPatch
 
-        return Mutant(
+        return Mutant.model_construct(
             id=row["id"],
             class_name=row["class_name"],
             method_name=row["method_name"],
@@ -6,7 +6,7 @@ import sqlite3
 import threading
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional
 
 from ..models import Contract, Pattern
 
@@ -162,6 +162,32 @@ class KnowledgeStore:
             cursor.execute("SELECT * FROM contracts")
             return [self._row_to_contract(row) for row in cursor.fetchall()]
 
+    def iter_contracts(self, batch_size: int = 256) -> Iterator[List[Contract]]:
+        """
+        分批遍历所有契约
+
+        按主键做键集分页，每批只持有 batch_size 个对象，批次之间不占用锁。
+
+        Args:
+            batch_size: 每批数量
+
+        Yields:
+            契约列表
+        """
+        last_id = ""
+        while True:
+            with self._lock:
+                cursor = self.conn.cursor()
+                cursor.execute(
+                    "SELECT * FROM contracts WHERE id > ? ORDER BY id LIMIT ?",
+                    (last_id, batch_size),
+                )
+                batch = [self._row_to_contract(row) for row in cursor.fetchall()]
+            if not batch:
+                return
+            yield batch
+            last_id = batch[-1].id
+
     def save_pattern(self, pattern: Pattern) -> None:
         """保存模式"""
         with self._lock:
@@ -197,6 +223,17 @@ class KnowledgeStore:
                 return None
             return self._row_to_pattern(row)
 
+    def get_patterns_by_ids(self, pattern_ids: List[str]) -> Dict[str, Pattern]:
+        """批量获取模式，返回以 ID 为键的字典"""
+        if not pattern_ids:
+            return {}
+        placeholders = ", ".join("?" for _ in pattern_ids)
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.execute(f"SELECT * FROM patterns WHERE id IN ({placeholders})", pattern_ids)
+            patterns = [self._row_to_pattern(row) for row in cursor.fetchall()]
+        return {pattern.id: pattern for pattern in patterns}
+
     def get_patterns_by_category(self, category: str) -> List[Pattern]:
         """获取特定类别的模式"""
         with self._lock:
@@ -211,6 +248,45 @@ class KnowledgeStore:
             cursor.execute("SELECT * FROM patterns ORDER BY success_rate DESC, usage_count DESC")
             return [self._row_to_pattern(row) for row in cursor.fetchall()]
 
+    def get_top_patterns(self, n: int, min_confidence: float) -> List[Pattern]:
+        """获取置信度达标的前 n 个模式（按成功率和使用次数排序）"""
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.execute(
+                """
+                SELECT * FROM patterns
+                WHERE confidence >= ?
+                ORDER BY success_rate DESC, usage_count DESC
+                LIMIT ?
+            """,
+                (min_confidence, n),
+            )
+            return [self._row_to_pattern(row) for row in cursor.fetchall()]
+
+    def iter_patterns(self, batch_size: int = 256) -> Iterator[List[Pattern]]:
+        """
+        分批遍历所有模式
+
+        Args:
+            batch_size: 每批数量
+
+        Yields:
+            模式列表
+        """
+        last_id = ""
+        while True:
+            with self._lock:
+                cursor = self.conn.cursor()
+                cursor.execute(
+                    "SELECT * FROM patterns WHERE id > ? ORDER BY id LIMIT ?",
+                    (last_id, batch_size),
+                )
+                batch = [self._row_to_pattern(row) for row in cursor.fetchall()]
+            if not batch:
+                return
+            yield batch
+            last_id = batch[-1].id
+
     def update_pattern_stats(self, pattern_id: str, success: bool) -> None:
         """更新模式统计信息"""
         with self._lock:
@@ -3,6 +3,7 @@
 from .class_mapper import ClassInfo, ClassMapper
 from .code_utils import (
     add_line_numbers,
+    add_line_numbers_around_methods,
     build_test_class,
     extract_class_from_file,
     extract_imports,
@@ -28,6 +29,7 @@ __all__ = [
     "extract_imports",
     "parse_java_class",
     "add_line_numbers",
+    "add_line_numbers_around_methods",
     "extract_class_from_file",
     "build_test_class",
     "code_hash",
@@ -5,7 +5,9 @@
 
 import logging
 import re
-from typing import Any, List, Optional, Protocol, Set, TypedDict, cast
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Any, List, Optional, Protocol, Sequence, Set, TypedDict, cast
 
 from javalang.parse import parse as parse_java
 from javalang.tree import MethodDeclaration
@@ -71,10 +73,13 @@ def parse_java_class(java_code: str) -> JavaClassInfo:
     return result
 
 
+@lru_cache(maxsize=64)
 def add_line_numbers(code: str, start: int = 1) -> str:
     """
     为代码添加行号
 
+    同一个类的源码会在多轮测试/变异生成中反复加行号，结果按参数缓存。
+
     Args:
         code: 源代码
         start: 起始行号
@@ -87,6 +92,75 @@ def add_line_numbers(code: str, start: int = 1) -> str:
     return "\n".join(numbered_lines)
 
 
+_NON_DECLARATION_PREFIXES = ("return", "new", "else", "throw", "yield", "case")
+_FIELD_DECLARATION_PATTERN = re.compile(r"^\s*(?:private|protected|public|static)\b.*;\s*$")
+
+
+def add_line_numbers_around_methods(
+    code: str, method_names: Sequence[str], context_lines: int = 20
+) -> Optional[str]:
+    """
+    只为指定方法附近的代码加行号，其余部分以省略标记代替
+
+    保留类体之前的内容（package、import、类声明）、字段声明、每个匹配方法（含构造方法）
+    前后 context_lines 行以及最后一行，行号与原始代码一致。
+
+    Args:
+        code: 源代码
+        method_names: 需要保留的方法名（构造方法传类名）
+        context_lines: 每个方法前后额外保留的行数
+
+    Returns:
+        带行号的代码片段；一个方法声明都找不到时返回 None
+    """
+    lines = code.split("\n")
+    line_starts = [0]
+    for line in lines[:-1]:
+        line_starts.append(line_starts[-1] + len(line) + 1)
+
+    keep: Set[int] = {len(lines) - 1}
+    body_start = _find_type_body_start(code)
+    header_end = bisect_right(line_starts, body_start) - 1 if body_start is not None else -1
+    keep.update(range(header_end + 1))
+    keep.update(index for index, line in enumerate(lines) if _FIELD_DECLARATION_PATTERN.match(line))
+
+    found = False
+    for name in method_names:
+        declaration = re.compile(rf"(?m)^[ \t]*((?:[\w<>\[\],.?@]+[ \t]+)+){re.escape(name)}\s*\(")
+        for match in declaration.finditer(code):
+            if match.group(1).split()[0] in _NON_DECLARATION_PREFIXES:
+                continue
+            brace_start = code.find("{", match.end())
+            if brace_start == -1 or ";" in code[match.end() : brace_start]:
+                continue
+            end = _find_matching_block_end(code, brace_start)
+            if end is None:
+                continue
+            found = True
+            first = bisect_right(line_starts, match.start()) - 1
+            last = bisect_right(line_starts, end - 1) - 1
+            keep.update(
+                range(max(first - context_lines, 0), min(last + context_lines, len(lines) - 1) + 1)
+            )
+
+    if not found:
+        return None
+
+    numbered_lines: List[str] = []
+    omitted_from: Optional[int] = None
+    for index, line in enumerate(lines):
+        if index not in keep:
+            if omitted_from is None:
+                omitted_from = index
+            continue
+        if omitted_from is not None:
+            omitted = f"{omitted_from + 1}-{index}" if index > omitted_from + 1 else str(index)
+            numbered_lines.append(f"     ... （省略第 {omitted} 行）")
+            omitted_from = None
+        numbered_lines.append(f"{index + 1:4d} | {line}")
+    return "\n".join(numbered_lines)
+
+
 def extract_class_from_file(file_path: str) -> str:
     """
     从文件中提取 Java 类代码
@@ -442,6 +442,9 @@ def initialize_system(
         reasoning_effort=config.llm.reasoning_effort,
         reasoning_enabled=config.llm.reasoning_enabled,
         verbosity=config.llm.verbosity,
+        cache_dir=(
+            str(config.resolve_llm_cache_path()) if config.llm.persist_response_cache else None
+        ),
     )
     logger.info(f"LLM 客户端初始化: {config.llm.model} (timeout={config.llm.timeout}s)")
 
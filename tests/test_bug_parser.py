@@ -0,0 +1,46 @@
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+from unittest.mock import patch
+
+from comet.knowledge.bug_parser import BugReportParser, load_bug_reports
+
+
+class BugReportParserDirectoryTests(TestCase):
+    def test_parse_directory_walks_nested_tree_once(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            (root / "nested" / "deeper").mkdir(parents=True)
+            (root / "top.md").write_text("# Top bug\n\ndetails", encoding="utf-8")
+            (root / "nested" / "fix.PATCH").write_text("--- a\n+++ b", encoding="utf-8")
+            (root / "nested" / "deeper" / "note.txt").write_text("plain", encoding="utf-8")
+            (root / "nested" / "ignored.bin").write_bytes(b"\x00")
+
+            parser = BugReportParser()
+            paths = sorted(Path(path).name for path in parser.iter_paths(root))
+            reports = parser.parse_directory(temp_dir)
+
+        self.assertEqual(paths, ["fix.PATCH", "note.txt", "top.md"])
+        self.assertEqual(sorted(report.title for report in reports), ["Fix", "Note", "Top bug"])
+
+
+class BugReportCacheTests(TestCase):
+    def test_unchanged_file_is_served_from_cache(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            report_path = root / "reports" / "npe.md"
+            report_path.parent.mkdir()
+            report_path.write_text("# NPE in add\n\nstack", encoding="utf-8")
+            cache_dir = str(root / "cache")
+
+            first = load_bug_reports(str(report_path.parent), cache_dir=cache_dir)
+            with patch.object(
+                BugReportParser, "_extract_title", side_effect=AssertionError("reparsed")
+            ):
+                second = load_bug_reports(str(report_path.parent), cache_dir=cache_dir)
+
+            report_path.write_text("# NPE in subtract\n\nstack trace", encoding="utf-8")
+            third = load_bug_reports(str(report_path.parent), cache_dir=cache_dir)
+
+        self.assertEqual(first, second)
+        self.assertEqual([report.title for report in third], ["NPE in subtract"])
@@ -0,0 +1,40 @@
+import tempfile
+import unittest
+from datetime import datetime
+from pathlib import Path
+
+from comet.models import Mutant, MutationPatch
+from comet.store.database import Database
+
+
+class DatabaseMutantRoundTripTests(unittest.TestCase):
+    def test_loaded_mutant_matches_saved_mutant(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            database = Database(str(Path(temp_dir) / "comet.db"))
+            mutant = Mutant(
+                id="m1",
+                class_name="Calculator",
+                method_name="add",
+                method_signature="int add(int, int)",
+                patch=MutationPatch(
+                    file_path="src/main/java/Calculator.java",
+                    line_start=3,
+                    line_end=3,
+                    original_code="return a + b;",
+                    mutated_code="return a - b;",
+                ),
+                status="killed",
+                killed_by=["CalculatorTest.testAdd"],
+                evaluated_at=datetime(2026, 1, 1, 12, 0, 0),
+            )
+
+            database.save_mutant(mutant)
+            loaded = database.get_all_mutants()
+            database.close()
+
+        self.assertEqual(loaded, [mutant])
+        self.assertIs(type(loaded[0].survived), bool)
+
+
+if __name__ == "__main__":
+    unittest.main()
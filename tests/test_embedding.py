@@ -0,0 +1,113 @@
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, cast
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+import numpy as np
+from pydantic import ValidationError
+
+from comet.config.settings import EmbeddingConfig
+from comet.knowledge.embedding import EmbeddingService, ONNXEmbeddingService
+
+
+class ONNXEmbeddingServiceTests(TestCase):
+    def _build_service(self, cache_dir: str | None = None) -> tuple[ONNXEmbeddingService, Mock]:
+        service = ONNXEmbeddingService(model_path="/models/minilm-int8", cache_dir=cache_dir)
+        tokenizer = Mock()
+        tokenizer.encode_batch.side_effect = lambda texts: [
+            SimpleNamespace(ids=[1, 2, 0], attention_mask=[1, 1, 0], type_ids=[0, 0, 0])
+            for _ in texts
+        ]
+        session = Mock()
+        session.get_inputs.return_value = [
+            SimpleNamespace(name="input_ids"),
+            SimpleNamespace(name="attention_mask"),
+        ]
+        # 第三个 token 是填充位，池化时必须被掩码忽略
+        session.run.side_effect = lambda _, feeds: [
+            np.array([[[3.0, 0.0], [3.0, 8.0], [100.0, 100.0]]] * len(feeds["input_ids"]))
+        ]
+        service._session = session
+        service._tokenizer = tokenizer
+        return service, session
+
+    def test_embed_batch_mean_pools_masked_tokens_and_normalizes(self) -> None:
+        service, _ = self._build_service()
+
+        embeddings = service.embed_batch(["alpha", "beta"])
+
+        self.assertEqual(len(embeddings), 2)
+        self.assertAlmostEqual(embeddings[0][0], 0.6)
+        self.assertAlmostEqual(embeddings[0][1], 0.8)
+
+    def test_embed_reuses_cache_for_repeated_text(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            service, session = self._build_service(cache_dir=temp_dir)
+
+            first = service.embed("alpha")
+            second = service.embed("alpha")
+
+        self.assertEqual(first, second)
+        session.run.assert_called_once()
+
+    def test_from_config_selects_onnx_backend_without_api_key(self) -> None:
+        service = EmbeddingService.from_config(
+            EmbeddingConfig(backend="onnx_int8", model_path="/models/minilm-int8")
+        )
+
+        self.assertIsInstance(service, ONNXEmbeddingService)
+        self.assertEqual(service.model, f"onnx_int8:{Path('/models/minilm-int8').resolve()}")
+        self.assertIsNone(service.dimensions)
+
+    def test_cache_key_distinguishes_model_directories_with_same_name(self) -> None:
+        first = ONNXEmbeddingService(model_path="/models/a/minilm")
+        second = ONNXEmbeddingService(model_path="/models/b/minilm")
+
+        self.assertNotEqual(first._get_cache_key("alpha"), second._get_cache_key("alpha"))
+
+    def test_missing_onnx_dependencies_name_optional_extra(self) -> None:
+        service = ONNXEmbeddingService(model_path="/models/minilm-int8")
+
+        with patch.dict("sys.modules", {"onnxruntime": None}):
+            with self.assertRaisesRegex(ImportError, r"comet-l\[onnx\]"):
+                service.embed_batch(["alpha"])
+
+    def test_from_config_requires_model_path_for_onnx_backend(self) -> None:
+        with self.assertRaises(ValueError):
+            EmbeddingService.from_config(EmbeddingConfig(backend="onnx_int8"))
+
+    def test_config_rejects_unknown_backend(self) -> None:
+        with self.assertRaises(ValidationError):
+            _ = EmbeddingConfig.model_validate({"backend": "onnx"})
+
+
+class EmbeddingServiceDimensionsTests(TestCase):
+    def _build_service(self, dimensions: int | None) -> tuple[EmbeddingService, Mock]:
+        service = EmbeddingService(api_key="test-key", dimensions=dimensions)
+        create = Mock(
+            side_effect=lambda **kwargs: SimpleNamespace(
+                data=[SimpleNamespace(embedding=[0.6, 0.8]) for _ in kwargs["input"]]
+            )
+        )
+        service.client = cast(Any, SimpleNamespace(embeddings=SimpleNamespace(create=create)))
+        return service, create
+
+    def test_dimensions_are_requested_from_api(self) -> None:
+        service, create = self._build_service(dimensions=512)
+
+        service.embed_batch(["alpha"])
+
+        self.assertEqual(create.call_args.kwargs["dimensions"], 512)
+
+    def test_dimensions_are_part_of_cache_key(self) -> None:
+        truncated, _ = self._build_service(dimensions=512)
+        full, _ = self._build_service(dimensions=None)
+
+        self.assertNotEqual(truncated._get_cache_key("alpha"), full._get_cache_key("alpha"))
+
+    def test_from_config_passes_dimensions(self) -> None:
+        service = EmbeddingService.from_config(EmbeddingConfig(api_key="key", dimensions=256))
+
+        self.assertEqual(service.dimensions, 256)
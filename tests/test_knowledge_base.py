@@ -1,12 +1,22 @@
+import json
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import SimpleNamespace
 from typing import Any, cast
 from unittest import TestCase
 from unittest.mock import Mock, patch
 
 from comet.config.settings import EmbeddingConfig, KnowledgeConfig, RetrievalConfig
-from comet.knowledge.knowledge_base import RAGKnowledgeBase
+from comet.knowledge.knowledge_base import (
+    BugReportSharedAsset,
+    KnowledgeBase,
+    RAGKnowledgeBase,
+)
 from comet.knowledge.retriever import KnowledgeRetriever
-from comet.knowledge.vector_store import KnowledgeType, VectorStore
-from comet.models import Contract
+from comet.knowledge.vector_store import Document, KnowledgeType, SearchResult, VectorStore
+from comet.models import Contract, Pattern
 from comet.store.knowledge_store import KnowledgeStore
 
 
@@ -120,6 +130,124 @@ class RAGKnowledgeBaseIndexSourceAnalysisTests(TestCase):
 
         self.assertEqual([contract.id for contract in contracts], ["contract-double-add"])
 
+    def test_method_contract_lookup_reuses_class_cache(self) -> None:
+        store = Mock()
+        store.get_contracts_by_class.return_value = [
+            Contract(
+                id="contract-add",
+                class_name="Calculator",
+                method_name="add",
+                method_signature="int add(int a, int b)",
+                description="",
+                source="test",
+            )
+        ]
+        knowledge_base = KnowledgeBase(store)
+
+        add_contracts = knowledge_base.get_contracts_for_method("Calculator", "add")
+        subtract_contracts = knowledge_base.get_contracts_for_method("Calculator", "subtract")
+
+        self.assertEqual([contract.id for contract in add_contracts], ["contract-add"])
+        self.assertEqual(subtract_contracts, [])
+        store.get_contracts_by_class.assert_called_once_with("Calculator")
+        store.get_contracts_by_method.assert_not_called()
+
+    def test_concurrent_class_lookups_load_contracts_once(self) -> None:
+        store = Mock()
+
+        def slow_load(class_name: str) -> list[Contract]:
+            time.sleep(0.05)
+            return []
+
+        store.get_contracts_by_class.side_effect = slow_load
+        knowledge_base = KnowledgeBase(store)
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            entries = list(pool.map(knowledge_base._get_class_contracts, ["Calculator"] * 4))
+
+        store.get_contracts_by_class.assert_called_once_with("Calculator")
+        self.assertTrue(all(entry is entries[0] for entry in entries))
+
+    def test_sync_to_vector_store_streams_store_in_fixed_size_batches(self) -> None:
+        store = KnowledgeStore(":memory:")
+        knowledge_base = StubRAGKnowledgeBase(store=store, config=None, llm_api_key=None)
+        knowledge_base.SYNC_BATCH_SIZE = 2
+        for index in range(5):
+            store.save_contract(
+                Contract(
+                    id=f"contract-{index}",
+                    class_name="Calculator",
+                    method_name=f"op{index}",
+                    method_signature=f"int op{index}()",
+                    description="",
+                    source="test",
+                )
+            )
+        knowledge_base.set_vector_store_for_test(Mock())
+
+        knowledge_base.sync_to_vector_store()
+
+        add_calls = knowledge_base.vector_store_mock.add.call_args_list
+        self.assertEqual([len(call.args[1]) for call in add_calls], [2, 2, 1])
+        self.assertEqual(
+            [document.id for call in add_calls for document in call.args[1]],
+            [f"contract-{index}" for index in range(5)],
+        )
+
+    def test_index_source_analyses_writes_all_classes_in_one_batch(self) -> None:
+        knowledge_base = self._build_knowledge_base()
+        method = {"name": "run", "signature": "void run()", "returnType": "void"}
+
+        knowledge_base.index_source_analyses(
+            [("Alpha", {"methods": [method]}), ("Beta", {"methods": [method]})]
+        )
+
+        knowledge_base.vector_store_mock.add.assert_called_once()
+        _, documents = knowledge_base.vector_store_mock.add.call_args.args
+        self.assertEqual({document.id.split("_")[1] for document in documents}, {"Alpha", "Beta"})
+
+    def test_index_bug_reports_streams_reports_in_batches(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            reports_dir = Path(temp_dir) / "reports"
+            reports_dir.mkdir()
+            for index in range(5):
+                (reports_dir / f"bug{index}.md").write_text(f"# Bug {index}\n", encoding="utf-8")
+            knowledge_base = StubRAGKnowledgeBase(
+                store=Mock(),
+                config=None,
+                llm_api_key=None,
+                vector_store_directory=str(Path(temp_dir) / "chromadb"),
+            )
+            knowledge_base.set_vector_store_for_test(Mock())
+            knowledge_base.BUG_REPORT_BATCH_SIZE = 2
+
+            count = knowledge_base.index_bug_reports(str(reports_dir))
+
+        add_calls = knowledge_base.vector_store_mock.add.call_args_list
+        self.assertEqual(count, 5)
+        self.assertEqual([len(call.args[1]) for call in add_calls], [2, 2, 1])
+        self.assertTrue(all(call.args[0] == KnowledgeType.BUG_REPORTS for call in add_calls))
+
+    def test_index_bug_reports_stops_reader_when_indexing_fails(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            reports_dir = Path(temp_dir) / "reports"
+            reports_dir.mkdir()
+            for index in range(20):
+                (reports_dir / f"bug{index}.md").write_text(f"# Bug {index}\n", encoding="utf-8")
+            knowledge_base = StubRAGKnowledgeBase(
+                store=Mock(),
+                config=None,
+                llm_api_key=None,
+                vector_store_directory=str(Path(temp_dir) / "chromadb"),
+            )
+            vector_store = Mock()
+            vector_store.add.side_effect = RuntimeError("embedding down")
+            knowledge_base.set_vector_store_for_test(vector_store)
+            knowledge_base.BUG_REPORT_BATCH_SIZE = 1
+
+            with self.assertRaises(RuntimeError):
+                knowledge_base.index_bug_reports(str(reports_dir))
+
     def test_index_source_analysis_skips_empty_document_batch(self) -> None:
         knowledge_base = self._build_knowledge_base()
 
@@ -127,6 +255,41 @@ class RAGKnowledgeBaseIndexSourceAnalysisTests(TestCase):
 
         knowledge_base.vector_store_mock.add.assert_not_called()
 
+    def test_sync_to_vector_store_adds_each_knowledge_type_in_one_batch(self) -> None:
+        store = KnowledgeStore(":memory:")
+        knowledge_base = StubRAGKnowledgeBase(store=store, config=None, llm_api_key=None)
+        for index in range(3):
+            store.save_contract(
+                Contract(
+                    id=f"contract-{index}",
+                    class_name="Calculator",
+                    method_name=f"op{index}",
+                    method_signature=f"int op{index}()",
+                    description="",
+                    source="test",
+                )
+            )
+        store.save_pattern(
+            Pattern(
+                id="pattern-0", name="off-by-one", category="boundary", description="", template=""
+            )
+        )
+        knowledge_base.set_vector_store_for_test(Mock())
+
+        knowledge_base.sync_to_vector_store()
+
+        vector_store = knowledge_base.vector_store_mock
+        vector_store.add_single.assert_not_called()
+        self.assertEqual(
+            [call.args[0] for call in vector_store.add.call_args_list],
+            [KnowledgeType.CONTRACTS, KnowledgeType.PATTERNS],
+        )
+        contract_documents = vector_store.add.call_args_list[0].args[1]
+        self.assertEqual(
+            sorted(document.id for document in contract_documents),
+            ["contract-0", "contract-1", "contract-2"],
+        )
+
 
 class RAGKnowledgeBaseInitializationTests(TestCase):
     def test_initialize_uses_run_scoped_vector_store_directory(self) -> None:
@@ -173,6 +336,24 @@ class RAGKnowledgeBaseInitializationTests(TestCase):
         )
         retriever_factory.assert_called_once_with(config.retrieval, vector_store)
 
+    def test_initialized_check_is_swapped_out_until_close(self) -> None:
+        config = KnowledgeConfig(enabled=True, embedding=EmbeddingConfig(api_key="key"))
+        knowledge_base = RAGKnowledgeBase(store=Mock(), config=config, llm_api_key=None)
+
+        with (
+            patch("comet.knowledge.embedding.EmbeddingService.from_config"),
+            patch("comet.knowledge.vector_store.VectorStore"),
+            patch("comet.knowledge.retriever.KnowledgeRetriever.from_config"),
+        ):
+            self.assertTrue(knowledge_base.initialize())
+
+        self.assertIn("_ensure_initialized", vars(knowledge_base))
+        self.assertTrue(knowledge_base._ensure_initialized())
+
+        knowledge_base.close()
+
+        self.assertNotIn("_ensure_initialized", vars(knowledge_base))
+
     def test_close_releases_vector_store_and_store(self) -> None:
         store = Mock()
         config = KnowledgeConfig(
@@ -231,10 +412,323 @@ class VectorStoreFilterNormalizationTests(TestCase):
         self.assertIs(VectorStore._normalize_filter_metadata(operator_filter), operator_filter)
 
 
+class VectorStoreSearchMultiTests(TestCase):
+    def test_search_multi_embeds_query_once_and_skips_empty_collections(self) -> None:
+        vector_store = VectorStore.__new__(VectorStore)
+        embedding_service = Mock()
+        embedding_service.embed.return_value = [1.0, 0.0]
+        vector_store.embedding_service = embedding_service
+        counts = {KnowledgeType.CONTRACTS: 2, KnowledgeType.PATTERNS: 0}
+
+        with (
+            patch.object(vector_store, "count", side_effect=counts.__getitem__),
+            patch.object(vector_store, "search_with_embedding", return_value=["hit"]) as search,
+        ):
+            results = vector_store.search_multi(
+                [KnowledgeType.CONTRACTS, KnowledgeType.PATTERNS], "query"
+            )
+
+        embedding_service.embed.assert_called_once_with("query")
+        search.assert_called_once()
+        self.assertEqual(results, {KnowledgeType.CONTRACTS: ["hit"], KnowledgeType.PATTERNS: []})
+
+
+class VectorStoreAddTests(TestCase):
+    def _build_embedding_service(self) -> Mock:
+        embedding_service = Mock()
+        embedding_service.batch_size = 100
+        embedding_service.embed_batch.side_effect = lambda texts: [
+            [float(len(text)), 1.0] for text in texts
+        ]
+        return embedding_service
+
+    def test_add_embeds_in_sub_batches_and_writes_every_document(self) -> None:
+        embedding_service = self._build_embedding_service()
+        documents = [
+            Document(id=f"doc-{index}", content="x" * (index + 1), metadata={"index": index})
+            for index in range(5)
+        ]
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            vector_store = VectorStore(
+                embedding_service, persist_directory=temp_dir, add_batch_size=2
+            )
+            try:
+                vector_store.add(KnowledgeType.CONTRACTS, documents)
+                count = vector_store.count(KnowledgeType.CONTRACTS)
+                stored = vector_store.get_by_id(KnowledgeType.CONTRACTS, "doc-4")
+            finally:
+                vector_store.close()
+
+        self.assertEqual(
+            [call.args[0] for call in embedding_service.embed_batch.call_args_list],
+            [["x", "xx"], ["xxx", "xxxx"], ["xxxxx"]],
+        )
+        self.assertEqual(count, 5)
+        assert stored is not None
+        self.assertEqual(stored.content, "xxxxx")
+        self.assertEqual(stored.metadata, {"index": 4})
+
+    def test_collections_are_created_with_per_type_hnsw_params(self) -> None:
+        embedding_service = self._build_embedding_service()
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            vector_store = VectorStore(
+                embedding_service,
+                persist_directory=temp_dir,
+                hnsw_params={KnowledgeType.PATTERNS: {"search_ef": 40}},
+            )
+            try:
+                patterns = vector_store._get_collection(KnowledgeType.PATTERNS).configuration
+                contracts = vector_store._get_collection(KnowledgeType.CONTRACTS).configuration
+                analysis = vector_store._get_collection(KnowledgeType.SOURCE_ANALYSIS).configuration
+            finally:
+                vector_store.close()
+
+        patterns_hnsw = cast(dict[str, Any], patterns["hnsw"])
+        analysis_hnsw = cast(dict[str, Any], analysis["hnsw"])
+        self.assertEqual(patterns_hnsw["space"], "cosine")
+        self.assertEqual(patterns_hnsw["max_neighbors"], 8)
+        self.assertEqual(patterns_hnsw["ef_search"], 40)
+        contracts_hnsw = cast(dict[str, Any], contracts["hnsw"])
+        self.assertEqual(contracts_hnsw["max_neighbors"], 8)
+        self.assertEqual(contracts_hnsw["ef_search"], 100)
+        self.assertEqual(analysis_hnsw["max_neighbors"], 32)
+        self.assertEqual(analysis_hnsw["ef_construction"], 200)
+
+    def test_search_reuses_cached_results_until_collection_changes(self) -> None:
+        embedding_service = self._build_embedding_service()
+        embedding_service.embed.side_effect = lambda text: [float(len(text)), 1.0]
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            vector_store = VectorStore(embedding_service, persist_directory=temp_dir)
+            try:
+                vector_store.add(
+                    KnowledgeType.PATTERNS, [Document(id="p1", content="xx", metadata={"n": 1})]
+                )
+                first = vector_store.search(KnowledgeType.PATTERNS, "xx", top_k=5)
+                second = vector_store.search(KnowledgeType.PATTERNS, "xx", top_k=5)
+                embed_calls_before_write = embedding_service.embed.call_count
+                vector_store.add(
+                    KnowledgeType.PATTERNS, [Document(id="p2", content="xxx", metadata={"n": 2})]
+                )
+                third = vector_store.search(KnowledgeType.PATTERNS, "xx", top_k=5)
+            finally:
+                vector_store.close()
+
+        self.assertEqual(embed_calls_before_write, 1)
+        self.assertEqual([r.document.id for r in first], [r.document.id for r in second])
+        self.assertEqual(embedding_service.embed.call_count, 2)
+        self.assertEqual(len(third), 2)
+
+    def test_search_cache_misses_after_another_instance_adds_documents(self) -> None:
+        embedding_service = self._build_embedding_service()
+        embedding_service.embed.side_effect = lambda text: [float(len(text)), 1.0]
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            reader = VectorStore(embedding_service, persist_directory=temp_dir)
+            writer = VectorStore(embedding_service, persist_directory=temp_dir)
+            try:
+                writer.add(
+                    KnowledgeType.PATTERNS, [Document(id="p1", content="xx", metadata={"n": 1})]
+                )
+                first = reader.search(KnowledgeType.PATTERNS, "xx", top_k=5)
+                writer.add(
+                    KnowledgeType.PATTERNS, [Document(id="p2", content="xxx", metadata={"n": 2})]
+                )
+                # 模拟数量缓存已过期
+                reader.COUNT_CACHE_TTL = 0.0
+                second = reader.search(KnowledgeType.PATTERNS, "xx", top_k=5)
+            finally:
+                writer.close()
+                reader.close()
+
+        self.assertEqual(len(first), 1)
+        self.assertEqual(len(second), 2)
+
+    def test_init_preloads_every_collection_unless_disabled(self) -> None:
+        embedding_service = self._build_embedding_service()
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            eager = VectorStore(embedding_service, persist_directory=temp_dir)
+            eager_collections = set(eager._collections)
+            eager.close()
+            lazy = VectorStore(embedding_service, persist_directory=temp_dir, eager_init=False)
+            lazy_collections = set(lazy._collections)
+            lazy.close()
+
+        self.assertEqual(
+            eager_collections,
+            {
+                KnowledgeType.SOURCE_ANALYSIS,
+                KnowledgeType.BUG_REPORTS,
+                KnowledgeType.CONTRACTS,
+                KnowledgeType.PATTERNS,
+            },
+        )
+        self.assertEqual(lazy_collections, set())
+
+    def test_add_embeds_duplicate_contents_once(self) -> None:
+        embedding_service = self._build_embedding_service()
+        documents = [
+            Document(id="a", content="same", metadata={"n": 1}),
+            Document(id="b", content="other", metadata={"n": 2}),
+            Document(id="c", content="same", metadata={"n": 3}),
+        ]
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            vector_store = VectorStore(embedding_service, persist_directory=temp_dir)
+            try:
+                vector_store.add(KnowledgeType.PATTERNS, documents)
+                count = vector_store.count(KnowledgeType.PATTERNS)
+            finally:
+                vector_store.close()
+
+        embedding_service.embed_batch.assert_called_once_with(["same", "other"])
+        self.assertEqual(count, 3)
+
+    def test_update_batch_embeds_all_documents_in_one_call(self) -> None:
+        embedding_service = self._build_embedding_service()
+        documents = [
+            Document(id=f"doc-{index}", content="x", metadata={"index": index})
+            for index in range(3)
+        ]
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            vector_store = VectorStore(embedding_service, persist_directory=temp_dir)
+            try:
+                vector_store.add(KnowledgeType.CONTRACTS, documents)
+                embedding_service.embed_batch.reset_mock()
+                vector_store.update_batch(
+                    KnowledgeType.CONTRACTS,
+                    [
+                        Document(id=doc.id, content="updated", metadata=doc.metadata)
+                        for doc in documents
+                    ],
+                )
+                stored = vector_store.get_by_id(KnowledgeType.CONTRACTS, "doc-2")
+            finally:
+                vector_store.close()
+
+        # 内容相同的文档只计算一次 embedding
+        embedding_service.embed_batch.assert_called_once_with(["updated"])
+        assert stored is not None
+        self.assertEqual(stored.content, "updated")
+
+    def test_get_all_reads_only_requested_fields_and_list_ids_skips_content(self) -> None:
+        embedding_service = self._build_embedding_service()
+        documents = [
+            Document(id=f"doc-{index}", content=f"text {index}", metadata={"index": index})
+            for index in range(3)
+        ]
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            vector_store = VectorStore(embedding_service, persist_directory=temp_dir)
+            try:
+                vector_store.add(KnowledgeType.BUG_REPORTS, documents)
+                metadata_only = vector_store.get_all(
+                    KnowledgeType.BUG_REPORTS, fields=("metadatas",)
+                )
+                ids = vector_store.list_ids(KnowledgeType.BUG_REPORTS, limit=2)
+            finally:
+                vector_store.close()
+
+        self.assertEqual({doc.content for doc in metadata_only}, {""})
+        self.assertEqual(
+            sorted(cast(int, doc.metadata["index"]) for doc in metadata_only), [0, 1, 2]
+        )
+        self.assertEqual(len(ids), 2)
+        self.assertTrue(set(ids) <= {"doc-0", "doc-1", "doc-2"})
+
+    def test_count_is_cached_until_the_collection_is_written(self) -> None:
+        embedding_service = self._build_embedding_service()
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            vector_store = VectorStore(embedding_service, persist_directory=temp_dir)
+            try:
+                vector_store.add(
+                    KnowledgeType.CONTRACTS, [Document(id="c1", content="x", metadata={"n": 1})]
+                )
+                collection = Mock(wraps=vector_store._get_collection(KnowledgeType.CONTRACTS))
+                vector_store._collections[KnowledgeType.CONTRACTS] = collection
+                counts = [vector_store.count(KnowledgeType.CONTRACTS) for _ in range(3)]
+                calls_before_write = collection.count.call_count
+                vector_store.add(
+                    KnowledgeType.CONTRACTS, [Document(id="c2", content="y", metadata={"n": 2})]
+                )
+                count_after_write = vector_store.count(KnowledgeType.CONTRACTS)
+            finally:
+                vector_store.close()
+
+        self.assertEqual(counts, [1, 1, 1])
+        self.assertEqual(calls_before_write, 1)
+        self.assertEqual(count_after_write, 2)
+        self.assertEqual(collection.count.call_count, 2)
+
+    def test_count_cache_expires_so_other_writers_become_visible(self) -> None:
+        embedding_service = self._build_embedding_service()
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            reader = VectorStore(embedding_service, persist_directory=temp_dir)
+            writer = VectorStore(embedding_service, persist_directory=temp_dir)
+            try:
+                count_before = reader.count(KnowledgeType.CONTRACTS)
+                writer.add(
+                    KnowledgeType.CONTRACTS, [Document(id="c1", content="x", metadata={"n": 1})]
+                )
+                count_within_ttl = reader.count(KnowledgeType.CONTRACTS)
+                # 模拟有效期已过
+                reader.COUNT_CACHE_TTL = 0.0
+                count_after_ttl = reader.count(KnowledgeType.CONTRACTS)
+            finally:
+                writer.close()
+                reader.close()
+
+        self.assertEqual(count_before, 0)
+        self.assertEqual(count_within_ttl, 0)
+        self.assertEqual(count_after_ttl, 1)
+
+    def test_add_batch_size_defaults_to_embedding_batch_size(self) -> None:
+        embedding_service = self._build_embedding_service()
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            vector_store = VectorStore(embedding_service, persist_directory=temp_dir)
+            vector_store.close()
+
+        self.assertEqual(vector_store.add_batch_size, 100)
+
+
+class VectorStoreSearchMergedTests(TestCase):
+    def test_search_merged_returns_global_top_k_across_types(self) -> None:
+        vector_store = VectorStore.__new__(VectorStore)
+
+        def _result(doc_id: str, score: float) -> SearchResult:
+            return SearchResult(document=Document(id=doc_id, content="", metadata={}), score=score)
+
+        per_type = {
+            KnowledgeType.CONTRACTS: [_result("c1", 0.9), _result("c2", 0.4)],
+            KnowledgeType.PATTERNS: [_result("p1", 0.7), _result("p2", 0.6)],
+        }
+
+        with patch.object(vector_store, "search_multi", return_value=per_type) as search_multi:
+            merged = vector_store.search_merged(
+                [KnowledgeType.CONTRACTS, KnowledgeType.PATTERNS], "query", top_k=3
+            )
+
+        search_multi.assert_called_once_with(
+            [KnowledgeType.CONTRACTS, KnowledgeType.PATTERNS],
+            "query",
+            top_k=3,
+            score_threshold=0.0,
+        )
+        self.assertEqual([r.document.id for r in merged], ["c1", "p1", "p2"])
+
+
 class KnowledgeRetrieverFilterTests(TestCase):
     def test_retrieve_for_mutation_generation_uses_multi_field_filter(self) -> None:
         vector_store = Mock()
-        vector_store.search.return_value = []
+        vector_store.count.return_value = 1
+        vector_store.search_with_embedding.return_value = []
         retriever = KnowledgeRetriever(vector_store=vector_store, top_k=3, score_threshold=0.2)
 
         retriever.retrieve_for_mutation_generation(
@@ -244,10 +738,11 @@ class KnowledgeRetrieverFilterTests(TestCase):
             source_code="public void addProduct(String name, double price) {}",
         )
 
-        search_calls = vector_store.search.call_args_list
-        self.assertGreaterEqual(len(search_calls), 1)
-        source_analysis_call = search_calls[0]
-        self.assertEqual(source_analysis_call.args[0], KnowledgeType.SOURCE_ANALYSIS)
+        search_calls = {
+            call.args[0]: call for call in vector_store.search_with_embedding.call_args_list
+        }
+        self.assertIn(KnowledgeType.SOURCE_ANALYSIS, search_calls)
+        source_analysis_call = search_calls[KnowledgeType.SOURCE_ANALYSIS]
         self.assertEqual(
             source_analysis_call.kwargs["filter_metadata"],
             {
@@ -255,3 +750,253 @@ class KnowledgeRetrieverFilterTests(TestCase):
                 "method_signature": "void addProduct(String, double)",
             },
         )
+
+    def test_retrieve_for_test_generation_embeds_query_once_for_all_types(self) -> None:
+        vector_store = Mock()
+        vector_store.count.return_value = 1
+        vector_store.search_with_embedding.return_value = []
+        retriever = KnowledgeRetriever(vector_store=vector_store, top_k=3, score_threshold=0.2)
+
+        retriever.retrieve_for_test_generation("ProductService", "addProduct")
+
+        vector_store.embed_query.assert_called_once()
+        vector_store.search.assert_not_called()
+        self.assertEqual(
+            sorted(call.args[0] for call in vector_store.search_with_embedding.call_args_list),
+            sorted([KnowledgeType.CONTRACTS, KnowledgeType.BUG_REPORTS, KnowledgeType.PATTERNS]),
+        )
+
+    def test_retrieve_skips_embedding_when_all_collections_are_empty(self) -> None:
+        vector_store = Mock()
+        vector_store.count.return_value = 0
+        retriever = KnowledgeRetriever(vector_store=vector_store, top_k=3, score_threshold=0.2)
+
+        context = retriever.retrieve_for_test_generation("ProductService", "addProduct")
+
+        self.assertEqual(context, "")
+        vector_store.embed_query.assert_not_called()
+        vector_store.search_with_embedding.assert_not_called()
+
+
+class KnowledgeBaseTopPatternsTests(TestCase):
+    def _build_store(self) -> KnowledgeStore:
+        store = KnowledgeStore(":memory:")
+        for pattern_id, confidence, success_rate in [
+            ("low-confidence", 0.2, 0.9),
+            ("best", 0.9, 0.8),
+            ("second", 0.6, 0.5),
+            ("third", 0.7, 0.1),
+        ]:
+            store.save_pattern(
+                Pattern(
+                    id=pattern_id,
+                    name=pattern_id,
+                    category="boundary",
+                    description="",
+                    template="",
+                    confidence=confidence,
+                    success_rate=success_rate,
+                )
+            )
+        return store
+
+    def test_get_top_patterns_queries_store_without_loading_all_patterns(self) -> None:
+        knowledge_base = KnowledgeBase(self._build_store())
+
+        top_patterns = knowledge_base.get_top_patterns(n=2, min_confidence=0.5)
+
+        self.assertEqual([pattern.id for pattern in top_patterns], ["best", "second"])
+        self.assertIsNone(knowledge_base._patterns_cache)
+
+    def test_get_top_patterns_matches_store_query_when_cache_is_warm(self) -> None:
+        knowledge_base = KnowledgeBase(self._build_store())
+        knowledge_base.get_all_patterns()
+
+        top_patterns = knowledge_base.get_top_patterns(n=5, min_confidence=0.5)
+
+        self.assertEqual([pattern.id for pattern in top_patterns], ["best", "second", "third"])
+
+    def test_relevant_patterns_fill_shortfall_without_duplicates(self) -> None:
+        knowledge_base = StubRAGKnowledgeBase(
+            store=self._build_store(), config=None, llm_api_key=None
+        )
+        vector_store = Mock()
+        vector_store.search.return_value = [
+            SimpleNamespace(document=SimpleNamespace(id="best"), score=0.9)
+        ]
+        knowledge_base.set_vector_store_for_test(vector_store)
+        knowledge_base.config = KnowledgeConfig()
+
+        patterns = knowledge_base.get_relevant_patterns("class Alpha {}", max_patterns=3)
+
+        self.assertEqual([p.id for p in patterns], ["best", "second", "third"])
+
+    def test_get_stats_summarizes_patterns(self) -> None:
+        stats = KnowledgeBase(self._build_store()).get_stats()
+
+        self.assertEqual(stats["total_contracts"], 0)
+        self.assertEqual(stats["total_patterns"], 4)
+        self.assertEqual(stats["pattern_categories"], 1)
+        self.assertAlmostEqual(stats["avg_pattern_success_rate"], (0.9 + 0.8 + 0.5 + 0.1) / 4)
+
+    def test_update_pattern_usage_keeps_warm_cache_in_store_order(self) -> None:
+        store = self._build_store()
+        knowledge_base = KnowledgeBase(store)
+        knowledge_base.get_all_patterns()
+        knowledge_base.get_top_patterns(n=5, min_confidence=0.5)
+
+        for _ in range(3):
+            knowledge_base.update_pattern_usage("third", success=True)
+        knowledge_base.update_pattern_usage("best", success=False)
+
+        cached = knowledge_base.get_all_patterns()
+        expected = store.get_all_patterns()
+        self.assertEqual([p.id for p in cached], [p.id for p in expected])
+        self.assertEqual(
+            [(p.success_rate, p.usage_count) for p in cached],
+            [(p.success_rate, p.usage_count) for p in expected],
+        )
+        self.assertEqual(
+            [p.id for p in knowledge_base.get_top_patterns(n=5, min_confidence=0.5)],
+            [p.id for p in store.get_top_patterns(5, 0.5)],
+        )
+
+
+class KnowledgeBaseCacheSnapshotTests(TestCase):
+    def _save_pattern(self, store: KnowledgeStore, pattern_id: str) -> None:
+        store.save_pattern(
+            Pattern(
+                id=pattern_id, name=pattern_id, category="boundary", description="", template=""
+            )
+        )
+
+    def test_cache_snapshot_is_reloaded_on_next_start(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = str(Path(temp_dir) / "knowledge.db")
+            knowledge_base = KnowledgeBase(KnowledgeStore(db_path))
+            knowledge_base.add_pattern(
+                Pattern(id="alpha", name="alpha", category="boundary", description="", template="")
+            )
+            knowledge_base.update_pattern_usage("alpha", success=True)
+            knowledge_base.get_all_patterns()
+            knowledge_base.close()
+
+            reopened = KnowledgeBase(KnowledgeStore(db_path))
+            cached = reopened._patterns_cache
+            reopened.close()
+
+        self.assertIsNotNone(cached)
+        assert cached is not None
+        self.assertEqual([(p.id, p.usage_count) for p in cached], [("alpha", 1)])
+
+    def test_cache_snapshot_is_ignored_after_external_write(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = str(Path(temp_dir) / "knowledge.db")
+            store = KnowledgeStore(db_path)
+            self._save_pattern(store, "alpha")
+            knowledge_base = KnowledgeBase(store)
+            knowledge_base.get_all_patterns()
+            knowledge_base.close()
+
+            other_store = KnowledgeStore(db_path)
+            self._save_pattern(other_store, "beta")
+            other_store.close()
+
+            reopened = KnowledgeBase(KnowledgeStore(db_path))
+            self.assertIsNone(reopened._patterns_cache)
+            self.assertEqual(len(reopened.get_all_patterns()), 2)
+            reopened.close()
+
+
+class RAGKnowledgeBaseSharedBugReportQueryTests(TestCase):
+    def test_shared_asset_retrieval_reuses_single_query_embedding(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            snapshot_path = Path(temp_dir) / "documents.json"
+            snapshot_path.write_text(
+                json.dumps(
+                    {
+                        "documents": [
+                            {
+                                "id": "bug-alpha",
+                                "content": "Alpha.run fails on null",
+                                "metadata": {"title": "Alpha bug"},
+                                "embedding": [1.0, 0.0],
+                            }
+                        ]
+                    }
+                ),
+                encoding="utf-8",
+            )
+            knowledge_base = StubRAGKnowledgeBase(store=Mock(), config=None, llm_api_key=None)
+            vector_store = Mock()
+            vector_store.embed_query.return_value = [1.0, 0.0]
+            vector_store.search_with_embedding.return_value = []
+            knowledge_base.set_vector_store_for_test(vector_store)
+            knowledge_base._embedding_service = vector_store.embedding_service
+            knowledge_base.attach_bug_report_shared_asset(
+                BugReportSharedAsset(
+                    asset_root=Path(temp_dir),
+                    manifest_path=Path(temp_dir) / "manifest.json",
+                    snapshot_path=snapshot_path,
+                    source_dir=Path(temp_dir),
+                    report_count=1,
+                )
+            )
+
+            context = knowledge_base.retrieve_for_test_generation("Alpha", "run")
+
+        self.assertIn("Alpha.run fails on null", context)
+        vector_store.embed_query.assert_called_once()
+        vector_store.embedding_service.embed.assert_not_called()
+        vector_store.search.assert_not_called()
+
+
+class RAGKnowledgeBaseRetrievalCacheTests(TestCase):
+    def _build_knowledge_base(self) -> tuple[StubRAGKnowledgeBase, Mock]:
+        knowledge_base = StubRAGKnowledgeBase(store=Mock(), config=None, llm_api_key=None)
+        knowledge_base.set_vector_store_for_test(Mock())
+        retriever = Mock()
+        retriever.retrieve_for_test_generation.return_value = "context"
+        knowledge_base._retriever = retriever
+        return knowledge_base, retriever
+
+    def test_repeated_retrieval_for_same_method_hits_cache(self) -> None:
+        knowledge_base, retriever = self._build_knowledge_base()
+
+        first = knowledge_base.retrieve_for_test_generation("Alpha", "run", "void run()", "code")
+        second = knowledge_base.retrieve_for_test_generation("Alpha", "run", "void run()", "code")
+        knowledge_base.retrieve_for_test_generation("Alpha", "run", "void run()", "changed")
+
+        self.assertEqual(first, "context")
+        self.assertEqual(second, "context")
+        self.assertEqual(retriever.retrieve_for_test_generation.call_count, 2)
+
+    def test_pattern_usage_update_invalidates_cached_context(self) -> None:
+        knowledge_base, retriever = self._build_knowledge_base()
+
+        knowledge_base.retrieve_for_test_generation("Alpha", "run")
+        knowledge_base.update_pattern_usage("pattern-0", success=True)
+        knowledge_base.retrieve_for_test_generation("Alpha", "run")
+
+        self.assertEqual(retriever.retrieve_for_test_generation.call_count, 2)
+
+
+class KnowledgeStorePatternLookupTests(TestCase):
+    def test_get_patterns_by_ids_fetches_requested_patterns(self) -> None:
+        store = KnowledgeStore(":memory:")
+        for pattern_id in ["alpha", "beta", "gamma"]:
+            store.save_pattern(
+                Pattern(
+                    id=pattern_id,
+                    name=pattern_id,
+                    category="boundary",
+                    description="",
+                    template="",
+                )
+            )
+
+        patterns = store.get_patterns_by_ids(["gamma", "missing", "alpha"])
+
+        self.assertEqual(sorted(patterns), ["alpha", "gamma"])
+        self.assertEqual(patterns["gamma"].name, "gamma")
+        self.assertEqual(store.get_patterns_by_ids([]), {})
@@ -1,12 +1,15 @@
+import tempfile
+import threading
 import time
 import unittest
+from types import SimpleNamespace
 from typing import cast
 from unittest.mock import patch
 
 import httpx
-from openai import APITimeoutError
+from openai import APITimeoutError, BadRequestError
 
-from comet.llm.client import LLMClient
+from comet.llm.client import LLMClient, _DaemonThreadPool
 
 _REAL_SLEEP = time.sleep
 
@@ -306,3 +309,355 @@ class LLMClientTokenBudgetTest(unittest.TestCase):
 
 if __name__ == "__main__":
     unittest.main()
+
+
+class LLMClientResponseCacheTest(unittest.TestCase):
+    def _make_client(
+        self,
+        response_cache_size: int = 256,
+        cache_dir: str | None = None,
+        base_url: str = "https://example.com/v1",
+    ) -> LLMClient:
+        return LLMClient(
+            api_key="test-key",
+            base_url=base_url,
+            model="test-model",
+            max_retries=1,
+            response_cache_size=response_cache_size,
+            cache_dir=cache_dir,
+        )
+
+    def _make_response(self, content: str, finish_reason: str = "stop") -> object:
+        class _Usage:
+            prompt_tokens = 1
+            completion_tokens = 1
+            total_tokens = 2
+
+        class _Message:
+            def __init__(self, content: str) -> None:
+                self.content = content
+
+        class _Choice:
+            message = _Message(content)
+
+        _Choice.finish_reason = finish_reason
+
+        class _Response:
+            usage = _Usage()
+            choices = [_Choice()]
+
+        return _Response()
+
+    def _chat_twice(
+        self, client: LLMClient, temperature: float, second_content: str = "hello"
+    ) -> tuple[list[str], int]:
+        replies = iter(["first", "second"])
+        calls = 0
+
+        def _fake_create(**kwargs: object) -> object:
+            nonlocal calls
+            calls += 1
+            return self._make_response(next(replies))
+
+        with patch.object(client.client.chat.completions, "create", side_effect=_fake_create):
+            results = [
+                client.chat([{"role": "user", "content": "hello"}], temperature=temperature),
+                client.chat([{"role": "user", "content": second_content}], temperature=temperature),
+            ]
+        return results, calls
+
+    def test_deterministic_requests_reuse_cached_response(self) -> None:
+        client = self._make_client()
+
+        results, calls = self._chat_twice(client, temperature=0.0)
+
+        self.assertEqual(results, ["first", "first"])
+        self.assertEqual(calls, 1)
+        self.assertEqual(client.get_stats()["cache_hits"], 1)
+
+    def test_sampled_requests_bypass_cache(self) -> None:
+        client = self._make_client()
+
+        results, calls = self._chat_twice(client, temperature=0.7)
+
+        self.assertEqual(results, ["first", "second"])
+        self.assertEqual(calls, 2)
+
+    def test_different_messages_do_not_share_cache_entry(self) -> None:
+        client = self._make_client()
+
+        results, calls = self._chat_twice(client, temperature=0.0, second_content="bye")
+
+        self.assertEqual(results, ["first", "second"])
+        self.assertEqual(calls, 2)
+
+    def test_zero_cache_size_disables_cache(self) -> None:
+        client = self._make_client(response_cache_size=0)
+
+        results, calls = self._chat_twice(client, temperature=0.0)
+
+        self.assertEqual(results, ["first", "second"])
+        self.assertEqual(calls, 2)
+
+    def test_truncated_response_is_not_cached(self) -> None:
+        client = self._make_client()
+        responses = [
+            self._make_response("partial", finish_reason="length"),
+            self._make_response("complete"),
+        ]
+
+        with patch.object(
+            client.client.chat.completions, "create", side_effect=responses
+        ) as mock_create:
+            results = [
+                client.chat([{"role": "user", "content": "hello"}], temperature=0.0),
+                client.chat([{"role": "user", "content": "hello"}], temperature=0.0),
+            ]
+
+        self.assertEqual(results, ["partial", "complete"])
+        self.assertEqual(mock_create.call_count, 2)
+
+    def test_use_cache_false_skips_lookup_and_replaces_entry(self) -> None:
+        client = self._make_client()
+        responses = [self._make_response("bad"), self._make_response("good")]
+        messages = [{"role": "user", "content": "hello"}]
+
+        with patch.object(
+            client.client.chat.completions, "create", side_effect=responses
+        ) as mock_create:
+            results = [
+                client.chat(messages, temperature=0.0),
+                client.chat(messages, temperature=0.0, use_cache=False),
+                client.chat(messages, temperature=0.0),
+            ]
+
+        self.assertEqual(results, ["bad", "good", "good"])
+        self.assertEqual(mock_create.call_count, 2)
+
+    def test_disk_cache_is_reused_by_a_new_client(self) -> None:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            first_run = self._make_client(cache_dir=cache_dir)
+            _, first_calls = self._chat_twice(first_run, temperature=0.0)
+
+            second_run = self._make_client(response_cache_size=0, cache_dir=cache_dir)
+            results, second_calls = self._chat_twice(second_run, temperature=0.0)
+
+        self.assertEqual(first_calls, 1)
+        self.assertEqual(results, ["first", "first"])
+        self.assertEqual(second_calls, 0)
+        self.assertEqual(second_run.get_stats()["cache_hits"], 2)
+
+    def test_disk_cache_is_not_shared_across_endpoints(self) -> None:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            _ = self._chat_twice(self._make_client(cache_dir=cache_dir), temperature=0.0)
+            other_endpoint = self._make_client(
+                cache_dir=cache_dir, base_url="https://other.example.com/v1"
+            )
+            results, calls = self._chat_twice(other_endpoint, temperature=0.0)
+
+        self.assertEqual(results, ["first", "first"])
+        self.assertEqual(calls, 1)
+
+    def test_clear_response_cache_also_clears_disk_cache(self) -> None:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            client = self._make_client(cache_dir=cache_dir)
+            _ = self._chat_twice(client, temperature=0.0)
+
+            client.clear_response_cache()
+            results, calls = self._chat_twice(
+                self._make_client(cache_dir=cache_dir), temperature=0.0
+            )
+
+        self.assertEqual(results, ["first", "first"])
+        self.assertEqual(calls, 1)
+
+
+class LLMClientStreamTest(unittest.TestCase):
+    def _make_client(self) -> LLMClient:
+        return LLMClient(
+            api_key="test-key",
+            base_url="https://example.com/v1",
+            model="test-model",
+            max_retries=2,
+        )
+
+    def _make_chunk(self, content: str | None, usage: object = None) -> object:
+        delta = SimpleNamespace(content=content)
+        return SimpleNamespace(choices=[SimpleNamespace(delta=delta)], usage=usage)
+
+    def test_chat_stream_yields_deltas_and_records_usage(self) -> None:
+        client = self._make_client()
+        captured_kwargs: dict[str, object] = {}
+        chunks = [
+            self._make_chunk("hel"),
+            self._make_chunk(None),
+            self._make_chunk("lo"),
+            SimpleNamespace(choices=[], usage=SimpleNamespace(total_tokens=7)),
+        ]
+
+        def _fake_create(**kwargs: object) -> object:
+            captured_kwargs.update(kwargs)
+            return iter(chunks)
+
+        with patch.object(client.client.chat.completions, "create", side_effect=_fake_create):
+            parts = list(client.chat_stream([{"role": "user", "content": "hi"}]))
+
+        self.assertEqual(parts, ["hel", "lo"])
+        self.assertIs(captured_kwargs["stream"], True)
+        self.assertEqual(captured_kwargs["stream_options"], {"include_usage": True})
+        self.assertEqual(client.get_stats()["total_calls"], 1)
+        self.assertEqual(client.get_stats()["total_tokens"], 7)
+
+    def test_chat_stream_retries_until_stream_is_established(self) -> None:
+        client = self._make_client()
+        responses: list[object] = [
+            httpx.ConnectError("down"),
+            iter([self._make_chunk("ok")]),
+        ]
+
+        def _fake_create(**kwargs: object) -> object:
+            response = responses.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+        with (
+            patch.object(client.client.chat.completions, "create", side_effect=_fake_create),
+            patch("comet.llm.client.time.sleep"),
+        ):
+            parts = list(client.chat_stream([{"role": "user", "content": "hi"}]))
+
+        self.assertEqual(parts, ["ok"])
+        self.assertGreater(client.get_stats()["total_tokens"], 0)
+
+    def test_chat_stream_drops_rejected_stream_options(self) -> None:
+        client = self._make_client()
+        calls: list[dict[str, object]] = []
+
+        def _fake_create(**kwargs: object) -> object:
+            calls.append(kwargs)
+            if "stream_options" in kwargs:
+                request = httpx.Request("POST", "https://example.com/v1/chat/completions")
+                raise BadRequestError(
+                    "unknown field stream_options",
+                    response=httpx.Response(400, request=request),
+                    body=None,
+                )
+            return iter([self._make_chunk("ok")])
+
+        with (
+            patch.object(client.client.chat.completions, "create", side_effect=_fake_create),
+            patch("comet.llm.client.time.sleep") as mock_sleep,
+        ):
+            first = list(client.chat_stream([{"role": "user", "content": "hi"}]))
+            second = list(client.chat_stream([{"role": "user", "content": "hi"}]))
+
+        self.assertEqual(first, ["ok"])
+        self.assertEqual(second, ["ok"])
+        self.assertEqual(["stream_options" in kwargs for kwargs in calls], [True, False, False])
+        mock_sleep.assert_not_called()
+
+    def test_chat_stream_closes_stream_when_consumer_stops_early(self) -> None:
+        client = self._make_client()
+        closed = threading.Event()
+
+        class _Stream:
+            def __init__(self, chunks: list[object]) -> None:
+                self._chunks = iter(chunks)
+
+            def __iter__(self) -> "_Stream":
+                return self
+
+            def __next__(self) -> object:
+                return next(self._chunks)
+
+            def close(self) -> None:
+                closed.set()
+
+        stream = _Stream([self._make_chunk("hel"), self._make_chunk("lo")])
+
+        with patch.object(client.client.chat.completions, "create", return_value=stream):
+            deltas = client.chat_stream([{"role": "user", "content": "hi"}])
+            first = next(deltas)
+            deltas.close()
+
+        self.assertEqual(first, "hel")
+        self.assertTrue(closed.is_set())
+        self.assertEqual(client.get_stats()["total_calls"], 1)
+        self.assertGreater(client.get_stats()["total_tokens"], 0)
+
+    def test_chat_stream_raises_on_empty_content(self) -> None:
+        client = self._make_client()
+
+        with patch.object(
+            client.client.chat.completions, "create", return_value=iter([self._make_chunk(None)])
+        ):
+            with self.assertRaises(ValueError):
+                list(client.chat_stream([{"role": "user", "content": "hi"}]))
+
+
+class LLMClientChatManyTest(unittest.TestCase):
+    def test_chat_many_runs_requests_concurrently_and_keeps_order(self) -> None:
+        client = LLMClient(
+            api_key="test-key",
+            base_url="https://example.com/v1",
+            model="test-model",
+            max_retries=1,
+        )
+        both_started = threading.Barrier(2, timeout=1)
+
+        def _fake_chat(messages: list[dict[str, str]], *args: object) -> str:
+            # 两个请求必须同时在途才能越过屏障
+            both_started.wait()
+            return messages[0]["content"].upper()
+
+        with patch.object(client, "chat", side_effect=_fake_chat):
+            results = client.chat_many(
+                [
+                    [{"role": "user", "content": "first"}],
+                    [{"role": "user", "content": "second"}],
+                ],
+                concurrency=2,
+            )
+
+        self.assertEqual(results, ["FIRST", "SECOND"])
+
+    def test_chat_many_returns_empty_list_without_requests(self) -> None:
+        client = LLMClient(api_key="test-key", model="test-model")
+
+        self.assertEqual(client.chat_many([]), [])
+
+
+class DaemonThreadPoolTest(unittest.TestCase):
+    def test_sequential_submissions_reuse_one_daemon_thread(self) -> None:
+        pool = _DaemonThreadPool(thread_name_prefix="test-pool")
+
+        threads = [pool.submit(threading.current_thread).result(timeout=1) for _ in range(3)]
+
+        self.assertTrue(all(thread is threads[0] for thread in threads))
+        self.assertTrue(threads[0].daemon)
+
+    def test_submission_propagates_exception(self) -> None:
+        pool = _DaemonThreadPool(thread_name_prefix="test-pool")
+
+        def _fail() -> None:
+            raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            pool.submit(_fail).result(timeout=1)
+
+    def test_pool_queues_tasks_once_thread_limit_is_reached(self) -> None:
+        pool = _DaemonThreadPool(thread_name_prefix="test-pool", max_threads=1)
+        release = threading.Event()
+
+        blocked = pool.submit(lambda: release.wait(timeout=5))
+        with self.assertLogs("comet.llm.client", level="WARNING") as logs:
+            queued = pool.submit(threading.current_thread)
+
+        self.assertFalse(queued.done())
+        release.set()
+        self.assertTrue(blocked.result(timeout=1))
+        worker = queued.result(timeout=1)
+
+        self.assertIs(pool.submit(threading.current_thread).result(timeout=1), worker)
+        self.assertIn("上限", logs.output[0])
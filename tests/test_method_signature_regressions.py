@@ -874,6 +874,56 @@ class TestGeneratorRegressionTests(unittest.TestCase):
         self.assertEqual(repaired.methods[0].method_name, "testUpdatedName")
         self.assertIn("NoSuchElementException", repaired.methods[0].code)
 
+    def test_fix_single_method_renders_prompt_once_across_retries(self) -> None:
+        generator = TestGenerator.__new__(TestGenerator)
+        generator.llm = Mock()
+        generator.llm.chat_with_system.side_effect = [
+            "",
+            "@Test\nvoid testFixed() {\n    assertTrue(true);\n}",
+        ]
+        generator.prompt_manager = Mock()
+        generator.prompt_manager.render_fix_single_method.return_value = ("system", "user")
+
+        fixed = generator.fix_single_method(
+            method_name="testFixed",
+            method_code="@Test\nvoid testFixed() {}",
+            class_code="public class DefaultParser {}",
+            error_message="expected true",
+            max_retries=3,
+        )
+
+        self.assertIsNotNone(fixed)
+        self.assertEqual(generator.llm.chat_with_system.call_count, 2)
+        generator.prompt_manager.render_fix_single_method.assert_called_once()
+        self.assertEqual(
+            [call.kwargs["use_cache"] for call in generator.llm.chat_with_system.call_args_list],
+            [True, False],
+        )
+
+    def test_fix_methods_return_none_when_prompt_rendering_fails(self) -> None:
+        generator = TestGenerator.__new__(TestGenerator)
+        generator.llm = Mock()
+        generator.prompt_manager = Mock()
+        generator.prompt_manager.render_fix_test.side_effect = RuntimeError("template error")
+        generator.prompt_manager.render_fix_single_method.side_effect = RuntimeError(
+            "template error"
+        )
+
+        repaired = generator.regenerate_with_feedback(
+            test_case=TestCase(id="test-1", class_name="GeneratedTest", target_class="Parser"),
+            compile_error="missing import",
+        )
+        fixed = generator.fix_single_method(
+            method_name="testFixed",
+            method_code="@Test\nvoid testFixed() {}",
+            class_code="public class DefaultParser {}",
+            error_message="expected true",
+        )
+
+        self.assertIsNone(repaired)
+        self.assertIsNone(fixed)
+        generator.llm.chat_with_system.assert_not_called()
+
 
 class DatabaseMethodSignatureIsolationTests(unittest.TestCase):
     def test_get_tests_by_target_method_returns_only_matching_signature_methods(self) -> None:
@@ -0,0 +1,79 @@
+import unittest
+
+from pydantic import ValidationError
+
+from comet.models import KillMatrix, Metrics, Mutant, MutationPatch
+
+
+def _build_patch() -> MutationPatch:
+    return MutationPatch(
+        file_path="src/main/java/Calculator.java",
+        line_start=3,
+        line_end=3,
+        original_code="return a + b;",
+        mutated_code="return a - b;",
+    )
+
+
+class MutantModelTests(unittest.TestCase):
+    def test_status_accepts_known_lifecycle_values(self) -> None:
+        for status in ("pending", "valid", "invalid", "killed", "survived", "outdated"):
+            with self.subTest(status=status):
+                mutant = Mutant(
+                    id="m1", class_name="Calculator", patch=_build_patch(), status=status
+                )
+                self.assertEqual(mutant.status, status)
+
+    def test_status_rejects_unknown_value(self) -> None:
+        with self.assertRaises(ValidationError):
+            _ = Mutant(id="m1", class_name="Calculator", patch=_build_patch(), status="done")
+
+
+class KillMatrixTests(unittest.TestCase):
+    def test_add_kill_deduplicates_killers(self) -> None:
+        kill_matrix = KillMatrix()
+
+        kill_matrix.add_kill("m1", "TestB")
+        kill_matrix.add_kill("m1", "TestA")
+        kill_matrix.add_kill("m1", "TestB")
+
+        self.assertTrue(kill_matrix.is_killed("m1"))
+        self.assertEqual(kill_matrix.get_killers("m1"), ["TestA", "TestB"])
+
+    def test_get_killers_returns_copy(self) -> None:
+        kill_matrix = KillMatrix()
+        kill_matrix.add_kill("m1", "TestA")
+
+        kill_matrix.get_killers("m1").append("TestB")
+
+        self.assertEqual(kill_matrix.get_killers("m1"), ["TestA"])
+        self.assertEqual(kill_matrix.get_killers("missing"), [])
+
+    def test_get_survived_mutants_preserves_input_order(self) -> None:
+        kill_matrix = KillMatrix()
+        kill_matrix.add_kill("m2", "TestA")
+
+        self.assertEqual(kill_matrix.get_survived_mutants(["m3", "m2", "m1"]), ["m3", "m1"])
+
+    def test_loads_killer_lists_from_json(self) -> None:
+        kill_matrix = KillMatrix.model_validate_json('{"matrix": {"m1": ["TestA", "TestA"]}}')
+
+        self.assertEqual(kill_matrix.matrix, {"m1": {"TestA"}})
+
+
+class MetricsModelTests(unittest.TestCase):
+    def test_mutation_score_follows_mutant_counts(self) -> None:
+        metrics = Metrics(iteration=1, total_mutants=4, killed_mutants=3)
+
+        self.assertEqual(metrics.mutation_score, 0.75)
+        self.assertEqual(metrics.model_dump()["mutation_score"], 0.75)
+
+        metrics.killed_mutants = 4
+        self.assertEqual(metrics.mutation_score, 1.0)
+
+    def test_mutation_score_is_zero_without_mutants(self) -> None:
+        self.assertEqual(Metrics(iteration=0).mutation_score, 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
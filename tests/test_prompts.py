@@ -0,0 +1,188 @@
+import unittest
+from unittest.mock import patch
+
+from comet.llm import prompts
+from comet.llm.prompts import PromptManager
+from comet.models import Contract, TestCase
+from comet.utils.code_utils import add_line_numbers
+
+
+class PromptManagerEnvironmentTests(unittest.TestCase):
+    def test_templates_are_compiled_once_and_reused(self) -> None:
+        first = prompts._ENV.get_template("fix_test_user")
+        _ = PromptManager.render_fix_test("code", "error")
+
+        self.assertIs(prompts._ENV.get_template("fix_test_user"), first)
+
+    def test_templates_are_compiled_on_first_render(self) -> None:
+        cache = prompts._ENV.cache
+        assert cache is not None
+        cache.clear()
+
+        _ = PromptManager.render_fix_single_method("void t() {}", "class A {}", "boom")
+
+        self.assertEqual(
+            [name for _, name in cache.keys()],
+            ["fix_single_method_user"],
+        )
+
+    def test_rendered_values_are_not_html_escaped(self) -> None:
+        _, user = PromptManager.render_fix_test("if (a < b && c > d) {}", 'expected "<1>"')
+
+        self.assertIn("if (a < b && c > d) {}", user)
+        self.assertIn('expected "<1>"', user)
+
+    def test_render_extract_contract_fills_placeholders(self) -> None:
+        system, user = PromptManager.render_extract_contract(
+            "Foo", "int bar()", "return 1;", javadoc="返回 1"
+        )
+
+        self.assertIs(system, PromptManager.EXTRACT_CONTRACT_SYSTEM)
+        self.assertIn("类名：Foo", user)
+        self.assertIn("方法签名：int bar()", user)
+        self.assertIn("返回 1", user)
+
+    def test_render_extract_pattern_skips_missing_sections(self) -> None:
+        _, user = PromptManager.render_extract_pattern(diff_patch="- a\n+ b")
+
+        self.assertIn("```diff\n- a\n+ b\n```", user)
+        self.assertNotIn("Bug 描述", user)
+        self.assertNotIn("修复前代码", user)
+        self.assertTrue(user.endswith("请提取该 Bug 反映的缺陷模式。"))
+
+    def test_contract_conditions_are_joined_before_rendering(self) -> None:
+        contract = Contract(
+            id="c1",
+            class_name="Calc",
+            method_name="add",
+            method_signature="int add(int a, int b)",
+            preconditions=["a > 0", "b > 0"],
+            exceptions=["IllegalArgumentException"],
+            source="javadoc",
+        )
+
+        _, user = PromptManager.render_generate_mutation("Calc", "1 | x", contracts=[contract])
+
+        self.assertIn("  前置条件: a > 0, b > 0\n  后置条件: \n", user)
+        self.assertIn("  异常条件: IllegalArgumentException", user)
+
+    def test_render_generate_mutation_batch_matches_single_renders(self) -> None:
+        contract = Contract(
+            id="c1",
+            class_name="Calc",
+            method_name="add",
+            method_signature="int add(int a, int b)",
+            preconditions=["a > 0"],
+            source="javadoc",
+        )
+
+        batch = PromptManager.render_generate_mutation_batch(
+            "Calc", "   1 | class Calc {}", ["add", "sub", None], contracts=[contract]
+        )
+
+        self.assertEqual(
+            batch,
+            [
+                PromptManager.render_generate_mutation(
+                    "Calc", "   1 | class Calc {}", contracts=[contract], target_method=method
+                )
+                for method in ["add", "sub", None]
+            ],
+        )
+
+    def test_refine_test_joins_coverage_gap_lists(self) -> None:
+        test_case = TestCase(id="t1", class_name="CalcTest", target_class="Calc")
+
+        _, user = PromptManager.render_refine_test(
+            test_case,
+            "class Calc {}",
+            coverage_gaps={"uncovered_lines": [3, 4], "uncovered_branches": ["b1"]},
+        )
+
+        self.assertIn("未覆盖的行: 3, 4\n未覆盖的分支: b1", user)
+
+    def test_line_numbered_source_is_reused_across_renders(self) -> None:
+        class_code = "class Calc {\n    int one() { return 1; }\n}"
+
+        first = add_line_numbers(class_code)
+
+        self.assertIs(add_line_numbers(class_code), first)
+        self.assertEqual(first.splitlines()[1], "   2 |     int one() { return 1; }")
+
+    def test_long_class_code_keeps_only_code_around_target_method(self) -> None:
+        filler = "".join(
+            f"\n    public int f{i}(int a) {{\n        return a + {i};\n    }}\n" for i in range(40)
+        )
+        class_code = (
+            "package com.example;\n\npublic class Calc {\n    private int base;\n\n"
+            "    public Calc(int base) {\n        this.base = base;\n    }\n"
+            f"{filler}\n    public int sub(int a) {{\n        return base - a;\n    }}\n}}"
+        )
+
+        with patch.object(PromptManager, "MAX_CLASS_CODE_CHARS", 200):
+            _, user = PromptManager.render_generate_test(
+                "com.example.Calc", "int sub(int a)", class_code
+            )
+
+        self.assertIn("   4 |     private int base;", user)
+        self.assertIn("   6 |     public Calc(int base) {", user)
+        self.assertIn("public int sub(int a) {", user)
+        self.assertIn("... （省略第", user)
+        self.assertNotIn("public int f20(int a)", user)
+
+    def test_short_class_code_is_numbered_in_full(self) -> None:
+        class_code = "public class Calc {\n    public int sub(int a) { return -a; }\n}"
+
+        _, user = PromptManager.render_generate_test("Calc", "int sub(int a)", class_code)
+
+        self.assertIn(add_line_numbers(class_code), user)
+
+    def test_static_system_prompts_are_returned_as_the_same_object(self) -> None:
+        first, _ = PromptManager.render_fix_test("code", "error")
+        second, _ = PromptManager.render_fix_test("other code", "other error")
+
+        self.assertIs(first, second)
+
+    def test_render_agent_planner_reuses_system_prompt_for_same_tools(self) -> None:
+        tools_description = "- select_target: 选择目标"
+        state = {
+            "global_mutation_score": 0.0,
+            "line_coverage": 0.0,
+            "branch_coverage": 0.0,
+            "mutation_score": 0.0,
+        }
+
+        first, _ = PromptManager.render_agent_planner(state, tools_description)
+        second, _ = PromptManager.render_agent_planner(state, tools_description)
+
+        self.assertIs(first, second)
+
+    def test_render_agent_planner_tolerates_disabled_mutation_metrics(self) -> None:
+        state = {
+            "global_mutation_score": None,
+            "line_coverage": 0.12345,
+            "branch_coverage": 0,
+            "mutation_score": None,
+            "available_targets": [{"class_name": "Calc", "method_name": "add", "coverage": 0.456}],
+        }
+
+        _, user = PromptManager.render_agent_planner(state, "- select_target: 选择目标")
+
+        self.assertIn("全局变异分数: None\n", user)
+        self.assertIn("全局行覆盖率: 0.123（整个项目）", user)
+        self.assertIn("- Calc.add: 覆盖率 0.46,", user)
+
+    def test_render_agent_planner_injects_tools_description(self) -> None:
+        state = {
+            "global_mutation_score": 0.5,
+            "line_coverage": 0.25,
+            "branch_coverage": 0.125,
+            "mutation_score": 0.0,
+        }
+
+        system, user = PromptManager.render_agent_planner(state, "- run_evaluation: 运行评估")
+
+        self.assertTrue(system.startswith(PromptManager.AGENT_PLANNER_SYSTEM_PREFIX))
+        self.assertTrue(system.endswith(PromptManager.AGENT_PLANNER_SYSTEM_SUFFIX))
+        self.assertIn("- run_evaluation: 运行评估", system)
+        self.assertIn("全局变异分数: 0.5", user)
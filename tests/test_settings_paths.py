@@ -44,6 +44,7 @@ class SettingsPathsTests(unittest.TestCase):
             settings.resolve_embedding_cache_path(),
             Path("./state/chromadb/embedding_cache"),
         )
+        self.assertEqual(settings.resolve_llm_cache_path(), Path("./state/llm_cache"))
 
     def test_from_yaml_ignores_github_section(self) -> None:
         with tempfile.TemporaryDirectory() as tmp_dir:
@@ -18,6 +18,7 @@ const defaultConfig = {
     reasoning_effort: null,
     reasoning_enabled: null,
     verbosity: null,
+    persist_response_cache: false,
   },
   execution: {
     timeout: 300,
@@ -50,6 +51,9 @@ const defaultConfig = {
       api_key: null,
       model: 'text-embedding-3-small',
       batch_size: 100,
+      backend: 'api',
+      model_path: null,
+      dimensions: null,
     },
     retrieval: {
       top_k: 5,
@@ -82,6 +82,12 @@ export const CONFIG_SECTIONS: ConfigSectionDefinition[] = [
         kind: 'text',
         placeholder: 'low | medium | high',
       },
+      {
+        path: ['llm', 'persist_response_cache'],
+        label: '持久化响应缓存',
+        description: '将 temperature 为 0 的响应保存到状态目录，跨运行复用。',
+        kind: 'boolean',
+      },
     ],
   },
   {
@@ -255,6 +261,26 @@ export const CONFIG_SECTIONS: ConfigSectionDefinition[] = [
         kind: 'number',
         step: '1',
       },
+      {
+        path: ['knowledge', 'embedding', 'backend'],
+        label: '嵌入后端',
+        description: '远程 API 或本地 int8 量化 ONNX 模型。',
+        kind: 'text',
+        placeholder: 'api | onnx_int8',
+      },
+      {
+        path: ['knowledge', 'embedding', 'model_path'],
+        label: '本地模型目录',
+        description: '后端为 onnx_int8 时使用的 ONNX 模型目录。',
+        kind: 'text',
+      },
+      {
+        path: ['knowledge', 'embedding', 'dimensions'],
+        label: '嵌入维度',
+        description: '截断后的向量维度，仅 Matryoshka 模型支持，留空使用默认维度。',
+        kind: 'number',
+        step: '1',
+      },
       {
         path: ['knowledge', 'retrieval', 'top_k'],
         label: '检索 Top K',